@@ -0,0 +1,229 @@
+import sys
+import os
+import gc
+import json
+import time
+import random
+import platform
+import argparse
+import resource
+import subprocess
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# src.main monte static/ à l'import : il doit être importé depuis la racine du projet
+os.chdir(ROOT)
+from src.main import smart_compare
+from src.content_manager import ContentManager
+from src.exercise_engine import ExerciseEngine
+from src.grading import Grader
+from src.generators import ExerciseFactory
+from src.yaml_loader import YAML_BACKEND
+from synthetic_content import generate_catalog
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_OUTPUT_DIR = os.path.join(ROOT, ".cache", "benchmarks")
+
+# Recette représentative des pages 'mode: page' du contenu réel
+FACTORY_RECIPE = [
+    {"type": "calcul", "subtype": "multiplication", "difficulty": "medium", "weight": 2},
+    {"type": "calcul", "subtype": "multiplication", "difficulty": "simple", "table": 3, "weight": 2},
+    {"type": "probleme", "categories": ["pizza"], "difficulty": "simple", "weight": 1},
+    {"type": "divisibilite", "weight": 1},
+    {"type": "cours", "interaction": "qcm", "weight": 1},
+]
+
+
+def measure(name: str, fn: Callable[[], Any], ops: int, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Best wall time over `repeat` runs of fn (which performs `ops` operations),
+    then one extra run under tracemalloc for the allocation peak.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    fn()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        "benchmark": name,
+        "ops": ops,
+        "best_s": round(best, 6),
+        "mean_s": round(sum(times) / len(times), 6),
+        "ops_per_s": round(ops / best, 1) if best > 0 else None,
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_kib": round((after - before) / 1024, 1),
+    }
+
+
+def _comparison_cases(exercises: List[Dict[str, Any]]) -> List[tuple]:
+    """Réponses correctes, fausses et équivalentes (fractions, décimaux, listes)."""
+    cases = []
+    for ex in exercises:
+        answer = ex["answer"]
+        cases.append((answer, answer, ex["type"]))
+        if isinstance(answer, list):
+            cases.append((list(reversed(answer)), answer, ex["type"]))
+        else:
+            cases.append(("42", answer, ex["type"]))
+    cases += [("1/2", "0.5", None), ("0,5", "1/2", None), ("3/4", "6/8", None), ("abc", "1/3", None)]
+    return cases
+
+
+def run_size(templates: int, subjects: int, ops: int, repeat: int, seed: int) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_content_") as root:
+        start = time.perf_counter()
+        generate_catalog(root, templates, subjects, seed)
+        print(f"  catalog generated in {time.perf_counter() - start:.2f}s")
+
+        os.chdir(root)
+        try:
+            results.append(measure("load_all_cold", lambda: ContentManager.load_all(use_snapshot=False), 1, repeat))
+            ContentManager.build_snapshot()
+            results.append(measure("load_all_snapshot", lambda: ContentManager.load_all(use_snapshot=True), 1, repeat))
+
+            all_templates = list(ContentManager.get_all_templates().values())
+            rng = random.Random(seed)
+            subject_ids = [f"s{i}" for i in range(subjects)]
+            queries = []
+            for _ in range(ops):
+                subject = rng.choice(subject_ids)
+                target = rng.choice([
+                    [f"synth.{subject}"],
+                    [f"synth.{subject}.table_{rng.randint(1, 10)}"],
+                    [f"synth.{subject}", "format.word_problem"],
+                    [f"synth.kind_{rng.randint(0, 3)}"],
+                ])
+                queries.append((target, rng.choice([None, 1, 2, 3])))
+
+            def select():
+                for target, difficulty in queries:
+                    ContentManager.select_templates(target, difficulty)
+            results.append(measure("select_templates", select, len(queries), repeat))
+
+            sample = [rng.choice(all_templates) for _ in range(ops)]
+
+            # Each repetition replays the same draws (seeded RNG threaded through generation)
+            def generate():
+                gen_rng = random.Random(seed)
+                for t in sample:
+                    ExerciseEngine.generate_exercise(t, rng=gen_rng)
+            results.append(measure("generate_exercise", generate, len(sample), repeat))
+
+            batches = max(1, ops // 10)
+
+            def factory():
+                gen_rng = random.Random(seed)
+                for _ in range(batches):
+                    ExerciseFactory.create_exercises(FACTORY_RECIPE, 10, rng=gen_rng)
+            results.append(measure("factory_create_exercises", factory, batches * 10, repeat))
+
+            case_rng = random.Random(seed)
+            case_exercises = [ExerciseEngine.generate_exercise(t, rng=case_rng) for t in sample]
+            cases = _comparison_cases(case_exercises)
+
+            def compare():
+                for user_val, correct_val, ex_type in cases:
+                    smart_compare(user_val, correct_val, ex_type)
+            results.append(measure("smart_compare", compare, len(cases), repeat))
+
+            # Soumission entière contre les clés précalculées : une bonne réponse sur deux
+            answers = {ex["id"]: ex["answer"] if i % 2 else "42" for i, ex in enumerate(case_exercises)}
+            results.append(measure("grade_submission", lambda: Grader.grade(case_exercises, answers), len(case_exercises), repeat))
+        finally:
+            os.chdir(ROOT)
+
+    for r in results:
+        r["templates"] = templates
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str):
+    """Affiche le rapport de temps par opération (courant / référence) de chaque benchmark."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["templates"], r["benchmark"]): r for r in baseline.get("results", [])}
+    print(f"\nComparison with {baseline_path} ({baseline.get('meta', {}).get('git_revision')}):")
+    for r in current["results"]:
+        old = previous.get((r["templates"], r["benchmark"]))
+        if not old or not old["best_s"]:
+            continue
+        ratio = (r["best_s"] / r["ops"]) / (old["best_s"] / old["ops"])
+        flag = "  <-- slower" if ratio > 1.1 else ""
+        print(f"  {r['templates']:>7} {r['benchmark']:<26} x{ratio:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content loading and exercise generation.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated template counts")
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per throughput benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON result file (default: .cache/benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous JSON result file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = []
+    for size in sizes:
+        print(f"Benchmarking {size} templates...")
+        for r in run_size(size, args.subjects, args.ops, args.repeat, args.seed):
+            print(f"  {r['benchmark']:<26} {r['best_s'] * 1000:10.2f} ms  "
+                  f"{r['ops_per_s'] or 0:>12} ops/s  peak {r['peak_kib']:>10} KiB")
+            results.append(r)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "yaml_backend": YAML_BACKEND,
+            "subjects": args.subjects,
+            "ops": args.ops,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            # ru_maxrss est en KiB sous Linux
+            "max_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, time.strftime("benchmark-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}.")
+
+    if args.compare:
+        compare_results(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
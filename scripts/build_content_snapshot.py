@@ -0,0 +1,22 @@
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.content_manager import ContentManager
+from src.content_snapshot import SNAPSHOT_PATH
+
+def build():
+    # Les chemins du contenu sont relatifs à la racine du projet
+    os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+    print("Building content snapshot...")
+    if ContentManager.build_snapshot():
+        ContentManager.print_load_report()
+        print(f"Snapshot written to {SNAPSHOT_PATH}.")
+    else:
+        print("Snapshot build failed.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    build()
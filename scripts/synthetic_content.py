@@ -0,0 +1,185 @@
+import sys
+import os
+import json
+import random
+import shutil
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Synthetic catalogs use the same layout and formats as the real content:
+#   content/cours.yaml, content/<subject>/road.yaml, content/<subject>/exos_<n>.yaml,
+#   content/<subject>/cours.md, config/personnages.yaml
+# The first subject also gets a copy of the real problem scenarios (content/maths/scenarios.yaml).
+
+TEMPLATES_PER_FILE = 250
+SCENARIOS_PATH = os.path.join(os.path.dirname(__file__), "..", "content", "maths", "scenarios.yaml")
+TABLES = 10
+
+
+def _q(value) -> str:
+    # JSON strings are valid double-quoted YAML scalars
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _template_yaml(rng: random.Random, subject: str, n: int) -> str:
+    """One template entry, rotating through the shapes found in the real catalog."""
+    table = n % TABLES + 1
+    difficulty = n % 3 + 1
+    kind = n % 4
+    tags = [f"synth.{subject}", f"synth.{subject}.table_{table}", f"synth.kind_{kind}"]
+    if n % 7 == 0:
+        tags.append("format.word_problem")
+    lines = [
+        f"  - id: {_q(f'{subject}_t{n}')}",
+        f"    tags: {_q(tags)}",
+        f"    difficulty: {difficulty}",
+    ]
+    if kind == 0:
+        # Calcul pur : vars min/max + logic
+        hi = rng.randint(10, 100)
+        lines += [
+            "    vars:",
+            f"      a: {{ min: {table}, max: {table} }}",
+            f"      b: {{ min: 1, max: {hi} }}",
+            "    content:",
+            f"      question: {_q('Combien font {a} x {b} ?')}",
+            "    logic: \"{a} * {b}\"",
+            f"    explanation: {_q('On multiplie {a} par {b}.')}",
+        ]
+    elif kind == 1:
+        # QCM à choix multiple avec réponses par indices
+        lines += [
+            "    interaction: \"qcm\"",
+            "    multiple: true",
+            "    vars:",
+            "      a: { min: 2, max: 9 }",
+            "      b: { min: 2, max: 9 }",
+            "    content:",
+            f"      question: {_q('{a} x {b} est-il égal à {b} x {a} ?')}",
+            "      options:",
+            f"        - {_q('Oui, la multiplication est commutative.')}",
+            f"        - {_q('Non, l ordre change le résultat.')}",
+            f"        - {_q('Oui, le résultat est le même.')}",
+            "      answer: [0, 2]",
+            f"      explanation: {_q('{a} x {b} et {b} x {a} font le même total.')}",
+        ]
+    elif kind == 2:
+        # Variables en liste + expressions [[ ]] dans le texte
+        values = sorted(rng.sample(range(2, 50), 6))
+        lines += [
+            "    vars:",
+            f"      p: {_q(values)}",
+            "      q: { min: 2, max: 12 }",
+            "    content:",
+            f"      question: {_q('Un sac contient {p} billes. On en ajoute [[ {q} * 2 ]]. Combien y en a-t-il ?')}",
+            f"      explanation: {_q('{p} + [[ {q} * 2 ]] = [[ {p} + {q} * 2 ]]')}",
+            "    logic: \"{p} + {q} * 2\"",
+        ]
+    else:
+        # Réponse décimale
+        lines += [
+            "    vars:",
+            "      a: { min: 1, max: 99 }",
+            "      b: [2, 4, 5, 8]",
+            "    content:",
+            f"      question: {_q('Combien font {a} / {b} ?')}",
+            "      unit: \"\"",
+            "    logic: \"{a} / {b}\"",
+        ]
+    return "\n".join(lines)
+
+
+def _road_yaml(subject: str, title: str) -> str:
+    return f"""title: {_q(title)}
+road:
+  - id: {subject}_intro
+    title: "Introduction"
+    pages:
+      - type: "cours"
+        content: "cours.md"
+  - id: {subject}_tables
+    type: "sequence"
+    repeat: {TABLES}
+    title: "Entraînement : Table de {{index}}"
+    step_config:
+      type: "practice"
+      selection:
+        target: ["synth.{subject}.table_{{index}}"]
+        count: 5
+        difficulty: 1
+  - id: {subject}_mixed
+    title: "Mélange"
+    pages:
+      - type: "practice"
+        selection:
+          target: ["synth.{subject}"]
+          count: 10
+          difficulty: 2
+      - type: "practice"
+        selection:
+          - target: ["synth.{subject}", "format.word_problem"]
+            count: 3
+          - target: ["synth.kind_1"]
+            count: 2
+  - id: {subject}_exam
+    title: "Examen"
+    pages:
+      - type: "exam"
+        selection:
+          target: ["synth.{subject}"]
+          count: 20
+"""
+
+
+def generate_catalog(root: str, templates: int, subjects: int = 5, seed: int = 0) -> str:
+    """
+    Writes a synthetic project tree under `root` and returns it.
+    The catalog is deterministic for a given (templates, subjects, seed).
+    """
+    rng = random.Random(seed)
+    content_dir = os.path.join(root, "content")
+    os.makedirs(os.path.join(root, "config"), exist_ok=True)
+    os.makedirs(content_dir, exist_ok=True)
+
+    with open(os.path.join(root, "config", "personnages.yaml"), "w", encoding="utf-8") as f:
+        f.write("personnages:\n  - name: \"Crac\"\n    spritesheet: \"tete_lapin.png\"\n"
+                "    width: 379\n    height: 379\n    emotions:\n      - name: \"content\"\n        coords: [0, 0]\n")
+
+    subject_ids = [f"s{i}" for i in range(subjects)]
+    with open(os.path.join(content_dir, "cours.yaml"), "w", encoding="utf-8") as f:
+        f.write("cours:\n")
+        for subject in subject_ids:
+            f.write(f" - page: {subject}/road.yaml\n")
+
+    for i, subject in enumerate(subject_ids):
+        subject_dir = os.path.join(content_dir, subject)
+        os.makedirs(subject_dir, exist_ok=True)
+        with open(os.path.join(subject_dir, "road.yaml"), "w", encoding="utf-8") as f:
+            f.write(_road_yaml(subject, f"Sujet synthétique {i}"))
+        with open(os.path.join(subject_dir, "cours.md"), "w", encoding="utf-8") as f:
+            f.write(f"---\ntitle: Cours {subject}\n---\n# Cours {subject}\n\nContenu de démonstration.\n")
+
+        # Templates répartis équitablement entre les sujets
+        count = templates // subjects + (1 if i < templates % subjects else 0)
+        for file_idx, start in enumerate(range(0, count, TEMPLATES_PER_FILE)):
+            with open(os.path.join(subject_dir, f"exos_{file_idx}.yaml"), "w", encoding="utf-8") as f:
+                f.write("generators:\n")
+                for n in range(start, min(count, start + TEMPLATES_PER_FILE)):
+                    f.write(_template_yaml(rng, subject, n))
+                    f.write("\n")
+        if i == 0 and os.path.exists(SCENARIOS_PATH):
+            shutil.copy(SCENARIOS_PATH, os.path.join(subject_dir, "scenarios.yaml"))
+    return root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic content catalog.")
+    parser.add_argument("root", help="Output directory (gets content/ and config/)")
+    parser.add_argument("--templates", type=int, default=1000)
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generate_catalog(args.root, args.templates, args.subjects, args.seed)
+    print(f"Synthetic catalog with {args.templates} templates written to {args.root}.")
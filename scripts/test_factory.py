@@ -4,9 +4,12 @@ import os
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from src.content_manager import ContentManager
 from src.generators import ExerciseFactory
 
 def test_factory():
+    # Problem scenarios are read from the content (content/*/scenarios*.yaml)
+    ContentManager.load_all()
     recipe = [
         {
             "type": "calcul", 
@@ -0,0 +1,314 @@
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from src.fraction_generator import FractionGenerator
+
+# SVG des blueprints, stockés sous le hash du blueprint canonique et servis sur
+# /blueprints/<hash>.svg avec des en-têtes immuables : le navigateur n'a plus rien à dessiner.
+BLUEPRINT_DIR = os.path.join(".cache", "blueprints")
+# SVG gardés en mémoire (les plus anciens restent lisibles sur disque)
+MEMORY_ENTRIES = 2048
+# À incrémenter quand le rendu change : les anciennes URL immuables ne doivent pas être réutilisées
+RENDER_VERSION = 1
+URL_PREFIX = "/blueprints/"
+KEY_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Champs d'un fraction_scenario qui ne servent qu'au dessin : inutiles une fois l'URL du SVG attachée
+FRACTION_VISUAL_FIELDS = ("participants", "visual", "parts")
+
+# Couleurs de static/js/blueprint_renderer.js (var(--primary) est résolue : une image ne voit pas le CSS de la page)
+PRIMARY = "#55a630"
+
+
+def _n(value: float) -> str:
+    # Coordonnées courtes : 2 décimales au plus
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _svg(width: float, height: float, body: List[str]) -> str:
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{_n(width)}" height="{_n(height)}" '
+        f'viewBox="0 0 {_n(width)} {_n(height)}">' + "".join(body) + "</svg>"
+    )
+
+
+def _polar(cx: float, cy: float, r: float, angle: float):
+    return cx + r * math.cos(angle), cy + r * math.sin(angle)
+
+
+def _render_pizza(data: Dict[str, Any]) -> str:
+    size, cx, cy, r = 200, 100, 100, 90
+    total = int(data.get("total") or 8)
+    highlighted = int(data.get("highlighted") or 0)
+    eaten = data.get("style") == "eaten"
+    step = 2 * math.pi / total
+    body = [f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="#eebb99" stroke="#885522" stroke-width="2"/>']
+    for i in range(total):
+        start = i * step - math.pi / 2
+        x1, y1 = _polar(cx, cy, r, start)
+        x2, y2 = _polar(cx, cy, r, start + step)
+        fill, opacity = "#fff8e7", 1
+        if i < highlighted:
+            fill, opacity = ("#333", 0.2) if eaten else (PRIMARY, 1)
+        body.append(
+            f'<path d="M {cx} {cy} L {_n(x1)} {_n(y1)} A {r} {r} 0 0 1 {_n(x2)} {_n(y2)} Z" '
+            f'fill="{fill}" stroke="#885522" stroke-width="1" fill-opacity="{opacity}"/>'
+        )
+        if not eaten or i >= highlighted:
+            mx, my = _polar(cx, cy, r * 0.6, start + step / 2)
+            body.append(f'<circle cx="{_n(mx)}" cy="{_n(my)}" r="{_n(r / 10)}" fill="#cc3333"/>')
+    return _svg(size, size, body)
+
+
+def _render_grid(data: Dict[str, Any]) -> str:
+    rows, cols = int(data["rows"]), int(data["cols"])
+    highlighted = int(data.get("highlighted") or 0)
+    missing = data.get("style") == "missing"
+    cell = 40
+    body = []
+    for i in range(rows * cols):
+        fill, opacity = "#5c3a21", 1
+        if i < highlighted:
+            fill, opacity = ("#222", 0.1) if missing else ("#ff9900", 1)
+        x, y = (i % cols) * cell, (i // cols) * cell
+        body.append(
+            f'<rect x="{x + 2}" y="{y + 2}" width="{cell - 4}" height="{cell - 4}" rx="4" '
+            f'fill="{fill}" fill-opacity="{opacity}" stroke="#3d2616" stroke-width="1"/>'
+        )
+    return _svg(cols * cell, rows * cell, body)
+
+
+def _render_beaker(data: Dict[str, Any]) -> str:
+    capacity = data.get("capacity") or 500
+    level_start = data.get("level_start") or 0
+    level_end = data.get("level_end") or 0
+    get_y = lambda volume: 190 - (volume / capacity) * 180
+    body = ['<path d="M 10 10 L 10 190 L 90 190 L 90 10" fill="none" stroke="#aaa" stroke-width="3"/>']
+    y_start = get_y(level_start)
+    body.append(f'<rect x="11" y="{_n(y_start)}" width="78" height="{_n(190 - y_start)}" fill="#ddf"/>')
+    if level_end > level_start:
+        y_end = get_y(level_end)
+        body.append(
+            f'<rect x="11" y="{_n(y_end)}" width="78" height="{_n(y_start - y_end)}" '
+            f'fill="#aaf" fill-opacity="0.5" stroke="#88f" stroke-dasharray="4"/>'
+        )
+    for volume in range(100, int(capacity), 100):
+        y = get_y(volume)
+        body.append(f'<line x1="10" y1="{_n(y)}" x2="20" y2="{_n(y)}" stroke="#aaa" stroke-width="1"/>')
+        body.append(f'<text x="25" y="{_n(y + 4)}" font-size="10" fill="#aaa">{volume}</text>')
+    return _svg(100, 200, body)
+
+
+def _render_fraction_pizza(blueprint: Dict[str, Any]) -> str:
+    cx, cy, r = 100, 100, 90
+    colors = FractionGenerator.COLORS
+    body = [f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{colors["Empty"]}" stroke="{colors["PizzaCrust"]}" stroke-width="4"/>']
+    for p in blueprint["participants"]:
+        span = p["end_ratio"] - p["start_ratio"]
+        if span <= 0:
+            continue
+        if span >= 1:
+            # Un arc de 360° ne se dessine pas : disque complet
+            body.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{p["color"]}" stroke="#fff" stroke-width="2"/>')
+            continue
+        x1, y1 = _polar(cx, cy, r, math.radians(p["start_angle"] - 90))
+        x2, y2 = _polar(cx, cy, r, math.radians(p["end_angle"] - 90))
+        body.append(
+            f'<path d="M {cx} {cy} L {_n(x1)} {_n(y1)} A {r} {r} 0 {p["is_large_arc"]} 1 {_n(x2)} {_n(y2)} Z" '
+            f'fill="{p["color"]}" stroke="#fff" stroke-width="2"/>'
+        )
+    parts = int(blueprint["total_parts"])
+    if parts > 1:
+        for i in range(parts):
+            x, y = _polar(cx, cy, r, 2 * math.pi * i / parts - math.pi / 2)
+            body.append(f'<line x1="{cx}" y1="{cy}" x2="{_n(x)}" y2="{_n(y)}" stroke="rgba(0,0,0,0.2)" stroke-width="1"/>')
+    return _svg(200, 200, body)
+
+
+def _render_fraction_grid(blueprint: Dict[str, Any]) -> str:
+    rows, cols = blueprint["rows"], blueprint["cols"]
+    w, h = 180 / cols, 180 / rows
+    owners = [FractionGenerator.COLORS["Empty"]] * (rows * cols)
+    for p in blueprint["participants"]:
+        start, end = p["cells"]
+        owners[start:end] = [p["color"]] * (end - start)
+    body = ['<rect x="10" y="10" width="180" height="180" fill="white" stroke="#555"/>']
+    for i, color in enumerate(owners):
+        x, y = 10 + (i % cols) * w, 10 + (i // cols) * h
+        body.append(f'<rect x="{_n(x)}" y="{_n(y)}" width="{_n(w)}" height="{_n(h)}" fill="{color}" stroke="#eee"/>')
+    return _svg(200, 200, body)
+
+
+def _render_fraction_cylinder(blueprint: Dict[str, Any]) -> str:
+    x, y, w, h = 60, 20, 80, 160
+    body = [f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="#fcfcfc" stroke="#333" stroke-width="3" rx="5"/>']
+    current_y = y + h
+    # Niveaux empilés depuis le bas
+    for p in blueprint["participants"]:
+        fill_height = p["fraction_val"] * h
+        current_y -= fill_height
+        body.append(f'<rect x="{x + 2}" y="{_n(current_y)}" width="{w - 4}" height="{_n(fill_height)}" fill="{p["color"]}" stroke="none"/>')
+    steps = int(blueprint["total_parts"])
+    if steps < 20:
+        for i in range(1, steps):
+            grad_y = _n(y + h - (i / steps) * h)
+            body.append(f'<line x1="{x}" y1="{grad_y}" x2="{x + 15}" y2="{grad_y}" stroke="#333" stroke-width="2"/>')
+            body.append(f'<line x1="{x + w - 15}" y1="{grad_y}" x2="{x + w}" y2="{grad_y}" stroke="#333" stroke-width="2"/>')
+    return _svg(200, 200, body)
+
+
+# Types de static/js/blueprint_renderer.js (ProblemGenerator) et de fraction_renderer.js
+# (FractionGenerator.get_rgb_visual_blueprint)
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "pizza": _render_pizza,
+    "grid": _render_grid,
+    "beaker": _render_beaker,
+    "PIZZA": _render_fraction_pizza,
+    "GRID": _render_fraction_grid,
+    "CYLINDER": _render_fraction_cylinder,
+}
+
+
+def render_svg(blueprint: Dict[str, Any]) -> Optional[str]:
+    """SVG d'un blueprint, None si son type n'a pas de rendu serveur."""
+    renderer = RENDERERS.get(blueprint.get("type"))
+    return renderer(blueprint) if renderer else None
+
+
+def blueprint_key(blueprint: Dict[str, Any]) -> str:
+    """Hash du blueprint canonique (clés triées) et de la version du rendu."""
+    canonical = json.dumps(blueprint, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{RENDER_VERSION}:{canonical}".encode("utf-8")).hexdigest()[:32]
+
+
+class BlueprintSVGCache:
+    """
+    SVG adressés par contenu : un blueprint rendu une fois est servi à toutes
+    les pages qui le réutilisent. Mémoire (LRU) puis disque, pour que les URL
+    restent valides après un redémarrage et entre workers.
+    """
+
+    _svgs: "OrderedDict[str, str]" = OrderedDict()
+    _lock = threading.Lock()
+    directory = BLUEPRINT_DIR
+
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    @classmethod
+    def _remember(cls, key: str, svg: str):
+        # Appelé sous verrou
+        cls._svgs[key] = svg
+        while len(cls._svgs) > MEMORY_ENTRIES:
+            cls._svgs.popitem(last=False)
+            cls.evictions += 1
+
+    @classmethod
+    def url_for(cls, blueprint: Dict[str, Any]) -> Optional[str]:
+        """URL du SVG du blueprint, rendu et stocké au premier passage ; None sans rendu serveur."""
+        if blueprint.get("type") not in RENDERERS:
+            return None
+        key = blueprint_key(blueprint)
+        with cls._lock:
+            if key in cls._svgs:
+                cls._svgs.move_to_end(key)
+                cls.hits += 1
+                return f"{URL_PREFIX}{key}.svg"
+        try:
+            svg = render_svg(blueprint)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            print(f"❌ Rendu SVG impossible ({blueprint.get('type')}): {e}")
+            return None
+        with cls._lock:
+            cls.misses += 1
+            cls._remember(key, svg)
+        cls._write(key, svg)
+        return f"{URL_PREFIX}{key}.svg"
+
+    @classmethod
+    def _path(cls, key: str) -> str:
+        return os.path.join(cls.directory, f"{key}.svg")
+
+    @classmethod
+    def _write(cls, key: str, svg: str):
+        path = cls._path(key)
+        if os.path.exists(path):
+            return
+        # Écriture atomique : un autre worker ne lit jamais un fichier à moitié écrit
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cls.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(svg)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Impossible d'écrire le SVG ({path}): {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def get(cls, key: str) -> Optional[str]:
+        """SVG stocké sous key (mémoire puis disque), None si inconnu."""
+        if not KEY_PATTERN.match(key):
+            return None
+        with cls._lock:
+            svg = cls._svgs.get(key)
+            if svg is not None:
+                cls._svgs.move_to_end(key)
+                return svg
+        try:
+            with open(cls._path(key), "r", encoding="utf-8") as f:
+                svg = f.read()
+        except OSError:
+            return None
+        with cls._lock:
+            cls._remember(key, svg)
+        return svg
+
+    @classmethod
+    def attach(cls, exercises: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Remplace les blueprints des exercices par l'URL de leur SVG
+        (meta.visual_url, ou visual_url pour un fraction_scenario, dont les
+        champs de dessin sont alors retirés).
+        """
+        for ex in exercises:
+            meta = ex.get("meta") or {}
+            blueprint = meta.get("visual_blueprint")
+            if blueprint:
+                url = cls.url_for(blueprint)
+                if url:
+                    ex["meta"] = {k: v for k, v in meta.items() if k != "visual_blueprint"}
+                    ex["meta"]["visual_url"] = url
+            elif ex.get("type") == "fraction_scenario" and ex.get("participants"):
+                url = cls.url_for(FractionGenerator.get_rgb_visual_blueprint(ex))
+                if url:
+                    for field in FRACTION_VISUAL_FIELDS:
+                        ex.pop(field, None)
+                    ex["visual_url"] = url
+        return exercises
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._svgs.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Statistiques au format de FileCache.stats() (page /debug)."""
+        with cls._lock:
+            return {
+                "name": "blueprint_svg",
+                "entries": len(cls._svgs),
+                "max_entries": MEMORY_ENTRIES,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+            }
@@ -0,0 +1,316 @@
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple, Any
+from src.models import Subject, RoadStep, ExerciseTemplate, Event
+from src.template_index import TemplateIndex, SelectionPool
+from src.subject_road import SubjectRoad
+from src.content_paths import ContentPathIndex
+from src.template_compiler import CompiledTemplate
+from src.variable_sampler import Enumeration
+
+# Résultat du parsing d'un fichier de route : le sujet et ses étapes.
+# None si le fichier est vide.
+ParsedRoad = Optional[Tuple[Subject, SubjectRoad]]
+
+
+class StepNeighbours(NamedTuple):
+    """Position d'une étape dans la route de son sujet."""
+    position: int
+    previous_id: Optional[str]
+    next_id: Optional[str]
+    page_count: int
+    # URL de la page suivante pour chaque page de l'étape (None après la dernière)
+    next_page_urls: Tuple[Optional[str], ...]
+
+
+class ContentGeneration:
+    """
+    Vue cohérente et immuable du contenu chargé.
+
+    Chaque (re)chargement construit une nouvelle génération à partir des
+    résultats de parsing par fichier, puis ContentManager la publie en un
+    seul échange de référence. Le contenu d'une génération publiée n'est jamais
+    modifié : les requêtes en cours gardent donc une vue stable du contenu.
+
+    Seuls des caches dérivés (selection_pools des étapes de séquences,
+    _dialogue_inventory) sont remplis à la demande depuis les
+    threads des requêtes. C'est sans danger : chaque écriture stocke une valeur
+    calculée depuis le contenu figé, identique quel que soit le thread, et une
+    affectation de dict est atomique sous le GIL.
+    """
+
+    def __init__(
+        self,
+        road_order: Optional[List[str]] = None,
+        roads: Optional[Dict[str, ParsedRoad]] = None,
+        template_files: Optional[Dict[str, Dict[str, ExerciseTemplate]]] = None,
+        events: Optional[Dict[str, Event]] = None,
+        characters: Optional[Dict[str, Any]] = None,
+        paths: Optional[ContentPathIndex] = None,
+        compiled: Optional[Dict[str, CompiledTemplate]] = None,
+    ):
+        self.id = 0  # attribué à la publication
+        # Chemins des routes dans l'ordre de cours.yaml
+        self.road_order: List[str] = road_order or []
+        # Résultats de parsing par fichier, réutilisés lors d'un rechargement partiel
+        self.roads: Dict[str, ParsedRoad] = roads or {}
+        self.template_files: Dict[str, Dict[str, ExerciseTemplate]] = template_files or {}
+        self.events: Dict[str, Event] = events or {}
+        self.characters: Dict[str, Any] = characters or {}
+        # Inventaire des fichiers : reconstruit par parcours du disque, jamais sérialisé
+        self.paths: ContentPathIndex = paths or ContentPathIndex("", [])
+
+        self.subjects: Dict[str, Subject] = {}
+        self.templates: Dict[str, ExerciseTemplate] = {}
+        self._merge()
+        self._build_indexes(compiled)
+
+    def _merge(self):
+        for road_path in self.road_order:
+            parsed = self.roads.get(road_path)
+            if not parsed:
+                continue
+            subject, _ = parsed
+            self.subjects[subject.id] = subject
+
+        # Ordre de chargement des fichiers conservé : le dernier id défini l'emporte
+        for file_templates in self.template_files.values():
+            self.templates.update(file_templates)
+
+    # Structures dérivées, reconstruites à chaque génération (jamais sérialisées)
+    _DERIVED_ATTRS = (
+        "paths", "template_index", "selection_pools", "subject_steps", "_step_roads",
+        "_neighbours", "template_subjects", "_dialogue_inventory", "compiled_templates", "flash_decks"
+    )
+
+    def _build_indexes(
+        self,
+        previous_compiled: Optional[Dict[str, CompiledTemplate]] = None,
+        sampler_domains: Optional[Dict[str, Dict[Tuple[str, ...], Enumeration]]] = None
+    ):
+        # Sujet propriétaire de chaque template : celui dont le dossier contient le fichier
+        subject_dirs = sorted(
+            ((os.path.dirname(p) + os.sep, parsed[0].id) for p, parsed in self.roads.items() if parsed),
+            key=lambda d: len(d[0]),
+            reverse=True
+        )
+        self.template_subjects: Dict[str, str] = {}
+        for path, file_templates in self.template_files.items():
+            owner = next((s_id for d, s_id in subject_dirs if path.startswith(d)), "global")
+            for t_id in file_templates:
+                self.template_subjects[t_id] = owner
+        self._dialogue_inventory: Optional[List[Dict[str, str]]] = None
+
+        self.template_index = TemplateIndex(self.templates.values(), self.template_subjects)
+        self._compile_templates(previous_compiled or {}, sampler_domains or {})
+
+        # Paquets du mode flash : templates de chaque sujet, toutes difficultés (None) ou une seule.
+        # Seuls les tirages de variables restent à faire par requête.
+        self.flash_decks: Dict[Tuple[str, Optional[int]], Tuple[ExerciseTemplate, ...]] = {}
+        for subject_id in self.subjects:
+            for difficulty in [None] + self.template_index.difficulties():
+                deck = self.template_index.select([], difficulty, subject=subject_id)
+                if deck:
+                    self.flash_decks[(subject_id, difficulty)] = deck
+
+        # Route ordonnée de chaque sujet (séquences dépliées à la demande),
+        # route contenant chaque entrée, pour retrouver une étape par id,
+        # et voisins de chaque étape, séquences dépliées une fois ici
+        by_subject: Dict[str, List[RoadStep]] = {}
+        for road_path in self.road_order:
+            parsed = self.roads.get(road_path)
+            if parsed:
+                subject, road = parsed
+                by_subject.setdefault(subject.id, []).extend(road.entries)
+        self.subject_steps: Dict[str, SubjectRoad] = {
+            subject_id: SubjectRoad(sorted(entries, key=lambda x: x.order))
+            for subject_id, entries in by_subject.items()
+        }
+        self._step_roads: Dict[str, SubjectRoad] = {}
+        for road in self.subject_steps.values():
+            for entry_id in road.entry_ids():
+                self._step_roads[entry_id] = road
+        self._neighbours: Dict[str, StepNeighbours] = {}
+        for road in self.subject_steps.values():
+            steps = list(road)
+            for pos, step in enumerate(steps):
+                page_count = len(step.pages)
+                self._neighbours[step.id] = StepNeighbours(
+                    position=pos,
+                    previous_id=steps[pos - 1].id if pos > 0 else None,
+                    next_id=steps[pos + 1].id if pos + 1 < len(steps) else None,
+                    page_count=page_count,
+                    next_page_urls=tuple(
+                        f"/step/{step.id}?page_idx={i + 1}" if i + 1 < page_count else None
+                        for i in range(page_count)
+                    )
+                )
+
+        # Pools de candidats de chaque page d'exercices, clé (step_id, page_idx).
+        # page_idx vaut None pour une étape sans 'pages' (sélection portée par l'étape).
+        # Ceux des étapes de séquences sont résolus au premier accès.
+        self.selection_pools: Dict[Tuple[str, Optional[int]], List[SelectionPool]] = {}
+        for road in self.subject_steps.values():
+            for step in road.entries:
+                if step.type != "sequence":
+                    self._resolve_pools(step)
+
+    def _compile_templates(
+        self,
+        previous: Dict[str, CompiledTemplate],
+        sampler_domains: Dict[str, Dict[Tuple[str, ...], Enumeration]]
+    ):
+        """
+        Compile chaque template (segments de texte, logique) une seule fois par
+        génération. Les erreurs de syntaxe sont signalées dès le chargement.
+        Un template inchangé lors d'un rechargement partiel garde sa forme compilée ;
+        depuis un snapshot, les domaines réalisables déjà énumérés sont repris.
+        """
+        self.compiled_templates: Dict[str, CompiledTemplate] = {}
+        errors = 0
+        for t_id, template in self.templates.items():
+            compiled = previous.get(t_id)
+            if compiled is None or compiled.template is not template:
+                compiled = CompiledTemplate(template, sampler_domains.get(t_id))
+                for error in compiled.errors:
+                    errors += 1
+                    print(f"❌ Template {t_id}: {error}")
+            self.compiled_templates[t_id] = compiled
+        if errors:
+            print(f"⚠️ {errors} erreur(s) dans les templates")
+
+    def _resolve_pools(self, step: RoadStep):
+        if step.pages:
+            for page_idx, page in enumerate(step.pages):
+                if page.get("selection"):
+                    self.selection_pools[(step.id, page_idx)] = self.template_index.resolve_selection(page["selection"])
+        else:
+            self.selection_pools[(step.id, None)] = self.template_index.resolve_selection(step.selection)
+
+    def _find_step(self, step_id: str):
+        road = self._step_roads.get(step_id) or self._step_roads.get(step_id.rpartition("_")[0])
+        if road is None:
+            return None
+        return road, road.find(step_id)
+
+    def get_step(self, step_id: str) -> Optional[RoadStep]:
+        found = self._find_step(step_id)
+        if not found or not found[1]:
+            return None
+        return found[1][1]
+
+    def step_count(self) -> int:
+        return sum(len(road) for road in self.subject_steps.values())
+
+    def get_neighbours(self, step_id: str) -> Optional[StepNeighbours]:
+        return self._neighbours.get(step_id)
+
+    def get_selection_pools(self, step: RoadStep, page_idx: int) -> List[SelectionPool]:
+        key = (step.id, page_idx if step.pages else None)
+        pools = self.selection_pools.get(key)
+        if pools is None:
+            self._resolve_pools(step)
+            pools = self.selection_pools.get(key, [])
+        return pools
+
+    def next_page_url(self, step: RoadStep, page_idx: int) -> Optional[str]:
+        """URL de la page suivante de l'étape, ou None si page_idx est la dernière."""
+        neighbours = self.get_neighbours(step.id)
+        if neighbours is None or not 0 <= page_idx < neighbours.page_count:
+            return None
+        return neighbours.next_page_urls[page_idx]
+
+    def flash_deck(self, subject_id: str, difficulty: Optional[int] = None) -> Tuple[ExerciseTemplate, ...]:
+        return self.flash_decks.get((subject_id, difficulty), ())
+
+    def templates_by_subject(self) -> Dict[str, List[ExerciseTemplate]]:
+        grouped: Dict[str, List[ExerciseTemplate]] = {}
+        for t_id, t in self.templates.items():
+            grouped.setdefault(self.template_subjects.get(t_id, "global"), []).append(t)
+        return grouped
+
+    def dialogue_inventory(self) -> List[Dict[str, str]]:
+        """Dialogues des événements puis fichiers de dialogue du contenu."""
+        if self._dialogue_inventory is not None:
+            return self._dialogue_inventory
+
+        inventory = []
+        for e in self.events.values():
+            if e.type == "dialogue":
+                inventory.append({
+                    "id": e.id,
+                    "name": f"Event: {e.id}",
+                    "path": e.content,
+                    "subject": "global",
+                    "type": "event"
+                })
+
+        known = {d["path"] for d in inventory}
+        for rel_path in self.paths.dialogue_files():
+            filename = os.path.basename(rel_path)
+            if rel_path in known or filename in known:
+                continue
+            parts = rel_path.split(os.sep)
+            inventory.append({
+                "id": filename,
+                "name": filename,
+                "path": rel_path,
+                "subject": parts[0] if len(parts) > 1 else "global",
+                "type": "file"
+            })
+
+        self._dialogue_inventory = inventory
+        return inventory
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attr in self._DERIVED_ATTRS:
+            state.pop(attr, None)
+        # Domaines réalisables des templates contraints : leur énumération est le coût
+        # dominant de la compilation, elle n'est pas refaite au démarrage
+        state["_sampler_domains"] = {
+            t_id: compiled.sampler.domains
+            for t_id, compiled in self.compiled_templates.items() if compiled.sampler.domains
+        }
+        return state
+
+    def __setstate__(self, state):
+        sampler_domains = state.pop("_sampler_domains", None)
+        self.__dict__.update(state)
+        self.paths = ContentPathIndex("", [])
+        self._build_indexes(sampler_domains=sampler_domains)
+
+    def subject_dirs(self) -> List[str]:
+        """Dossiers des sujets, dont les YAML contiennent les templates."""
+        return [os.path.dirname(p) for p in self.road_order]
+
+    def derive(
+        self,
+        roads: Optional[Dict[str, ParsedRoad]] = None,
+        template_files: Optional[Dict[str, Optional[Dict[str, ExerciseTemplate]]]] = None,
+        paths: Optional[ContentPathIndex] = None,
+    ) -> "ContentGeneration":
+        """
+        Retourne une nouvelle génération où seuls les fichiers indiqués sont
+        remplacés. Une valeur None dans template_files retire le fichier.
+        """
+        new_roads = dict(self.roads)
+        if roads:
+            new_roads.update(roads)
+
+        new_template_files = dict(self.template_files)
+        for path, file_templates in (template_files or {}).items():
+            if file_templates is None:
+                new_template_files.pop(path, None)
+            else:
+                new_template_files[path] = file_templates
+
+        return ContentGeneration(
+            road_order=self.road_order,
+            roads=new_roads,
+            template_files=new_template_files,
+            events=self.events,
+            characters=self.characters,
+            paths=paths or self.paths,
+            compiled=self.compiled_templates,
+        )
+
@@ -1,55 +1,251 @@
 import os
-import yaml
+import threading
+import itertools
+from contextvars import ContextVar
+from types import MappingProxyType
+import time
+from concurrent.futures import ProcessPoolExecutor
 import frontmatter
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Mapping, Sequence, Tuple
 from src.models import Subject, RoadStep, Course, Exercise, ExerciseTemplate, Event
+from src.content_generation import ContentGeneration, ParsedRoad, StepNeighbours
+from src.template_index import SelectionPool
+from src.file_cache import FileCache
+from src.subject_road import SubjectRoad
+from src.content_paths import ContentPathIndex, is_scenario_file
+from src.yaml_loader import load_yaml, YAML_BACKEND
+from src.content_snapshot import Fingerprint, compute_fingerprint, file_signature, load_snapshot, read_snapshot, save_snapshot
+from src.template_compiler import CompiledTemplate, compile_template
+from src.problem_scenarios import ScenarioCatalog, parse_scenario_file
 
 CONTENT_DIR = "content"
+COURS_PATH = os.path.join(CONTENT_DIR, "cours.yaml")
+CHARACTERS_PATH = os.path.join("config", "personnages.yaml")
+
+# Fichiers YAML d'un sujet qui ne contiennent pas de templates
+NON_TEMPLATE_FILES = ["road.yaml", "road_2.yaml", "meta.yaml", "cours.yaml", "route_math.yaml"]
+
+# Parsing parallèle au chargement complet (0 = automatique, 1 = série)
+LOAD_WORKERS = int(os.environ.get("CONTENT_LOAD_WORKERS", "0"))
+PARALLEL_MIN_FILES = 16
+
+# Génération figée pour la durée d'une requête (voir ContentManager.pin_generation)
+_pinned_generation: ContextVar[Optional[ContentGeneration]] = ContextVar("pinned_generation", default=None)
 
 class ContentManager:
-    _subjects: Dict[str, Subject] = {}
-    _road_steps: Dict[str, RoadStep] = {}
-    _templates: Dict[str, ExerciseTemplate] = {}
-    _events: Dict[str, Event] = {}
-    
+    _generation: ContentGeneration = ContentGeneration()
+    _generation_ids = itertools.count(1)
+    _reload_lock = threading.Lock()
+
+    # Lectures de fichiers à la demande (Markdown des cours, dialogues YAML, scénarios compilés)
+    _markdown_cache = FileCache("markdown", max_entries=256)
+    _dialogue_cache = FileCache("dialogues", max_entries=128)
+    _scenario_cache = FileCache("problem_scenarios", max_entries=128)
+    _scenario_catalog = ScenarioCatalog()
+
+    # Temps de parsing par fichier du dernier chargement complet
+    _load_report: List[Tuple[str, float]] = []
+    # Empreinte des sources de la génération publiée (None sans snapshot)
+    _fingerprint: Optional[Fingerprint] = None
+
+    @classmethod
+    def current(cls) -> ContentGeneration:
+        """Génération visible par l'appelant : celle figée pour la requête, sinon la dernière publiée."""
+        pinned = _pinned_generation.get()
+        return pinned if pinned is not None else cls._generation
+
+    @classmethod
+    def latest(cls) -> ContentGeneration:
+        """Dernière génération publiée, même depuis une requête figée sur une plus ancienne."""
+        return cls._generation
+
+    @classmethod
+    def pin_generation(cls):
+        """Fige la génération courante pour le contexte (requête) en cours."""
+        return _pinned_generation.set(cls._generation)
+
     @classmethod
-    def load_all(cls):
+    def unpin_generation(cls, token):
+        _pinned_generation.reset(token)
+
+    @classmethod
+    def _publish(cls, generation: ContentGeneration, fingerprint: Optional[Fingerprint] = None):
+        # Un seul échange de référence : aucune requête ne voit d'état intermédiaire
+        generation.id = next(cls._generation_ids)
+        cls._generation = generation
+        cls._fingerprint = fingerprint
+
+    @classmethod
+    def load_all(cls, use_snapshot: bool = True):
         print("🔄 Chargement dynamique du contenu...")
-        cls._subjects = {}
-        cls._road_steps = {}
-        cls._templates = {}
-        
-        cours_path = os.path.join(CONTENT_DIR, "cours.yaml")
-        if not os.path.exists(cours_path):
+        with cls._reload_lock:
+            fingerprint = None
+            if use_snapshot:
+                fingerprint = compute_fingerprint(CONTENT_DIR, (CHARACTERS_PATH,))
+                generation = load_snapshot(fingerprint)
+                if isinstance(generation, ContentGeneration):
+                    # L'inventaire des fichiers n'est pas dans le snapshot (Markdown non suivis)
+                    generation.paths = ContentPathIndex.scan(CONTENT_DIR)
+                    cls._publish(generation, fingerprint)
+                    print(f"⚡ Snapshot chargé: {len(generation.subjects)} sujets, {generation.step_count()} étapes, {len(generation.templates)} templates.")
+                    return
+
+            generation = cls._build_all()
+            if generation is None:
+                return
+            cls._publish(generation, fingerprint)
+            if use_snapshot:
+                save_snapshot(generation, fingerprint)
+
+    @classmethod
+    def follow_snapshot(cls) -> bool:
+        """
+        Publie la génération du snapshot écrit par le processus qui surveille
+        le contenu, sans re-parser ni re-parcourir les sources.
+        Retourne True si une nouvelle génération a été publiée.
+        """
+        with cls._reload_lock:
+            snapshot = read_snapshot()
+            if snapshot is None:
+                return False
+            fingerprint, generation = snapshot
+            if not isinstance(generation, ContentGeneration) or fingerprint == cls._fingerprint:
+                return False
+            generation.paths = ContentPathIndex.scan(CONTENT_DIR)
+            cls._publish(generation, fingerprint)
+            print(f"🔁 Contenu repris du snapshot: {len(generation.templates)} templates.")
+            return True
+
+    @classmethod
+    def build_snapshot(cls) -> bool:
+        """Reconstruit tout le contenu depuis les sources et écrit le snapshot."""
+        with cls._reload_lock:
+            fingerprint = compute_fingerprint(CONTENT_DIR, (CHARACTERS_PATH,))
+            generation = cls._build_all()
+            if generation is None:
+                return False
+            cls._publish(generation, fingerprint)
+            return save_snapshot(generation, fingerprint)
+
+    @classmethod
+    def reload_paths(cls, paths: Iterable[str]) -> bool:
+        """
+        Recharge uniquement les fichiers modifiés puis publie une nouvelle génération.
+        cours.yaml et personnages.yaml impliquent un rechargement complet.
+        Retourne True si une nouvelle génération a été publiée.
+        """
+        paths = [os.path.normpath(p) for p in paths]
+        with cls._reload_lock:
+            current = cls._generation
+            # Fichier ajouté ou supprimé : l'inventaire des chemins doit être refait
+            content_prefix = os.path.normpath(CONTENT_DIR) + os.sep
+            structural = any(
+                os.path.exists(p) != current.paths.contains(p)
+                for p in paths if p.startswith(content_prefix)
+            )
+            path_index = ContentPathIndex.scan(CONTENT_DIR) if structural else current.paths
+
+            if any(p in (os.path.normpath(COURS_PATH), os.path.normpath(CHARACTERS_PATH)) for p in paths):
+                print("🔄 Rechargement complet du contenu...")
+                # Empreinte prise avant le parsing : un fichier modifié pendant le
+                # rechargement invalidera le snapshot au prochain démarrage.
+                fingerprint = compute_fingerprint(CONTENT_DIR, (CHARACTERS_PATH,))
+                # Pas de fork ici : le serveur, le worker des tampons et le watcher tournent déjà
+                generation = cls._build_all(parallel=False)
+                if generation is None:
+                    return False
+            else:
+                road_paths = {os.path.normpath(p): p for p in current.road_order}
+                subject_dirs = [os.path.normpath(d) for d in current.subject_dirs()]
+                roads: Dict[str, ParsedRoad] = {}
+                template_files: Dict[str, Optional[Dict[str, ExerciseTemplate]]] = {}
+                # Seuls les fichiers effectivement re-parsés mettent à jour l'empreinte :
+                # un fichier modifié mais pas relu garde son ancienne signature, et
+                # le snapshot sera reconstruit au prochain démarrage.
+                fingerprint = dict(cls._fingerprint) if cls._fingerprint is not None else None
+
+                for path in paths:
+                    # Signature prise avant le parsing, comme pour un chargement complet
+                    signature = file_signature(path)
+                    parsed = failed = False
+                    if path in road_paths:
+                        road_path = road_paths[path]
+                        subject_id = os.path.basename(os.path.dirname(road_path))
+                        try:
+                            roads[road_path] = cls._parse_road(subject_id, road_path)
+                            parsed = True
+                            print(f"🔁 Route rechargée: {road_path}")
+                        except Exception as e:
+                            failed = True
+                            print(f"❌ Erreur route {road_path}: {e}")
+                    # Une route peut aussi définir des templates (ex: route_test.yaml)
+                    if cls._is_template_file(path) and any(path.startswith(d + os.sep) for d in subject_dirs):
+                        if signature is None:
+                            template_files[path] = None
+                            parsed = True
+                            print(f"🔁 Templates retirés: {path}")
+                        else:
+                            try:
+                                template_files[path] = cls._parse_template_file(path)
+                                parsed = True
+                                print(f"🔁 Templates rechargés: {path}")
+                            except Exception as e:
+                                failed = True
+                                print(f"❌ Erreur templates {path}: {e}")
+                    if fingerprint is not None and parsed and not failed:
+                        if signature is None:
+                            fingerprint.pop(path, None)
+                        else:
+                            fingerprint[path] = signature
+
+                if not roads and not template_files and not structural:
+                    return False
+                generation = current.derive(roads=roads, template_files=template_files, paths=path_index)
+
+            cls._publish(generation, fingerprint)
+            if fingerprint is not None:
+                save_snapshot(generation, fingerprint)
+            return True
+
+    @classmethod
+    def _build_all(cls, parallel: bool = True) -> Optional[ContentGeneration]:
+        report: List[Tuple[str, float]] = []
+        started = time.perf_counter()
+        path_index = ContentPathIndex.scan(CONTENT_DIR)
+
+        if not os.path.exists(COURS_PATH):
             print("⚠️ Fichier cours.yaml manquant.")
-            return
-        
+            return None
+
         # Charger les personnages
-        cls._load_characters()
+        t0 = time.perf_counter()
+        characters = cls._load_characters()
+        report.append((CHARACTERS_PATH, time.perf_counter() - t0))
 
+        t0 = time.perf_counter()
         try:
-            with open(cours_path, "r", encoding="utf-8") as f:
-                cours_data = yaml.safe_load(f)
+            with open(COURS_PATH, "r", encoding="utf-8") as f:
+                cours_data = load_yaml(f)
         except Exception as e:
             print(f"❌ Erreur lecture cours.yaml: {e}")
-            return
-            
-        if not cours_data or "cours" not in cours_data:
-            print("❌ Format invalide pour cours.yaml")
-            return
+            return None
+        report.append((COURS_PATH, time.perf_counter() - t0))
 
         if not cours_data or "cours" not in cours_data:
             print("❌ Format invalide pour cours.yaml")
-            return
-            
-        cls._events = {}
+            return None
+
+        events: Dict[str, Event] = {}
+        # Fichiers à parser, dans l'ordre de chargement : templates du sujet puis route
+        jobs: List[Tuple[str, ...]] = []
+        seen_template_files = set()
 
         for entry in cours_data["cours"]:
             if "events" in entry:
                 for evt_data in entry["events"]:
                      e_id = evt_data.get("id")
                      if e_id:
-                         cls._events[e_id] = Event(
+                         events[e_id] = Event(
                              id=e_id,
                              type=evt_data.get("type"),
                              conditions=evt_data.get("conditions"),
@@ -59,206 +255,350 @@ class ContentManager:
 
             rel_path = entry.get("page")
             if not rel_path: continue
-            
-            road_path = os.path.join(CONTENT_DIR, rel_path)
-            
-            if not os.path.exists(road_path):
-                # Simple fallback
-                for root, dirs, files in os.walk(CONTENT_DIR):
-                    if rel_path in files:
-                        road_path = os.path.join(root, rel_path)
-                        break
-
-            if not os.path.exists(road_path):
+
+            # Chemin relatif à content/, sinon simple nom de fichier cherché dans tout le contenu
+            road_path = path_index.resolve(rel_path) or path_index.find_basename(rel_path)
+            if not road_path:
                 print(f"⚠️ Route non trouvée: {rel_path}")
                 continue
 
             subject_path = os.path.dirname(road_path)
             subject_id = os.path.basename(subject_path)
-            
-            # 1. Charger les templates d'exercices
-            cls._load_templates(subject_id, subject_path)
-            
-            # 2. Charger la route
-            cls._load_road(subject_id, road_path)
-            
-        print(f"✅ Chargement terminé: {len(cls._subjects)} sujets, {len(cls._road_steps)} étapes, {len(cls._templates)} templates.")
-
-    @classmethod
-    def _load_templates(cls, subject_id: str, subject_path: str):
-        for root, dirs, files in os.walk(subject_path):
-            for filename in files:
-                if filename.endswith(".yaml") and filename not in ["road.yaml", "road_2.yaml", "meta.yaml", "cours.yaml", "route_math.yaml"]:
-                    yaml_path = os.path.join(root, filename)
-                    try:
-                        with open(yaml_path, "r", encoding="utf-8") as f:
-                            data = yaml.safe_load(f)
-                            if not data: continue
-                            
-                            # On gère 'generators' et 'templates'
-                            for key in ["generators", "templates"]:
-                                if key in data:
-                                    for t_data in data[key]:
-                                        t_id = t_data.get("id")
-                                        if not t_id: continue
-                                        
-                                        cls._templates[t_id] = ExerciseTemplate(
-                                            id=t_id,
-                                            tags=t_data.get("tags", []),
-                                            difficulty=t_data.get("difficulty", 1),
-                                            vars=t_data.get("vars", {}),
-                                            content=t_data.get("content", {}),
-                                            logic=t_data.get("logic"),
-                                            render_type=t_data.get("render_type"),
-                                            interaction=t_data.get("interaction", "input"),
-                                            multiple=t_data.get("multiple", False),
-                                            type="math_engine" if key == "generators" else "template"
-                                        )
-                    except Exception as e:
-                        print(f"❌ Erreur templates {yaml_path}: {e}")
-
-    @classmethod
-    def _load_road(cls, subject_id: str, road_path: str):
-        try:
-            with open(road_path, "r", encoding="utf-8") as f:
-                road_data = yaml.safe_load(f)
-            if not road_data: return
-
-            subject_name = road_data.get("title", subject_id.capitalize())
-            cls._subjects[subject_id] = Subject(id=subject_id, name=subject_name)
-            
-            if "road" in road_data:
-                global_idx = 0
-                for step_entry in road_data["road"]:
-                    s_type = step_entry.get("type", "cours")
-                    
-                    if s_type == "sequence":
-                        # Expansion de la séquence
-                        repeat = step_entry.get("repeat", 1)
-                        step_config = step_entry.get("step_config", {})
-                        
-                        for i in range(1, repeat + 1):
-                            s_id = f"{step_entry['id']}_{i}"
-                            # Remplacement de {index} dans les strings de config
-                            title = step_entry.get("title", "").replace("{index}", str(i))
-                            
-                            # On clone et adapte la selection
-                            selection = None
-                            if "selection" in step_config:
-                                raw_sel = yaml.dump(step_config["selection"])
-                                selection = yaml.safe_load(raw_sel.replace("{index}", str(i)))
-
-                            cls._road_steps[s_id] = RoadStep(
-                                id=s_id,
-                                title=title,
-                                type=step_config.get("type", "practice"),
-                                order=global_idx,
-                                subject_id=subject_id,
-                                selection=selection,
-                                activated=step_entry.get("activated", False),
-                                pages=step_config.get("pages", [])
-                            )
-                            global_idx += 1
-                    else:
-                        s_id = step_entry["id"]
-                        cls._road_steps[s_id] = RoadStep(
-                            id=s_id,
-                            title=step_entry.get("title", s_id.capitalize()),
-                            subtitle=step_entry.get("subtitle"),
-                            type=s_type,
-                            order=global_idx,
-                            subject_id=subject_id,
-                            content_file=step_entry.get("content"),
-                            selection=step_entry.get("selection"),
-                            scope=step_entry.get("scope"),
-                            strategy=step_entry.get("strategy", "weakest_points"),
-                            activated=step_entry.get("activated", False),
-                            pages=step_entry.get("pages", [])
-                        )
-                        global_idx += 1
-        except Exception as e:
-            print(f"❌ Erreur route {road_path}: {e}")
+
+            # 1. Templates d'exercices du sujet
+            for yaml_path in cls._find_template_files(path_index, subject_path):
+                if yaml_path not in seen_template_files:
+                    seen_template_files.add(yaml_path)
+                    jobs.append(("templates", yaml_path))
+
+            # 2. Route
+            jobs.append(("road", road_path, subject_id))
+
+        road_order: List[str] = []
+        roads: Dict[str, ParsedRoad] = {}
+        template_files: Dict[str, Dict[str, ExerciseTemplate]] = {}
+
+        # Fusion déterministe : les résultats sont consommés dans l'ordre des jobs
+        for job, (result, error, elapsed) in zip(jobs, cls._run_parse_jobs(jobs, parallel)):
+            kind, path = job[0], job[1]
+            report.append((path, elapsed))
+            if error is not None:
+                label = "route" if kind == "road" else "templates"
+                print(f"❌ Erreur {label} {path}: {error}")
+                continue
+            if kind == "road":
+                roads[path] = result
+                road_order.append(path)
+            else:
+                template_files[path] = result
+
+        generation = ContentGeneration(
+            road_order=road_order,
+            roads=roads,
+            template_files=template_files,
+            events=events,
+            characters=characters,
+            paths=path_index
+        )
+        cls._load_report = sorted(report, key=lambda r: r[1], reverse=True)
+        total = time.perf_counter() - started
+        print(f"✅ Chargement terminé: {len(generation.subjects)} sujets, {generation.step_count()} étapes, {len(generation.templates)} templates ({total:.3f}s, YAML {YAML_BACKEND}).")
+        cls.print_load_report(limit=5)
+        return generation
 
     @classmethod
-    def get_subjects(cls) -> List[Subject]: return list(cls._subjects.values())
+    def _run_parse_jobs(cls, jobs: List[Tuple[str, ...]], parallel: bool = True) -> List[Tuple[Any, Optional[str], float]]:
+        """
+        Parse les fichiers en parallèle dans un pool de processus quand il y en a
+        assez pour amortir le coût du pool, sinon en série.
+        CONTENT_LOAD_WORKERS force le nombre de processus (1 = série).
+
+        Le pool (fork) n'est utilisé qu'au démarrage et en ligne de commande :
+        forker un processus où d'autres threads tiennent des verrous peut bloquer
+        l'enfant, le rechargement à chaud passe donc parallel=False.
+        """
+        workers = LOAD_WORKERS or min(os.cpu_count() or 1, len(jobs))
+        if parallel and workers > 1 and len(jobs) >= PARALLEL_MIN_FILES:
+            try:
+                chunksize = max(1, len(jobs) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(_run_parse_job, jobs, chunksize=chunksize))
+            except Exception as e:
+                print(f"⚠️ Parsing parallèle indisponible ({e}), chargement en série.")
+        return [_run_parse_job(job) for job in jobs]
+
+    @classmethod
+    def get_load_report(cls) -> List[Tuple[str, float]]:
+        """Temps de parsing par fichier du dernier chargement complet, du plus lent au plus rapide."""
+        return cls._load_report
+
+    @classmethod
+    def print_load_report(cls, limit: Optional[int] = None):
+        rows = cls._load_report if limit is None else cls._load_report[:limit]
+        if not rows:
+            return
+        print(f"⏱️ Temps de chargement par fichier ({len(rows)}/{len(cls._load_report)}):")
+        for path, elapsed in rows:
+            print(f"   {elapsed * 1000:8.2f} ms  {path}")
+
+    @staticmethod
+    def _is_template_file(path: str) -> bool:
+        filename = os.path.basename(path)
+        return filename.endswith(".yaml") and filename not in NON_TEMPLATE_FILES and not is_scenario_file(path)
+
+    @classmethod
+    def _find_template_files(cls, path_index: ContentPathIndex, subject_path: str) -> List[str]:
+        prefix = os.path.normpath(subject_path) + os.sep
+        return [
+            p for p in path_index.by_relpath.values()
+            if p.startswith(prefix) and cls._is_template_file(p)
+        ]
+
+    @staticmethod
+    def _parse_template_file(yaml_path: str) -> Dict[str, ExerciseTemplate]:
+        templates: Dict[str, ExerciseTemplate] = {}
+        with open(yaml_path, "r", encoding="utf-8") as f:
+            data = load_yaml(f)
+        if not data: return templates
+
+        # On gère 'generators' et 'templates'
+        for key in ["generators", "templates"]:
+            if key in data:
+                for t_data in data[key]:
+                    t_id = t_data.get("id")
+                    if not t_id: continue
+
+                    templates[t_id] = ExerciseTemplate(
+                        id=t_id,
+                        tags=t_data.get("tags", []),
+                        difficulty=t_data.get("difficulty", 1),
+                        vars=t_data.get("vars", {}),
+                        content=t_data.get("content", {}),
+                        logic=t_data.get("logic"),
+                        constraints=t_data.get("constraints", []),
+                        render_type=t_data.get("render_type"),
+                        interaction=t_data.get("interaction", "input"),
+                        multiple=t_data.get("multiple", False),
+                        type="math_engine" if key == "generators" else "template"
+                    )
+        return templates
+
+    @staticmethod
+    def _parse_road(subject_id: str, road_path: str) -> ParsedRoad:
+        with open(road_path, "r", encoding="utf-8") as f:
+            road_data = load_yaml(f)
+        if not road_data: return None
+
+        subject_name = road_data.get("title", subject_id.capitalize())
+        subject = Subject(id=subject_id, name=subject_name)
+        entries: List[RoadStep] = []
+
+        if "road" in road_data:
+            global_idx = 0
+            for step_entry in road_data["road"]:
+                s_type = step_entry.get("type", "cours")
+
+                if s_type == "sequence":
+                    # Une séquence reste un seul descripteur : ses étapes
+                    # {id}_1..{id}_N sont construites à la demande (voir SubjectRoad)
+                    repeat = step_entry.get("repeat", 1)
+                    entries.append(RoadStep(
+                        id=step_entry["id"],
+                        title=step_entry.get("title", ""),
+                        type="sequence",
+                        order=global_idx,
+                        subject_id=subject_id,
+                        repeat=repeat,
+                        step_config=step_entry.get("step_config", {}),
+                        activated=step_entry.get("activated", False)
+                    ))
+                    global_idx += max(0, repeat)
+                else:
+                    s_id = step_entry["id"]
+                    entries.append(RoadStep(
+                        id=s_id,
+                        title=step_entry.get("title", s_id.capitalize()),
+                        subtitle=step_entry.get("subtitle"),
+                        type=s_type,
+                        order=global_idx,
+                        subject_id=subject_id,
+                        content_file=step_entry.get("content"),
+                        selection=step_entry.get("selection"),
+                        scope=step_entry.get("scope"),
+                        strategy=step_entry.get("strategy", "weakest_points"),
+                        activated=step_entry.get("activated", False),
+                        pages=step_entry.get("pages", [])
+                    ))
+                    global_idx += 1
+        return subject, SubjectRoad(entries)
+
+    @classmethod
+    def get_subjects(cls) -> List[Subject]: return list(cls.current().subjects.values())
+    @classmethod
+    def get_all_subjects(cls) -> Mapping[str, Subject]: return MappingProxyType(cls.current().subjects)
+    @classmethod
+    def get_subject(cls, subject_id: str) -> Optional[Subject]: return cls.current().subjects.get(subject_id)
+    @classmethod
+    def get_all_templates(cls) -> Mapping[str, ExerciseTemplate]: return MappingProxyType(cls.current().templates)
+    @classmethod
+    def get_steps_for_subject(cls, subject_id: str) -> Sequence[RoadStep]:
+        # Liste ordonnée précalculée pour la génération courante
+        return cls.current().subject_steps.get(subject_id, ())
+    @classmethod
+    def get_step_neighbours(cls, step_id: str) -> Optional[StepNeighbours]:
+        return cls.current().get_neighbours(step_id)
+    @classmethod
+    def get_next_page_url(cls, step: RoadStep, page_idx: int) -> Optional[str]:
+        return cls.current().next_page_url(step, page_idx)
     @classmethod
-    def get_all_subjects(cls) -> Dict[str, Subject]: return cls._subjects
+    def get_step(cls, step_id: str) -> Optional[RoadStep]: return cls.current().get_step(step_id)
     @classmethod
-    def get_subject(cls, subject_id: str) -> Optional[Subject]: return cls._subjects.get(subject_id)
+    def get_template(cls, t_id: str) -> Optional[ExerciseTemplate]: return cls.current().templates.get(t_id)
     @classmethod
-    def get_all_templates(cls) -> Dict[str, ExerciseTemplate]: return cls._templates
+    def get_template_subject(cls, t_id: str) -> Optional[str]:
+        """Sujet dont le dossier contient le fichier définissant le template."""
+        return cls.current().template_subjects.get(t_id)
     @classmethod
-    def get_steps_for_subject(cls, subject_id: str) -> List[RoadStep]:
-        steps = [s for s in cls._road_steps.values() if s.subject_id == subject_id]
-        return sorted(steps, key=lambda x: x.order)
+    def get_compiled_template(cls, template: ExerciseTemplate) -> CompiledTemplate:
+        """Forme compilée d'un template, celle de la génération courante s'il en fait partie."""
+        compiled = cls.current().compiled_templates.get(template.id)
+        if compiled is not None and compiled.template is template:
+            return compiled
+        return compile_template(template)
     @classmethod
-    def get_step(cls, step_id: str) -> Optional[RoadStep]: return cls._road_steps.get(step_id)
+    def get_templates_by_subject(cls) -> Dict[str, List[ExerciseTemplate]]:
+        return cls.current().templates_by_subject()
     @classmethod
-    def get_template(cls, t_id: str) -> Optional[ExerciseTemplate]: return cls._templates.get(t_id)
+    def get_dialogue_inventory(cls) -> List[Dict[str, str]]:
+        return cls.current().dialogue_inventory()
     @classmethod
-    def get_events(cls) -> List[Event]: return list(cls._events.values())
+    def get_events(cls) -> List[Event]: return list(cls.current().events.values())
     @classmethod
-    def get_event(cls, event_id: str) -> Optional[Event]: return cls._events.get(event_id)
+    def get_event(cls, event_id: str) -> Optional[Event]: return cls.current().events.get(event_id)
+
+    @classmethod
+    def _read_cached(cls, cache: FileCache, rel_candidates: List[str], loader):
+        path = cls.current().paths.resolve(*rel_candidates)
+        if path is None:
+            return None
+        try:
+            return cache.get(path, loader)
+        except OSError:
+            # Fichier supprimé, pas encore vu par le watcher
+            return None
+
+    @staticmethod
+    def _read_markdown(path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def _read_dialogue(path: str) -> Optional[List[Dict[str, Any]]]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = load_yaml(f)
+        if data and "dialogue" in data:
+            return data["dialogue"]
+        return None
 
     @classmethod
     def get_step_content(cls, subject_id: str, content_file: str) -> Optional[str]:
         # On cherche le fichier md dans content/subject_id/content_file
         # Ou content/content_file si content_file est un chemin relatif à content/
         search_paths = [
-            os.path.join(CONTENT_DIR, subject_id, content_file),
-            os.path.join(CONTENT_DIR, content_file)
+            os.path.join(subject_id, content_file),
+            content_file
         ]
-        for p in search_paths:
-            if os.path.exists(p):
-                with open(p, "r", encoding="utf-8") as f:
-                    return f.read()
-        return None
+        return cls._read_cached(cls._markdown_cache, search_paths, cls._read_markdown)
 
     @classmethod
     def get_dialogue(cls, subject_id: str, dialogue_file: str) -> Optional[List[Dict[str, Any]]]:
         # Search in subject folder or root content
         search_paths = [
-            os.path.join(CONTENT_DIR, subject_id, dialogue_file),
-            os.path.join(CONTENT_DIR, dialogue_file)
+            os.path.join(subject_id, dialogue_file),
+            dialogue_file
         ]
-        for p in search_paths:
-            if os.path.exists(p):
-                try:
-                    with open(p, "r", encoding="utf-8") as f:
-                        data = yaml.safe_load(f)
-                        if data and "dialogue" in data:
-                            return data["dialogue"]
-                except Exception as e:
-                    print(f"❌ Erreur dialogue {p}: {e}")
-        return None
+        try:
+            return cls._read_cached(cls._dialogue_cache, search_paths, cls._read_dialogue)
+        except Exception as e:
+            print(f"❌ Erreur dialogue {dialogue_file}: {e}")
+            return None
 
     @classmethod
-    def select_templates(cls, target_tags: List[str], difficulty: Optional[int] = None) -> List[ExerciseTemplate]:
-        results = []
-        for t in cls._templates.values():
-            # Check if all target tags are present in template tags
-            if all(tag in t.tags for tag in target_tags):
-                if difficulty is None or t.difficulty == difficulty:
-                    results.append(t)
-        return results
+    def get_problem_scenarios(cls) -> ScenarioCatalog:
+        """Scénarios de problèmes de tous les fichiers scenarios*.yaml, compilés une fois par version de fichier."""
+        files = []
+        for path in cls.current().paths.scenario_files():
+            try:
+                files.append(cls._scenario_cache.get(path, parse_scenario_file))
+            except OSError:
+                # Fichier supprimé, pas encore vu par le watcher
+                continue
+            except Exception as e:
+                print(f"❌ Erreur scénarios {path}: {e}")
+        catalog = cls._scenario_catalog
+        # Les listes compilées sont conservées par le cache : même identité, même catalogue
+        if catalog.key != tuple(id(scenarios) for scenarios in files):
+            catalog = cls._scenario_catalog = ScenarioCatalog(files)
+        return catalog
 
-    _characters: Dict[str, Any] = {}
+    @classmethod
+    def invalidate_files(cls, paths: Iterable[str]):
+        """Oublie les fichiers modifiés (appelé par le watcher)."""
+        for p in paths:
+            p = os.path.normpath(p)
+            cls._markdown_cache.invalidate(p)
+            cls._dialogue_cache.invalidate(p)
+            cls._scenario_cache.invalidate(p)
 
     @classmethod
-    def _load_characters(cls):
-        char_path = os.path.join("config", "personnages.yaml")
-        if not os.path.exists(char_path):
+    def get_cache_stats(cls) -> List[Dict[str, Any]]:
+        return [cls._markdown_cache.stats(), cls._dialogue_cache.stats(), cls._scenario_cache.stats()]
+
+    @classmethod
+    def select_templates(cls, target_tags: List[str], difficulty: Optional[int] = None) -> Sequence[ExerciseTemplate]:
+        # Templates portant tous les tags demandés, via l'index inversé de la génération
+        return cls.current().template_index.select(target_tags, difficulty)
+
+    @classmethod
+    def get_flash_deck(cls, subject_id: str, difficulty: Optional[int] = None) -> Sequence[ExerciseTemplate]:
+        """Templates du mode flash d'un sujet (et d'une difficulté), précalculés pour la génération."""
+        return cls.current().flash_deck(subject_id, difficulty)
+
+    @classmethod
+    def get_selection_pools(cls, step: RoadStep, page_idx: int) -> List[SelectionPool]:
+        """Pools (templates candidats, nombre à tirer) résolus au chargement pour une page d'étape."""
+        return cls.current().get_selection_pools(step, page_idx)
+
+    @staticmethod
+    def _load_characters() -> Dict[str, Any]:
+        if not os.path.exists(CHARACTERS_PATH):
             print("⚠️ Fichier personnages.yaml manquant.")
-            return
-            
+            return {}
+
         try:
-            with open(char_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            with open(CHARACTERS_PATH, "r", encoding="utf-8") as f:
+                data = load_yaml(f)
                 if data and "personnages" in data:
-                    cls._characters = {c["name"]: c for c in data["personnages"]}
+                    return {c["name"]: c for c in data["personnages"]}
         except Exception as e:
             print(f"❌ Erreur lecture personnages.yaml: {e}")
+        return {}
 
     @classmethod
     def get_characters(cls) -> Dict[str, Any]:
-        return cls._characters
+        return cls.current().characters
+
+
+def _run_parse_job(job: Tuple[str, ...]) -> Tuple[Any, Optional[str], float]:
+    """Parse un fichier de contenu (exécuté éventuellement dans un processus du pool)."""
+    kind, path = job[0], job[1]
+    started = time.perf_counter()
+    try:
+        if kind == "road":
+            result = ContentManager._parse_road(job[2], path)
+        else:
+            result = ContentManager._parse_template_file(path)
+        error = None
+    except Exception as e:
+        result, error = None, str(e)
+    return result, error, time.perf_counter() - started
@@ -0,0 +1,64 @@
+import os
+from typing import Dict, List, Optional
+
+# Scénarios de problèmes (ProblemGenerator) : scenarios.yaml, scenarios_pizza.yaml...
+SCENARIO_FILE_PREFIX = "scenarios"
+
+
+def is_scenario_file(path: str) -> bool:
+    filename = os.path.basename(path)
+    return filename.startswith(SCENARIO_FILE_PREFIX) and filename.endswith(".yaml")
+
+
+class ContentPathIndex:
+    """
+    Inventaire des fichiers du dossier de contenu, construit en un seul
+    parcours par génération : la résolution d'un chemin devient une simple
+    recherche dans un dictionnaire, sans os.path.exists ni os.walk.
+    """
+
+    def __init__(self, content_dir: str, rel_paths: List[str]):
+        self.content_dir = content_dir
+        # "maths/calculs/multiplications.md" -> "content/maths/calculs/multiplications.md"
+        self.by_relpath: Dict[str, str] = {rel: os.path.join(content_dir, rel) for rel in rel_paths}
+        # Nom de fichier -> premier chemin rencontré dans l'ordre de os.walk
+        self.by_basename: Dict[str, str] = {}
+        for rel in rel_paths:
+            self.by_basename.setdefault(os.path.basename(rel), self.by_relpath[rel])
+        self._scenario_files: Optional[List[str]] = None
+
+    @classmethod
+    def scan(cls, content_dir: str) -> "ContentPathIndex":
+        rel_paths = []
+        for root, dirs, files in os.walk(content_dir):
+            for filename in files:
+                rel_paths.append(os.path.relpath(os.path.join(root, filename), content_dir))
+        return cls(content_dir, rel_paths)
+
+    def resolve(self, *rel_candidates: str) -> Optional[str]:
+        """Premier candidat (relatif au dossier de contenu) qui existe."""
+        for rel in rel_candidates:
+            path = self.by_relpath.get(os.path.normpath(rel))
+            if path is not None:
+                return path
+        return None
+
+    def find_basename(self, filename: str) -> Optional[str]:
+        return self.by_basename.get(filename)
+
+    def contains(self, path: str) -> bool:
+        """Indique si un chemin (préfixé par le dossier de contenu) est indexé."""
+        return os.path.relpath(path, self.content_dir) in self.by_relpath
+
+    def dialogue_files(self) -> List[str]:
+        """Chemins relatifs des fichiers de dialogue YAML."""
+        return [
+            rel for rel in self.by_relpath
+            if "dialogue" in os.path.basename(rel) and rel.endswith(".yaml")
+        ]
+
+    def scenario_files(self) -> List[str]:
+        """Chemins des fichiers de scénarios de problèmes, triés (calculés une fois par inventaire)."""
+        if self._scenario_files is None:
+            self._scenario_files = sorted(path for path in self.by_relpath.values() if is_scenario_file(path))
+        return self._scenario_files
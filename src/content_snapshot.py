@@ -0,0 +1,115 @@
+import os
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+# Snapshot binaire de la génération de contenu construite par ContentManager.load_all().
+# Il est invalidé dès qu'un fichier source (chemin, taille ou mtime) change.
+SNAPSHOT_DIR = ".cache"
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "content_snapshot.pickle")
+SNAPSHOT_VERSION = 5
+
+SOURCE_EXTENSIONS = (".yaml", ".yml")
+
+Signature = Tuple[int, int]
+Fingerprint = Dict[str, Signature]
+
+
+def file_signature(path: str) -> Optional[Signature]:
+    """(taille, mtime_ns) d'un fichier, None s'il n'existe pas."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def compute_fingerprint(content_dir: str, extra_files: Tuple[str, ...] = (), extensions: Tuple[str, ...] = SOURCE_EXTENSIONS) -> Fingerprint:
+    """
+    Retourne {chemin: (taille, mtime_ns)} pour chaque fichier du contenu ayant
+    l'une des extensions données, et pour les fichiers supplémentaires.
+    """
+    fingerprint: Fingerprint = {}
+    for root, dirs, files in os.walk(content_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.endswith(extensions):
+                path = os.path.join(root, filename)
+                signature = file_signature(path)
+                if signature is not None:
+                    fingerprint[path] = signature
+    for path in extra_files:
+        signature = file_signature(path)
+        if signature is not None:
+            fingerprint[path] = signature
+    return fingerprint
+
+
+def _read_payload(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ Snapshot illisible ({path}): {e}")
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    return payload
+
+
+def _load_state(payload: Dict[str, Any], path: str) -> Optional[Any]:
+    try:
+        return pickle.loads(payload["state"])
+    except Exception as e:
+        print(f"⚠️ Snapshot illisible ({path}): {e}")
+        return None
+
+
+def load_snapshot(fingerprint: Fingerprint, path: str = SNAPSHOT_PATH) -> Optional[Any]:
+    """
+    Charge l'état sauvegardé si le snapshot existe et correspond exactement
+    à l'empreinte des sources. Retourne None sinon.
+    """
+    payload = _read_payload(path)
+    if payload is None or payload.get("fingerprint") != fingerprint:
+        return None
+    # L'état n'est désérialisé qu'une fois la version et l'empreinte vérifiées
+    return _load_state(payload, path)
+
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> Optional[Tuple[Fingerprint, Any]]:
+    """
+    (empreinte, état) du snapshot tel qu'il a été écrit, sans comparer
+    l'empreinte aux sources : pour reprendre une génération publiée par un
+    autre processus. None si le snapshot est absent ou illisible.
+    """
+    payload = _read_payload(path)
+    if payload is None:
+        return None
+    state = _load_state(payload, path)
+    return None if state is None else (payload.get("fingerprint"), state)
+
+
+def save_snapshot(state: Any, fingerprint: Fingerprint, path: str = SNAPSHOT_PATH) -> bool:
+    """
+    Écrit le snapshot de façon atomique (fichier temporaire puis os.replace),
+    pour qu'un worker concurrent ne lise jamais un fichier à moitié écrit.
+    """
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "fingerprint": fingerprint,
+        "state": pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"⚠️ Impossible d'écrire le snapshot ({path}): {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
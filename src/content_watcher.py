@@ -0,0 +1,119 @@
+import os
+import threading
+from typing import List, Optional
+from src.content_manager import ContentManager, CONTENT_DIR, CHARACTERS_PATH
+from src.content_snapshot import SNAPSHOT_DIR, SNAPSHOT_PATH, compute_fingerprint, file_signature, Fingerprint, Signature
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou, chaque processus surveille le contenu
+    fcntl = None
+
+WATCHED_EXTENSIONS = (".yaml", ".yml", ".md")
+# Intervalle de scrutation en secondes (CONTENT_WATCH_INTERVAL)
+WATCH_INTERVAL = float(os.environ.get("CONTENT_WATCH_INTERVAL", "2.0"))
+# Verrou détenu par le seul processus qui parcourt le contenu
+LOCK_PATH = os.path.join(SNAPSHOT_DIR, "content_watcher.lock")
+
+
+class ContentWatcher:
+    """
+    Surveille le dossier de contenu par scrutation (taille + mtime) et
+    demande à ContentManager de recharger uniquement les fichiers modifiés.
+
+    Avec plusieurs workers, un seul processus (celui qui obtient LOCK_PATH)
+    parcourt le contenu ; il publie chaque rechargement dans le snapshot.
+    Les autres ne surveillent que le snapshot (un os.stat par intervalle) et
+    en reprennent la génération ; ils retentent le verrou à chaque tour, pour
+    remplacer un processus surveillant arrêté.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self._state: Fingerprint = {}
+        self._snapshot: Optional[Signature] = None
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _scan(self) -> Fingerprint:
+        return compute_fingerprint(CONTENT_DIR, (CHARACTERS_PATH,), extensions=WATCHED_EXTENSIONS)
+
+    @property
+    def leader(self) -> bool:
+        return fcntl is None or self._lock_file is not None
+
+    def _acquire(self) -> bool:
+        """Tente de devenir le processus qui parcourt le contenu (sans attendre)."""
+        if self.leader:
+            return True
+        try:
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            lock_file = open(LOCK_PATH, "a")
+        except OSError:
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        # Rattrape le dernier rechargement du processus précédent avant de prendre le relais
+        self._follow()
+        self._state = self._scan()
+        return True
+
+    def _release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()  # libère le verrou
+            self._lock_file = None
+
+    def poll(self) -> List[str]:
+        """Retourne les fichiers ajoutés, modifiés ou supprimés depuis le dernier appel."""
+        state = self._scan()
+        previous = self._state
+        changed = [p for p, sig in state.items() if previous.get(p) != sig]
+        changed.extend(p for p in previous if p not in state)
+        self._state = state
+        return changed
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._snapshot = file_signature(SNAPSHOT_PATH)
+        if fcntl is None:
+            self._state = self._scan()
+        role = "parcours du contenu" if self._acquire() else "suivi du snapshot"
+        self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Surveillance du contenu active ({role}, toutes les {self.interval}s)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+        self._release()
+
+    def _follow(self):
+        """Reprend la génération publiée par le processus surveillant, si le snapshot a changé."""
+        snapshot = file_signature(SNAPSHOT_PATH)
+        if snapshot is not None and snapshot != self._snapshot:
+            self._snapshot = snapshot
+            ContentManager.follow_snapshot()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self._acquire():
+                    self._follow()
+                    continue
+                changed = self.poll()
+                if changed:
+                    ContentManager.invalidate_files(changed)
+                    # Les fichiers Markdown sont relus à la demande : seuls les YAML sont re-parsés,
+                    # mais un ajout ou une suppression met à jour l'inventaire des chemins
+                    ContentManager.reload_paths(changed)
+            except Exception as e:
+                print(f"❌ Erreur surveillance du contenu: {e}")
@@ -1,84 +1,200 @@
 import random
-import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
 from src.models import ExerciseTemplate
+from src.content_manager import ContentManager
+from src.template_compiler import CompiledTemplate, compile_text
+from src.rng import exercise_id, get_rng, numpy_rng
+from src.grading import Grader
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : generate_batch génère alors ligne par ligne
+    np = None
 
 class ExerciseEngine:
     @staticmethod
     def interpolate(text: str, variables: Dict[str, Any]) -> str:
         if not isinstance(text, str):
             return text
-            
-        # 1. Évaluation des expressions [[ expr ]]
-        def eval_expr(match):
-            raw_expr = match.group(1)
-            # On injecte les variables dans l'expression elle-même si besoin
-            # (ex: [[ {a} * 2 ]])
-            try:
-                expr = raw_expr.format(**variables)
-                res = eval(expr, {"__builtins__": {}}, variables)
-                if isinstance(res, float):
-                    return str(int(res) if res.is_integer() else round(res, 2))
-                return str(res)
-            except Exception:
-                return f"ERR({raw_expr})"
-
-        processed = re.sub(r"\[\[(.+?)\]\]", eval_expr, text)
-        
+        # 1. Évaluation des expressions [[ expr ]] (ex: [[ {a} * 2 ]])
         # 2. Formatage standard {var}
-        try:
-            return processed.format(**variables)
-        except Exception:
-            return processed
+        # Le texte n'est découpé et compilé qu'une fois, puis mis en cache
+        return compile_text(text).render(variables)
 
     @staticmethod
-    def generate_exercise(template: ExerciseTemplate, difficulty_context: Optional[int] = None) -> Dict[str, Any]:
+    def generate_exercise(
+        template: ExerciseTemplate,
+        difficulty_context: Optional[int] = None,
+        rng: Optional[random.Random] = None
+    ) -> Dict[str, Any]:
         """
         Génère une instance d'exercice à partir d'un template.
         Fixe les variables, évalue la logique et remplit le contenu.
+        Tous les tirages passent par rng (RNG du thread par défaut).
         """
-        # 1. Génération des variables
-        variables = {}
-        for var_name, config in template.vars.items():
-            if isinstance(config, list):
-                variables[var_name] = random.choice(config)
-            elif isinstance(config, dict):
-                v_min = config.get("min", 0)
-                v_max = config.get("max", 10)
-                variables[var_name] = random.randint(v_min, v_max)
+        rng = get_rng(rng)
+        # 1. Génération des variables (domaine réalisable précalculé si le template a des contraintes)
+        compiled = ContentManager.get_compiled_template(template)
+        variables = compiled.sampler.sample(rng)
+
+        # 2. Interpolation du contenu (question, options, etc.) à partir de la forme compilée
+        content = compiled.render_content(variables)
+
+        # 3. Évaluation de la logique ou récupération de la réponse fixe
+        answer = ExerciseEngine._evaluate_logic(compiled, variables) if compiled.logic else None
+
+        return ExerciseEngine._build_exercise(
+            template, compiled, variables, content, answer, exercise_id(template.id)
+        )
+
+    @staticmethod
+    def generate_batch(template: ExerciseTemplate, n: int, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        """
+        Génère n instances d'un template en un seul appel.
+
+        Les variables sont tirées par colonnes NumPy et une logique arithmétique
+        est évaluée sur les colonnes entières ; sinon, la logique est évaluée
+        ligne par ligne. Sur un domaine fini, les n instances sont distinctes
+        (tant que n ne dépasse pas la taille du domaine).
+        """
+        if n <= 0:
+            return []
+        rng = get_rng(rng)
+        compiled = ContentManager.get_compiled_template(template)
+        columns = None
+        if np is not None:
+            columns = compiled.sampler.sample_columns(n, numpy_rng(rng))
+
+        answers = None
+        if columns is None:
+            rows = compiled.sampler.sample_distinct(n, rng)
+        else:
+            names = list(columns)
+            if names:
+                rows = [dict(zip(names, values)) for values in zip(*columns.values())]
             else:
-                variables[var_name] = config
-
-        # 2. Interpolation du contenu (question, options, etc.)
-        content = {}
-        for key, value in template.content.items():
-            if isinstance(value, str):
-                content[key] = ExerciseEngine.interpolate(value, variables)
-            elif isinstance(value, list):
-                content[key] = [
-                    ExerciseEngine.interpolate(v, variables) if isinstance(v, str) else v 
-                    for v in value
-                ]
+                rows = [{} for _ in range(n)]
+            if compiled.logic and compiled.logic_vectorizable:
+                answers = ExerciseEngine._evaluate_logic_columns(compiled, columns, n)
+
+        exercises = []
+        for i, variables in enumerate(rows):
+            if answers is not None:
+                answer = answers[i]
+            elif compiled.logic:
+                answer = ExerciseEngine._evaluate_logic(compiled, variables)
             else:
-                content[key] = value
+                answer = None
+            content = compiled.render_content(variables)
+            exercises.append(ExerciseEngine._build_exercise(
+                template, compiled, variables, content, answer, exercise_id(template.id)
+            ))
+        return exercises
 
-        # 3. Évaluation de la logique ou récupération de la réponse fixe
-        answer = None
-        
+    @staticmethod
+    def generate_from_pool(
+        templates: Sequence[ExerciseTemplate],
+        count: int,
+        rng: Optional[random.Random] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Tire count templates au hasard dans un pool et génère les exercices,
+        par lots d'un même template, dans l'ordre du tirage.
+        """
+        if not templates or count <= 0:
+            return []
+        rng = get_rng(rng)
+        picks = ExerciseEngine.pick_templates(templates, count, rng)
+        groups: Dict[int, List[int]] = {}
+        for i, t in enumerate(picks):
+            groups.setdefault(id(t), []).append(i)
+
+        exercises: List[Optional[Dict[str, Any]]] = [None] * count
+        for positions in groups.values():
+            batch = ExerciseEngine.generate_batch(picks[positions[0]], len(positions), rng)
+            for pos, ex in zip(positions, batch):
+                exercises[pos] = ex
+        return exercises
+
+    @staticmethod
+    def pick_templates(
+        templates: Sequence[ExerciseTemplate],
+        count: int,
+        rng: Optional[random.Random] = None
+    ) -> List[ExerciseTemplate]:
+        """
+        Tire count templates uniformément dans un pool. Un template dont toutes
+        les instances distinctes sont déjà tirées (ex: QCM sans variable) sort
+        du tirage, jusqu'à ce que tout le pool soit épuisé.
+        """
+        rng = get_rng(rng)
+        sizes: Dict[int, Optional[int]] = {}
+        used: Dict[int, int] = {}
+        # Candidats = templates[:remaining], vus à travers les échanges de moved (rien n'est copié)
+        moved: Dict[int, int] = {}
+        remaining = len(templates)
+        picks = []
+        for _ in range(count):
+            if remaining == 0:
+                remaining = len(templates)
+                moved.clear()
+                used.clear()
+            i = rng.randrange(remaining)
+            template = templates[moved.get(i, i)]
+            picks.append(template)
+            key = id(template)
+            if key not in sizes:
+                sizes[key] = ContentManager.get_compiled_template(template).sampler.domain_size()
+            used[key] = used.get(key, 0) + 1
+            if sizes[key] is not None and used[key] >= sizes[key]:
+                # Retrait en O(1) : le dernier candidat prend sa place
+                remaining -= 1
+                moved[i] = moved.get(remaining, remaining)
+        return picks
+
+    @staticmethod
+    def _evaluate_logic_columns(compiled: CompiledTemplate, columns: Dict[str, List[Any]], n: int) -> Optional[List[Any]]:
+        """Évalue la logique sur des colonnes NumPy ; None si le calcul doit se faire ligne par ligne."""
+        arrays = {name: np.asarray(columns[name]) for name in compiled.vector_vars if name in columns}
+        try:
+            # Division par zéro, dépassement... : on laisse la logique ligne par ligne produire "ERROR"
+            with np.errstate(all="raise"):
+                result = compiled.logic.evaluate(arrays)
+        except Exception:
+            return None
+        result = np.broadcast_to(np.asarray(result), (n,))
+        if result.dtype.kind not in "iuf":
+            return None
+        return result.tolist()
+
+    @staticmethod
+    def _normalize_answer(answer: Any) -> Any:
+        if isinstance(answer, float):
+            return int(answer) if answer.is_integer() else round(answer, 2)
+        return answer
+
+    @staticmethod
+    def _evaluate_logic(compiled: CompiledTemplate, variables: Dict[str, Any]) -> Any:
+        try:
+            return compiled.logic.evaluate(variables)
+        except Exception as e:
+            print(f"❌ Erreur évaluation logic '{compiled.logic.raw}': {e}")
+            return "ERROR"
+
+    @staticmethod
+    def _build_exercise(
+        template: ExerciseTemplate,
+        compiled: CompiledTemplate,
+        variables: Dict[str, Any],
+        content: Dict[str, Any],
+        answer: Any,
+        ex_id: str
+    ) -> Dict[str, Any]:
+        # Valeur calculée avant arrondi : la clé de correction en garde la valeur exacte
+        value = answer
+        answer = ExerciseEngine._normalize_answer(answer)
         # Priority: template.logic > content.logic > content.answer
-        raw_logic = template.logic or template.content.get("logic")
-
-        if raw_logic:
-            # On remplace {var} par leur valeur
-            try:
-                logic_str = str(raw_logic).format(**variables)
-                answer = eval(logic_str, {"__builtins__": {}}, variables)
-                if isinstance(answer, float):
-                    answer = int(answer) if answer.is_integer() else round(answer, 2)
-            except Exception as e:
-                print(f"❌ Erreur évaluation logic '{raw_logic}': {e}")
-                answer = "ERROR"
-        elif "answer" in content:
+        if not compiled.logic and "answer" in content:
             # Réponse statique dans le contenu (ex: QCM)
             answer = content["answer"]
             options = content.get("options", [])
@@ -97,16 +213,19 @@ class ExerciseEngine:
         if template.multiple and ex_type == "qcm":
             ex_type = "multiselect"
 
+        answer = answer if (isinstance(answer, list) or answer is None) else str(answer)
         return {
-            "id": f"{template.id}_{random.randint(1000, 9999)}",
+            "id": ex_id,
             "template_id": template.id,
             "type": ex_type,
             "render_type": template.render_type,
             "multiple": template.multiple,
             "question": content.get("question", ""),
             "options": content.get("options", []),
-            # On ne force pas le string si c'est une liste (pour smart_compare)
-            "answer": answer if (isinstance(answer, list) or answer is None) else str(answer),
+            # On ne force pas le string si c'est une liste (pour la correction)
+            "answer": answer,
+            # Forme canonique calculée une fois ici (tampons remplis en arrière-plan)
+            "answer_key": Grader.answer_key(answer, ex_type, value if compiled.logic else None),
             "explanation": content.get("explanation", ""),
             "unit": content.get("unit", ""),
             "variables": variables,
@@ -0,0 +1,297 @@
+import os
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Sequence
+from src.models import ExerciseTemplate, RoadStep
+from src.content_manager import ContentManager
+from src.exercise_engine import ExerciseEngine
+from src.rng import PageRNG, get_rng, new_seed
+
+# Exercices prêts à l'emploi par tampon (0 désactive les tampons)
+POOL_SIZE = int(os.environ.get("EXERCISE_POOL_SIZE", "40"))
+# Sous ce niveau, le worker remplit le tampon jusqu'à POOL_SIZE
+POOL_LOW_WATERMARK = int(os.environ.get("EXERCISE_POOL_LOW", str(POOL_SIZE // 2)))
+# Nombre maximal de tampons (les moins récemment utilisés sont évincés)
+MAX_POOLS = int(os.environ.get("EXERCISE_POOL_MAX", "512"))
+# Plus grand lot régénéré au rejeu d'une graine d'exercice (remplissage d'un tampon ou complément d'une page)
+REPLAY_MAX_BATCH = max(POOL_SIZE, 100)
+
+Producer = Callable[[int, random.Random], List[Dict[str, Any]]]
+
+
+def _instance_key(ex: Dict[str, Any]) -> Hashable:
+    # Une instance = un template et ses variables tirées
+    return ex.get("template_id"), repr(sorted((ex.get("variables") or {}).items()))
+
+
+def _seeded_batch(producer: Producer, n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    n exercices tirés avec leur propre RNG ; chacun porte sa graine "graine.n.i"
+    (graine du lot, taille du lot, position), qui suffit à le régénérer.
+    """
+    if seed is None:
+        seed = new_seed()
+    items = producer(n, random.Random(seed))
+    for i, ex in enumerate(items):
+        ex["seed"] = f"{seed}.{n}.{i}"
+    return items
+
+
+class _Buffer:
+    def __init__(self, producer: Producer):
+        self.producer = producer
+        self.items: Deque[Dict[str, Any]] = deque(maxlen=max(POOL_SIZE, 1))
+
+
+class ExercisePool:
+    """
+    Tampons d'exercices pré-générés, par template et par sélection d'étape.
+
+    Une page prend ses exercices dans le tampon correspondant ; seul le
+    manque éventuel est généré pendant la requête. Le worker (PoolRefiller)
+    remplit en arrière-plan les tampons passés sous le seuil bas. Les tampons
+    sont liés à une génération de contenu et vidés lorsqu'elle est remplacée.
+
+    Chaque exercice d'un tampon (ou généré pour compléter une prise) porte sa
+    graine, relevée dans page.exercise_seeds dans l'ordre des prises ; le RNG
+    de la page ne sert qu'aux tirages faits hors des tampons. Une page rejouée
+    avec sa graine et ces graines d'exercices (page.replay_seeds) est régénérée
+    à l'identique ; rejouée avec sa seule graine, elle ignore les tampons et
+    tout est généré avec le RNG de la page.
+    """
+
+    _buffers: "OrderedDict[Hashable, _Buffer]" = OrderedDict()
+    _generation_id: Optional[int] = None
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+
+    hits = 0
+    misses = 0
+    evictions = 0
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return POOL_SIZE > 0
+
+    @classmethod
+    def serves(cls, page: Optional[PageRNG]) -> bool:
+        """Vrai si une page passe par les tampons."""
+        return cls.enabled() and (page is None or not page.replay)
+
+    @classmethod
+    def _sync_generation(cls, generation_id: int):
+        # Appelé sous verrou : un rechargement du contenu invalide tous les tampons
+        if cls._generation_id != generation_id:
+            cls.evictions += len(cls._buffers)
+            cls._buffers.clear()
+            cls._generation_id = generation_id
+
+    @classmethod
+    def _replay(cls, key: Hashable, producer: Producer, count: int, page: PageRNG) -> List[Dict[str, Any]]:
+        """Régénère count exercices depuis les graines imposées de la page (lots partagés)."""
+        exercises = []
+        while page.replay_seeds and len(exercises) < count:
+            token = page.replay_seeds.popleft()
+            try:
+                seed, n, i = (int(part) for part in token.split("."))
+            except ValueError:
+                seed, n, i = 0, 0, -1
+            # Une graine venue de l'URL ne doit pas faire générer un lot démesuré
+            if not 0 <= i < n <= REPLAY_MAX_BATCH:
+                print(f"⚠️ Graine d'exercice invalide: {token}")
+                continue
+            batch = page.replay_batches.get((key, seed, n))
+            if batch is None:
+                batch = page.replay_batches[(key, seed, n)] = _seeded_batch(producer, n, seed)
+            if i < len(batch):
+                exercises.append(batch[i])
+        if len(exercises) < count:
+            # Graines épuisées ou invalides : le reste vient du RNG de la page
+            exercises.extend(producer(count - len(exercises), page.rng))
+        return exercises
+
+    @classmethod
+    def take(
+        cls, key: Hashable, producer: Producer, count: int, page: Optional[PageRNG] = None
+    ) -> List[Dict[str, Any]]:
+        """count exercices du tampon `key`, complétés par producer() si le tampon est trop court."""
+        if count <= 0:
+            return []
+        if page is not None and page.replay_seeds is not None:
+            taken = cls._replay(key, producer, count, page)
+        elif not cls.serves(page):
+            return producer(count, page.rng if page is not None else get_rng())
+        else:
+            taken = cls._take_buffered(key, producer, count)
+        if page is not None:
+            page.exercise_seeds.extend(ex["seed"] for ex in taken if "seed" in ex)
+        return taken
+
+    @classmethod
+    def _take_buffered(cls, key: Hashable, producer: Producer, count: int) -> List[Dict[str, Any]]:
+        generation_id = ContentManager.current().id
+        taken: List[Dict[str, Any]] = []
+        seen = set()
+        with cls._lock:
+            # Une requête figée sur une génération remplacée ne réalimente pas les tampons
+            if generation_id == ContentManager.latest().id:
+                cls._sync_generation(generation_id)
+                buffer = cls._buffers.get(key)
+                if buffer is None:
+                    buffer = cls._buffers[key] = _Buffer(producer)
+                    while len(cls._buffers) > MAX_POOLS:
+                        cls._buffers.popitem(last=False)
+                        cls.evictions += 1
+                cls._buffers.move_to_end(key)
+                # Le tampon peut enchaîner deux lots : une instance déjà prise pour la page y est laissée
+                skipped = []
+                while buffer.items and len(taken) < count:
+                    ex = buffer.items.popleft()
+                    if _instance_key(ex) in seen:
+                        skipped.append(ex)
+                    else:
+                        seen.add(_instance_key(ex))
+                        taken.append(ex)
+                buffer.items.extendleft(reversed(skipped))
+                if len(buffer.items) < POOL_LOW_WATERMARK:
+                    cls._wakeup.set()
+            cls.hits += len(taken)
+            cls.misses += count - len(taken)
+
+        if len(taken) < count:
+            extra = [ex for ex in _seeded_batch(producer, count - len(taken)) if _instance_key(ex) not in seen]
+            if len(taken) + len(extra) < count:
+                # Domaine trop petit pour compléter sans doublon : un seul lot, distinct, pour toute la page
+                return _seeded_batch(producer, count)
+            taken.extend(extra)
+        return taken
+
+    @classmethod
+    def take_template(
+        cls, template: ExerciseTemplate, count: int, page: Optional[PageRNG] = None
+    ) -> List[Dict[str, Any]]:
+        producer = lambda n, r: ExerciseEngine.generate_batch(template, n, r)
+        return cls.take(("template", template.id), producer, count, page)
+
+    @classmethod
+    def take_selection(
+        cls, step: RoadStep, page_idx: Optional[int], pool_idx: int,
+        templates: Sequence[ExerciseTemplate], count: int, page: Optional[PageRNG] = None
+    ) -> List[Dict[str, Any]]:
+        """Exercices d'un pool de sélection d'une page d'étape (templates tirés au hasard)."""
+        key = ("selection", step.id, page_idx, pool_idx)
+        producer = lambda n, r: ExerciseEngine.generate_from_pool(templates, n, r)
+        return cls.take(key, producer, count, page)
+
+    @classmethod
+    def take_from_templates(
+        cls, templates: Sequence[ExerciseTemplate], count: int, page: Optional[PageRNG] = None
+    ) -> List[Dict[str, Any]]:
+        """Équivalent de ExerciseEngine.generate_from_pool, servi par les tampons de chaque template."""
+        if not templates or count <= 0:
+            return []
+        rng = page.rng if page is not None else get_rng()
+        return cls.take_picks(ExerciseEngine.pick_templates(templates, count, rng), page)
+
+    @classmethod
+    def take_picks(
+        cls, picks: Sequence[ExerciseTemplate], page: Optional[PageRNG] = None
+    ) -> List[Dict[str, Any]]:
+        """Un exercice par template tiré, pris par lots d'un même template (instances distinctes)."""
+        count = len(picks)
+        groups: Dict[int, List[int]] = {}
+        for i, t in enumerate(picks):
+            groups.setdefault(id(t), []).append(i)
+
+        exercises: List[Optional[Dict[str, Any]]] = [None] * count
+        for positions in groups.values():
+            batch = cls.take_template(picks[positions[0]], len(positions), page)
+            for pos, ex in zip(positions, batch):
+                exercises[pos] = ex
+        return exercises
+
+    @classmethod
+    def refill(cls) -> int:
+        """Remplit les tampons sous le seuil bas ; retourne le nombre d'exercices générés."""
+        generation_id = ContentManager.latest().id
+        with cls._lock:
+            cls._sync_generation(generation_id)
+            pending = [
+                (key, buffer, POOL_SIZE - len(buffer.items))
+                for key, buffer in cls._buffers.items()
+                if len(buffer.items) < POOL_LOW_WATERMARK
+            ]
+
+        produced = 0
+        for key, buffer, missing in pending:
+            # Génération hors verrou : les requêtes continuent de piocher pendant ce temps
+            try:
+                items = _seeded_batch(buffer.producer, missing)
+            except Exception as e:
+                print(f"❌ Erreur remplissage du tampon {key}: {e}")
+                continue
+            with cls._lock:
+                if cls._generation_id != generation_id or cls._buffers.get(key) is not buffer:
+                    # Contenu rechargé ou tampon évincé entre-temps
+                    continue
+                buffer.items.extend(items[:POOL_SIZE - len(buffer.items)])
+            produced += len(items)
+        return produced
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._buffers.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """Statistiques au format de FileCache.stats() (page /debug)."""
+        with cls._lock:
+            return {
+                "name": "exercise_pools",
+                "entries": sum(len(b.items) for b in cls._buffers.values()),
+                "max_entries": len(cls._buffers) * POOL_SIZE,
+                "hits": cls.hits,
+                "misses": cls.misses,
+                "evictions": cls.evictions,
+            }
+
+
+class PoolRefiller:
+    """Worker qui maintient les tampons d'ExercisePool au-dessus du seuil bas."""
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if not ExercisePool.enabled() or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="exercise-pool-refiller", daemon=True)
+        self._thread.start()
+        print(f"🧺 Tampons d'exercices actifs ({POOL_SIZE} par tampon, seuil bas {POOL_LOW_WATERMARK})")
+
+    def stop(self):
+        self._stop.set()
+        ExercisePool._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Réveillé par une prise qui passe sous le seuil, sinon à intervalle régulier
+            ExercisePool._wakeup.wait(self.interval)
+            ExercisePool._wakeup.clear()
+            if self._stop.is_set():
+                break
+            try:
+                ExercisePool.refill()
+            except Exception as e:
+                print(f"❌ Erreur remplissage des tampons d'exercices: {e}")
+            # Laisse respirer les requêtes entre deux remplissages
+            time.sleep(0.01)
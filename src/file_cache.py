@@ -0,0 +1,87 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+
+class _Entry(NamedTuple):
+    mtime_ns: int
+    checked_at: float
+    value: Any
+
+
+class FileCache:
+    """
+    Cache LRU borné du contenu de fichiers (texte brut ou YAML parsé),
+    indexé par chemin résolu et validé par le mtime du fichier.
+
+    Une entrée n'est revalidée (un os.stat) qu'au plus une fois toutes les
+    `revalidate_after` secondes : entre deux validations, un hit ne touche
+    pas au disque. invalidate() permet au watcher de forcer la relecture.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, revalidate_after: float = 2.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.revalidate_after = revalidate_after
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Retourne loader(path), depuis le cache si le fichier n'a pas changé.
+        Lève OSError si le fichier n'existe plus.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry.checked_at < self.revalidate_after:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry.value
+
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            self.invalidate(path)
+            raise
+
+        if entry is not None and entry.mtime_ns == mtime_ns:
+            with self._lock:
+                self._entries[path] = entry._replace(checked_at=now)
+                self._entries.move_to_end(path)
+                self.hits += 1
+            return entry.value
+
+        value = loader(path)
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = _Entry(mtime_ns, now, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, path: Optional[str] = None):
+        """Oublie un fichier, ou tout le cache si path est None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -1,6 +1,7 @@
-import random
 import math
-from typing import Dict, Any, List
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 
 class FractionGenerator:
     """
@@ -36,103 +37,94 @@ class FractionGenerator:
         except:
             return 0.0
 
+    @staticmethod
+    def exact_fraction(frac_str: Any) -> Fraction:
+        """Exact value of "3/8", "0.25" or 2; 0 when unreadable, like parse_fraction."""
+        try:
+            return Fraction(str(frac_str).strip())
+        except (ValueError, ZeroDivisionError):
+            return Fraction(0)
+
     @staticmethod
     def get_rgb_visual_blueprint(data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Transforms high-level exercise data into low-level rendering data.
-        """
-        visual_type = data.get("visual", "CYLINDER")
-        total_parts = data.get("parts", 1)
-        participants = data.get("participants", [])
-
-        # Normalize participant data
-        people = []
-        current_offset = 0.0 # 0 to 1 scale or simple counts
-        
-        # Calculate parts for each
-        # We assume 'parts' is the denominator reference for Grid/Pizza slices
-        # For Cylinder, it's just a continuous fill usually, but can be segmented.
-        
-        # Determine total occupied fraction to know 'remaining'
-        total_occupied = 0.0
-
-        processed_participants = []
-        
-        for p in participants:
-            frac_val = FractionGenerator.parse_fraction(p["fraction"])
-            # units occupied = frac_val * total_parts (if total_parts represents the whole integer count)
-            # Actually usually 'parts' implies the visual subdivision count.
-            
-            # For rendering, we need start/end angles or percentages
-            # We assume sequential filling
-            
-            start_ratio = total_occupied
-            end_ratio = total_occupied + frac_val
-            
-            p_data = {
-                "name": p["name"],
-                "color": p.get("color", FractionGenerator.COLORS.get(p["name"], "#999")),
-                "fraction_val": frac_val,
-                "start_ratio": start_ratio,
-                "end_ratio": end_ratio
-            }
-            processed_participants.append(p_data)
-            total_occupied += frac_val
-
-        blueprint = {
-            "type": visual_type,
-            "total_parts": total_parts, # e.g., 8 slices, 10 ticks
-            "participants": processed_participants,
-            "remaining_ratio": max(0.0, 1.0 - total_occupied)
-        }
 
-        if visual_type == "PIZZA":
-            # Pizza specific: angles
-            # 360 degrees total
-            for p in blueprint["participants"]:
-                p["start_angle"] = p["start_ratio"] * 360
-                p["end_angle"] = p["end_ratio"] * 360
-                p["is_large_arc"] = 1 if (p["end_angle"] - p["start_angle"]) > 180 else 0
-                
-                # Calculate coordinates for SVG path
-                # Center (0,0) (conceptually), radius R
-                # We'll let frontend handle R scaling, but we provide ready-to-use path commands or angles
-                
-        elif visual_type == "GRID":
-            # Grid specific: determining cells
-            # Try to find best RxC texturing
-            r, c = FractionGenerator._best_grid_dims(total_parts)
-            blueprint["rows"] = r
-            blueprint["cols"] = c
-            
-            # Assign specific cells to people logic
-            # Just fill sequentially 0..N-1
-            total_cells = r * c
-            cells_assigned = []
-            
-            current_cell_idx = 0
-            for p in blueprint["participants"]:
-                count = int(round(p["fraction_val"] * total_cells))
-                assigned = []
-                for _ in range(count):
-                    if current_cell_idx < total_cells:
-                        row = current_cell_idx // c
-                        col = current_cell_idx % c
-                        assigned.append({"r": row, "c": col})
-                        current_cell_idx += 1
-                p["cells"] = assigned
-                
-        elif visual_type == "CYLINDER":
-            # Just height percentages
-            pass
-
-        return blueprint
+        Blueprints are memoized on (visual, parts, participants): the returned
+        dict is shared between calls and must not be modified.
+        """
+        participants = tuple(
+            (p["name"], str(p["fraction"]), p.get("color", FractionGenerator.COLORS.get(p["name"], "#999")))
+            for p in data.get("participants", [])
+        )
+        return _build_blueprint(data.get("visual", "CYLINDER"), data.get("parts", 1), participants)
 
     @staticmethod
-    def _best_grid_dims(n: int):
-        # Find factors of n to make a nice rectangle
-        sqrt = int(math.sqrt(n))
+    def _best_grid_dims(n: int) -> Tuple[int, int]:
+        # Largest factor <= sqrt(n) of n and its cofactor, for a nice rectangle
+        if 0 < n <= MAX_GRID_PARTS:
+            return GRID_DIMS[n]
+        sqrt = math.isqrt(n) if n > 0 else 1
         for i in range(sqrt, 0, -1):
             if n % i == 0:
                 return i, n // i
         return 1, n
+
+
+# Dimensions (rows, cols) of the grid for 1..MAX_GRID_PARTS parts, precomputed once:
+# each divisor i is visited in increasing order, so the last one kept is the largest <= sqrt(n)
+MAX_GRID_PARTS = 1024
+GRID_DIMS: List[Tuple[int, int]] = [(1, n) for n in range(MAX_GRID_PARTS + 1)]
+for _i in range(2, math.isqrt(MAX_GRID_PARTS) + 1):
+    for _n in range(_i * _i, MAX_GRID_PARTS + 1, _i):
+        GRID_DIMS[_n] = (_i, _n // _i)
+
+
+@lru_cache(maxsize=1024)
+def _build_blueprint(visual_type: str, total_parts: Any, participants: Tuple[Tuple[str, str, str], ...]) -> Dict[str, Any]:
+    # Ratios are summed as exact fractions: participants filling the whole leave exactly 0
+    processed_participants = []
+    total_occupied = Fraction(0)
+    for name, frac_str, color in participants:
+        frac_val = FractionGenerator.exact_fraction(frac_str)
+        start, end = total_occupied, total_occupied + frac_val
+        processed_participants.append({
+            "name": name,
+            "color": color,
+            "fraction": f"{frac_val.numerator}/{frac_val.denominator}",
+            "fraction_val": float(frac_val),
+            "start_ratio": float(start),
+            "end_ratio": float(end),
+            "_start": start,
+            "_end": end,
+        })
+        total_occupied = end
+
+    blueprint = {
+        "type": visual_type,
+        "total_parts": total_parts, # e.g., 8 slices, 10 ticks
+        "participants": processed_participants,
+        "remaining_ratio": float(max(Fraction(0), 1 - total_occupied))
+    }
+
+    if visual_type == "PIZZA":
+        # Pizza specific: angles (360 degrees total), large-arc flag for the SVG path
+        for p in processed_participants:
+            p["start_angle"] = float(p["_start"] * 360)
+            p["end_angle"] = float(p["_end"] * 360)
+            p["is_large_arc"] = 1 if (p["_end"] - p["_start"]) * 360 > 180 else 0
+
+    elif visual_type == "GRID":
+        r, c = FractionGenerator._best_grid_dims(int(total_parts))
+        blueprint["rows"] = r
+        blueprint["cols"] = c
+        # Cells are filled sequentially; each participant gets the index range
+        # [start, end) of its cells (row = i // cols, col = i % cols). Rounding
+        # the exact bounds keeps the ranges contiguous without drift.
+        total_cells = r * c
+        for p in processed_participants:
+            p["cells"] = [min(total_cells, round(bound * total_cells)) for bound in (p["_start"], p["_end"])]
+
+    for p in processed_participants:
+        del p["_start"], p["_end"]
+    return blueprint
@@ -1,11 +1,19 @@
+import importlib
 from src.generators.factory import ExerciseFactory
-from src.generators.math_generator import MathGenerator
-from src.generators.course_generator import CourseGenerator
-from src.generators.problem_generator import ProblemGenerator
-from src.generators.divisibility_generator import DivisibilityGenerator
+from src.generators.registry import GeneratorRegistry
 
-# Register generators
-ExerciseFactory.register("calcul", MathGenerator())
-ExerciseFactory.register("cours", CourseGenerator())
-ExerciseFactory.register("probleme", ProblemGenerator())
-ExerciseFactory.register("divisibilite", DivisibilityGenerator())
+# Generators are declared in GeneratorRegistry and imported on first use of their
+# type; these names stay importable from src.generators without an eager import.
+_LAZY_EXPORTS = {
+    "MathGenerator": "src.generators.math_generator",
+    "CourseGenerator": "src.generators.course_generator",
+    "ProblemGenerator": "src.generators.problem_generator",
+    "DivisibilityGenerator": "src.generators.divisibility_generator",
+    "FractionExerciseGenerator": "src.generators.fraction_exercise_generator",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
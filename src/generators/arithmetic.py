@@ -0,0 +1,80 @@
+from typing import List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: callers fall back to their per-item generation
+    np = None
+
+# Below this many problems, per-item generation is cheaper than the NumPy setup
+VECTOR_MIN = 32
+
+# Operand ranges (a, b) per difficulty; any other difficulty uses DEFAULT_RANGES
+DIFFICULTY_RANGES = {
+    "simple": ((1, 10), (1, 10)),
+    "medium": ((10, 50), (1, 30)),
+    "hard": ((50, 200), (10, 100)),
+}
+DEFAULT_RANGES = ((1, 50), (1, 50))
+
+QUESTION_FORMATS = {
+    "addition": "Combien font $%d + %d$ ?",
+    "soustraction": "Combien font $%d - %d$ ?",
+    "multiplication": "Combien font $%d \\times %d$ ?",
+    "division": "Combien font $%d \\div %d$ ?",
+}
+
+
+def table_factors(count: int, np_rng) -> "np.ndarray":
+    """Factors 1-10 of a multiplication table, each round of 10 without repeats."""
+    rounds = -(-count // 10)
+    return np_rng.permuted(np.tile(np.arange(1, 11), (rounds, 1)), axis=1).ravel()[:count]
+
+
+def arithmetic_operands(
+    op_type: str, difficulty: str, count: int, np_rng, table: Optional[int] = None, small: bool = True
+) -> Optional[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]]:
+    """
+    Operands and results of count problems, as integer arrays (left, right, result).
+
+    Same rules as the per-item generators: difficulty ranges, subtraction kept
+    non-negative in simple mode, simple multiplication limited to 1-5 x 1-10
+    when small is set, divisions built from divisor x quotient, and a fixed
+    table when table is given. None for an unknown operation.
+    """
+    if op_type not in QUESTION_FORMATS:
+        return None
+    if op_type == "division":
+        divisor = np_rng.integers(2, 10, size=count, endpoint=True)
+        quotient = np_rng.integers(1, 10 if difficulty == "simple" else 20, size=count, endpoint=True)
+        return divisor * quotient, divisor, quotient
+
+    range_a, range_b = DIFFICULTY_RANGES.get(difficulty, DEFAULT_RANGES)
+    if op_type == "multiplication" and table is not None:
+        a = np.full(count, table, dtype=np.int64)
+        b = table_factors(count, np_rng)
+    elif op_type == "multiplication" and difficulty == "simple" and small:
+        a = np_rng.integers(1, 5, size=count, endpoint=True)
+        b = np_rng.integers(1, 10, size=count, endpoint=True)
+    else:
+        a = np_rng.integers(*range_a, size=count, endpoint=True)
+        b = np_rng.integers(*range_b, size=count, endpoint=True)
+
+    if op_type == "addition":
+        return a, b, a + b
+    if op_type == "soustraction":
+        if difficulty == "simple":
+            a, b = np.maximum(a, b), np.minimum(a, b)
+        return a, b, a - b
+    return a, b, a * b
+
+
+def arithmetic_problems(
+    op_type: str, difficulty: str, count: int, np_rng, table: Optional[int] = None, small: bool = True
+) -> Optional[Tuple[List[str], List[str], List[int]]]:
+    """Questions, answers and right operands of count problems, formatted in one pass."""
+    operands = arithmetic_operands(op_type, difficulty, count, np_rng, table, small)
+    if operands is None:
+        return None
+    left, right, result = (column.tolist() for column in operands)
+    question = QUESTION_FORMATS[op_type]
+    return [question % pair for pair in zip(left, right)], list(map(str, result)), right
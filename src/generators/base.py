@@ -1,19 +1,25 @@
+import random
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 class ExerciseGenerator(ABC):
     """
     Abstract base class for all exercise generators.
     """
+
+    # Exercises generated per generate() call by the default stream()
+    STREAM_CHUNK = 64
     
     @abstractmethod
-    def generate(self, config: Dict[str, Any], count: int = 1) -> List[Dict[str, Any]]:
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
         """
         Generate a list of exercises based on the configuration.
         
         Args:
             config: A dictionary containing generator-specific configuration (e.g., 'focus', 'difficulty').
             count: The number of exercises to generate.
+            rng: Random source for every draw (see src.rng.get_rng); pass a seeded
+                 random.Random to make the output reproducible.
             
         Returns:
             A list of exercise dictionaries. Each dictionary must have at least:
@@ -25,3 +31,19 @@ class ExerciseGenerator(ABC):
             - meta: (Optional) Visual blueprints or other metadata
         """
         pass
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yield exactly count exercises (same format as generate()).
+
+        The default implementation calls generate() in chunks of STREAM_CHUNK;
+        generators that build exercises one at a time override it and
+        implement generate() as list(self.stream(...)).
+        """
+        remaining = count
+        while remaining > 0:
+            chunk = self.generate(config, min(self.STREAM_CHUNK, remaining), rng)
+            if not chunk:
+                return
+            yield from chunk
+            remaining -= len(chunk)
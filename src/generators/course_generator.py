@@ -1,6 +1,7 @@
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from src.generators.base import ExerciseGenerator
+from src.rng import exercise_id, get_rng
 
 class CourseGenerator(ExerciseGenerator):
     DEFINITIONS = [
@@ -12,12 +13,15 @@ class CourseGenerator(ExerciseGenerator):
         {"term": "Facteurs", "def": "Nombres que l'on multiplie.", "clue": "Dans 5 x 3, 5 et 3 sont des..."}
     ]
 
-    def generate(self, config: Dict[str, Any], count: int = 1) -> List[Dict[str, Any]]:
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        return list(self.stream(config, count, rng))
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        rng = get_rng(rng)
         mode = config.get("mode", "definition") # definition (find term by def) or reverse
-        exercises = []
         
         for _ in range(count):
-            item = random.choice(self.DEFINITIONS)
+            item = rng.choice(self.DEFINITIONS)
             
             if mode == "definition":
                 question = f"Quel est le terme mathématique pour : {item['def']} ?"
@@ -31,7 +35,7 @@ class CourseGenerator(ExerciseGenerator):
             ex_type = config.get("interaction", "input") # input | qcm
             
             ex = {
-                "id": f"cours_{random.randint(1000, 9999)}",
+                "id": exercise_id("cours"),
                 "type": ex_type,
                 "question": question,
                 "answer": answer,
@@ -42,12 +46,10 @@ class CourseGenerator(ExerciseGenerator):
             if ex_type == "qcm":
                 options = [item["term"]]
                 while len(options) < 3:
-                    other = random.choice(self.DEFINITIONS)["term"]
+                    other = rng.choice(self.DEFINITIONS)["term"]
                     if other not in options:
                         options.append(other)
-                random.shuffle(options)
+                rng.shuffle(options)
                 ex["options"] = options
                 
-            exercises.append(ex)
-            
-        return exercises
+            yield ex
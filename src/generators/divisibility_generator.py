@@ -1,53 +1,116 @@
+import math
 import random
-import uuid
-from typing import List, Dict, Any
+from functools import lru_cache, reduce
+from typing import List, Dict, Any, Iterator, Optional, Sequence
 from src.generators.base import ExerciseGenerator
+from src.rng import distinct_indices, exercise_id, get_rng
+
+# Largest number shown per difficulty (smallest is always 2); any other difficulty uses "hard"
+MAX_VALUES = {"easy": 100, "medium": 1000, "hard": 10000}
+
+
+class ResidueClass:
+    """
+    Numbers x in [lo, hi] with x % step == 0 and, if exclude is set, x % exclude != 0
+    (exclude being a multiple of step). The i-th member is computed in O(1), so
+    members are drawn by index without scanning or rejecting candidates.
+    """
+
+    def __init__(self, step: int, exclude: Optional[int], lo: int, hi: int):
+        self.step = step
+        # Members are step * k; with an exclusion, k must not be a multiple of m
+        self.m = exclude // step if exclude else None
+        k_lo = -(-lo // step)
+        k_hi = hi // step
+        self.offset = self._rank(k_lo - 1)
+        self.size = max(0, self._rank(k_hi) - self.offset)
+
+    def _rank(self, k: int) -> int:
+        """Number of admissible k' in [1, k]."""
+        if k <= 0:
+            return 0
+        return k - k // self.m if self.m else k
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> int:
+        i = self.offset + index
+        if self.m is None:
+            k = i + 1
+        elif self.m == 1:
+            raise IndexError("empty residue class")
+        else:
+            # The admissible k come in runs of m - 1 between two multiples of m
+            q, r = divmod(i, self.m - 1)
+            k = q * self.m + r + 1
+        return self.step * k
+
+
+@lru_cache(maxsize=256)
+def residue_class(step: int, exclude: Optional[int], lo: int, hi: int) -> ResidueClass:
+    return ResidueClass(step, exclude, lo, hi)
+
+
+def _divisors_text(divisors: Sequence[int]) -> str:
+    parts = [f"par {d}" for d in divisors]
+    if len(parts) == 1:
+        return parts[0]
+    return ", ".join(parts[:-1]) + " et " + parts[-1]
+
 
 class DivisibilityGenerator(ExerciseGenerator):
-    def generate(self, config: Dict[str, Any], count: int = 1) -> List[Dict[str, Any]]:
-        exercises = []
+    """
+    "Which numbers are divisible by ...?" multiselect questions.
+
+    Config: divisor (int) or divisors (list, all must divide), difficulty
+    (easy/medium/hard), options (default 6) and correct (number of correct
+    options; by default between 1 and options - 1, so every question has both
+    right and wrong options when the range allows it).
+    """
+
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        return list(self.stream(config, count, rng))
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        rng = get_rng(rng)
         difficulty = config.get("difficulty", "medium")
-        # Default to 2 if not specified, but could be 3, 5, 9, 10
-        divisor = config.get("divisor", 2)
-        
-        # Adjust range based on difficulty
-        if difficulty == "easy":
-            max_val = 100
-        elif difficulty == "medium":
-            max_val = 1000
-        else: # hard
-            max_val = 10000
-            
+        # Default to 2 if not specified, but could be 3, 5, 9, 10 or several divisors
+        divisors = config.get("divisors", config.get("divisor", 2))
+        if not isinstance(divisors, (list, tuple)):
+            divisors = [divisors]
+        divisors = sorted({int(d) for d in divisors})
+        lcm = reduce(lambda a, b: a * b // math.gcd(a, b), divisors)
+        n_options = int(config.get("options", 6))
+
+        # The range always holds at least one multiple of every divisor together
+        max_val = max(MAX_VALUES.get(difficulty, MAX_VALUES["hard"]), 2 * lcm)
+        multiples = residue_class(lcm, None, 2, max_val)
+        others = residue_class(1, lcm, 2, max_val)
+
+        question = f"Quels sont les nombres divisibles {_divisors_text(divisors)} ?"
+        tag = f"math:arithmetique:divisibilite:{'_'.join(map(str, divisors))}"
+
         for _ in range(count):
-            numbers = []
-            correct_numbers = []
-            
-            # Generate 6 candidates
-            # Try to ensure we have at least one correct and one incorrect
-            while len(numbers) < 6:
-                n = random.randint(2, max_val)
-                if n in numbers:
-                    continue
-                
-                numbers.append(n)
-            
-            for n in numbers:
-                if n % divisor == 0:
-                    correct_numbers.append(str(n))
-            
-            # Options as strings
-            options = [str(n) for n in numbers]
-            # No need to shuffle as they were added in random order
-            
-            ex = {
-                "id": f"gen_div_{uuid.uuid4().hex[:8]}",
+            if "correct" in config:
+                n_correct = int(config["correct"])
+            else:
+                n_correct = rng.randint(1, max(1, n_options - 1))
+            # Keep the mix possible within the class sizes
+            n_correct = max(0, min(n_correct, len(multiples), n_options))
+            n_wrong = min(n_options - n_correct, len(others))
+            n_correct = min(n_options - n_wrong, len(multiples))
+
+            correct_numbers = [multiples[i] for i in distinct_indices(len(multiples), n_correct, rng)]
+            numbers = correct_numbers + [others[i] for i in distinct_indices(len(others), n_wrong, rng)]
+            rng.shuffle(numbers)
+
+            yield {
+                "id": exercise_id("gen_div"),
                 "type": "multiselect",
-                "question": f"Quels sont les nombres divisibles par {divisor} ?",
-                "options": options,
-                "answer": correct_numbers,
-                "tag": f"math:arithmetique:divisibilite:{divisor}",
+                "question": question,
+                "options": [str(n) for n in numbers],
+                "answer": [str(n) for n in numbers if n % lcm == 0],
+                "tag": tag,
                 "meta": {"difficulty": difficulty}
             }
-            exercises.append(ex)
-            
-        return exercises
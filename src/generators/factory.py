@@ -1,17 +1,79 @@
-from typing import List, Dict, Any
+from fractions import Fraction
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 from src.generators.base import ExerciseGenerator
+from src.generators.registry import GeneratorRegistry
+from src.rng import get_rng
 import random
 
-class ExerciseFactory:
-    _generators: Dict[str, ExerciseGenerator] = {}
 
+def apportion(weights: Sequence[Any], total: int) -> List[int]:
+    """
+    Split total into integer counts proportional to weights (largest remainder).
+
+    The counts always sum to total; each count is the floor of its exact share
+    or one more, the extra units going to the largest fractional parts (ties in
+    recipe order). Weights are converted to exact fractions, so float weights
+    from YAML do not introduce rounding drift.
+    """
+    shares = [Fraction(w) for w in weights]
+    total_weight = sum(shares)
+    if total <= 0 or total_weight <= 0:
+        return [0] * len(shares)
+    counts = []
+    remainders = []
+    for i, share in enumerate(shares):
+        exact = share * total / total_weight
+        counts.append(exact.numerator // exact.denominator)
+        remainders.append((exact - counts[-1], -i))
+    leftover = total - sum(counts)
+    for _, neg_i in sorted(remainders, reverse=True)[:leftover]:
+        counts[-neg_i] += 1
+    return counts
+
+
+class _RemainingCounts:
+    """Fenwick tree over the items still owed by each source: O(log n) weighted picks."""
+
+    def __init__(self, counts: Sequence[int]):
+        self.size = len(counts)
+        self.tree = [0] * (self.size + 1)
+        self.total = 0
+        for i, c in enumerate(counts):
+            self.add(i, c)
+
+    def add(self, index: int, delta: int):
+        self.total += delta
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, target: int) -> int:
+        """Index of the source holding unit number target (0 <= target < total)."""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos
+
+
+class ExerciseFactory:
     @classmethod
     def register(cls, type_name: str, generator: ExerciseGenerator):
-        """Register a new generator type."""
-        cls._generators[type_name] = generator
+        """Register a new generator type (see GeneratorRegistry for lazy declarations)."""
+        GeneratorRegistry.register(type_name, generator)
 
     @classmethod
-    def create_exercises(cls, recipe: List[Dict[str, Any]], total_count: int = 10) -> List[Dict[str, Any]]:
+    def create_exercises(
+        cls,
+        recipe: List[Dict[str, Any]],
+        total_count: int = 10,
+        rng: Optional[random.Random] = None
+    ) -> List[Dict[str, Any]]:
         """
         Generate a mixed set of exercises based on a recipe.
         
@@ -19,48 +81,64 @@ class ExerciseFactory:
             recipe: List of generator configs (from YAML 'generators').
                    Example: [{'type': 'calcul', 'weight': 2}, {'type': 'probleme'}]
             total_count: Total number of exercises to generate.
+            rng: Random source shared by every generator of the recipe.
         """
-        exercises = []
-        
-        # Calculate weights to distribute count
-        # If weight is missing, default to 1
-        weighted_recipe = []
-        total_weight = 0
-        for item in recipe:
-            w = item.get('weight', 1)
-            weighted_recipe.append((item, w))
-            total_weight += w
-            
-        if total_weight == 0:
-            return []
+        return list(cls.iter_exercises(recipe, total_count, rng))
 
-        # Distribute counts
-        # We'll do a simple distribution for now
-        generated_count = 0
-        
-        for item, weight in weighted_recipe:
-            # Calculate proportion
-            count_for_item = int((weight / total_weight) * total_count)
-            # Ensure at least 1 if count > 0 and weight > 0 (logic can be improved)
-            
-            gen_type = item.get('type')
-            if gen_type in cls._generators:
-                generator = cls._generators[gen_type]
-                item_exercises = generator.generate(item, count_for_item)
-                exercises.extend(item_exercises)
-                generated_count += len(item_exercises)
-            else:
-                print(f"Warning: Generator type '{gen_type}' not found.")
+    @classmethod
+    def iter_exercises(
+        cls,
+        recipe: List[Dict[str, Any]],
+        total_count: int = 10,
+        rng: Optional[random.Random] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream exactly total_count exercises from a recipe, in random order.
 
-        # If we have a shortfall due to rounding, fill up with random choice from recipe
-        while len(exercises) < total_count:
-            item = random.choice(recipe)
+        Each recipe item gets its largest-remainder share of total_count and
+        a lazy generator stream. The next exercise comes from a source drawn
+        with probability proportional to the items it still owes, which orders
+        the output like a uniform shuffle without materializing it. Only the
+        exercises actually yielded are generated.
+        """
+        rng = get_rng(rng)
+        sources: List[Tuple[Dict[str, Any], ExerciseGenerator]] = []
+        weights = []
+        for item in recipe:
             gen_type = item.get('type')
-            if gen_type in cls._generators:
-                exercises.extend(cls._generators[gen_type].generate(item, 1))
-            else:
-                break # Avoid infinite loop if no valid generators
+            generator = GeneratorRegistry.get(gen_type)
+            if generator is None:
+                print(f"Warning: Generator type '{gen_type}' not found.")
+                continue
+            # If weight is missing, default to 1
+            weight = item.get('weight', 1)
+            if weight > 0:
+                sources.append((item, generator))
+                weights.append(weight)
 
-        # Shuffle results
-        random.shuffle(exercises)
-        return exercises[:total_count]
+        owed = [0] * len(sources)
+        active = list(range(len(sources)))
+        needed = total_count
+        while needed > 0 and active:
+            # Quotas for the active sources; a round only repeats if a stream ran dry early
+            quotas = apportion([weights[i] for i in active], needed)
+            streams = {}
+            for i, quota in zip(active, quotas):
+                owed[i] = quota
+                if quota:
+                    item, generator = sources[i]
+                    streams[i] = generator.stream(item, quota, rng)
+            remaining = _RemainingCounts(owed)
+            while remaining.total:
+                i = remaining.find(rng.randrange(remaining.total))
+                exercise = next(streams[i], None)
+                if exercise is None:
+                    print(f"Warning: Generator '{sources[i][0].get('type')}' produced fewer exercises than requested.")
+                    remaining.add(i, -owed[i])
+                    owed[i] = 0
+                    active.remove(i)
+                    continue
+                remaining.add(i, -1)
+                owed[i] -= 1
+                needed -= 1
+                yield exercise
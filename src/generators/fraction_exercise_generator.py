@@ -0,0 +1,148 @@
+import math
+import random
+import itertools
+from fractions import Fraction
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from src.generators.base import ExerciseGenerator
+from src.rng import exercise_id, get_rng
+
+DIFFICULTIES = ("simple", "medium", "hard")
+
+# Largest denominator shown per difficulty
+MAX_DENOMINATOR = {"simple": 8, "medium": 10, "hard": 12}
+
+OPERATIONS = ("addition", "soustraction", "multiplication", "division", "comparaison", "simplification")
+OPERATORS = {"addition": "+", "soustraction": "-", "multiplication": "\\times", "division": "\\div"}
+
+# Numerators n of the irreducible proper fractions n/d
+COPRIME_NUMERATORS = {
+    d: tuple(n for n in range(1, d) if math.gcd(n, d) == 1) for d in range(2, max(MAX_DENOMINATOR.values()) + 1)
+}
+
+# Irreducible proper fractions (n, d) per difficulty, for products and quotients
+PROPER_FRACTIONS = {
+    difficulty: tuple((n, d) for d in range(2, MAX_DENOMINATOR[difficulty] + 1) for n in COPRIME_NUMERATORS[d])
+    for difficulty in DIFFICULTIES
+}
+
+
+def _same_denominator_pairs(max_d: int) -> List[Tuple[int, int, int, int]]:
+    # a/d and b/d with a > b: only the numerators are added or subtracted
+    return [(a, d, b, d) for d in range(2, max_d + 1) for a in range(2, d) for b in range(1, a)]
+
+
+def _pairs(max_d: int, related: bool) -> List[Tuple[int, int, int, int]]:
+    # Irreducible a/d1 > b/d2, d1 != d2, with one denominator a multiple of the other (related)
+    # or neither (common denominator to find)
+    pairs = []
+    fractions = [(n, d) for d in range(2, max_d + 1) for n in COPRIME_NUMERATORS[d]]
+    for (a, d1), (b, d2) in itertools.permutations(fractions, 2):
+        if d1 == d2 or Fraction(a, d1) <= Fraction(b, d2):
+            continue
+        if (d1 % d2 == 0 or d2 % d1 == 0) == related:
+            pairs.append((a, d1, b, d2))
+    return pairs
+
+
+# Operands (a, d1, b, d2) of sums, differences and comparisons, with a/d1 > b/d2:
+# same denominator (simple), one denominator multiple of the other (medium), any (hard)
+OPERAND_PAIRS = {
+    "simple": _same_denominator_pairs(MAX_DENOMINATOR["simple"]),
+    "medium": _pairs(MAX_DENOMINATOR["medium"], related=True),
+    "hard": _pairs(MAX_DENOMINATOR["hard"], related=False),
+}
+
+# Simplification: irreducible n/d (2 <= d <= 12) weighted as the former rejection loop
+# (d uniform, then n among the d - 1 candidates), times a factor per difficulty
+IRREDUCIBLE_FRACTIONS = [(n, d) for d in range(2, 13) for n in COPRIME_NUMERATORS[d]]
+_IRREDUCIBLE_CUM_WEIGHTS = list(itertools.accumulate(1 / (d - 1) for _, d in IRREDUCIBLE_FRACTIONS))
+SIMPLIFICATION_FACTORS = {"simple": (2, 5), "medium": (5, 10), "hard": (10, 20)}
+
+
+def tex_fraction(n: int, d: int) -> str:
+    return f"\\frac{{{n}}}{{{d}}}"
+
+
+def fraction_answer(value: Fraction) -> str:
+    """Exact answer in lowest terms: "n/d", or "n" for a whole number."""
+    if value.denominator == 1:
+        return str(value.numerator)
+    return f"{value.numerator}/{value.denominator}"
+
+
+class FractionExerciseGenerator(ExerciseGenerator):
+    """
+    Fraction exercises: addition, soustraction, multiplication, division,
+    comparaison and simplification, with exact Fraction answers.
+
+    Operands are drawn in one step from the tables above, so no draw is ever
+    rejected. Config: subtype (one of OPERATIONS, or "mix" for a different
+    operation per exercise) and difficulty (simple/medium/hard, anything else
+    picks one per exercise).
+    """
+
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        return list(self.stream(config, count, rng))
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        rng = get_rng(rng)
+        subtype = config.get("subtype", "mix")
+        difficulty = config.get("difficulty", "medium")
+        if subtype not in OPERATIONS and subtype != "mix":
+            return
+        for _ in range(count):
+            op = subtype if subtype != "mix" else rng.choice(OPERATIONS)
+            level = difficulty if difficulty in DIFFICULTIES else rng.choice(DIFFICULTIES)
+            yield self.generate_one(op, level, rng)
+
+    @staticmethod
+    def generate_one(op: str, difficulty: str, rng: random.Random) -> Dict[str, Any]:
+        if op == "simplification":
+            factor = rng.randint(*SIMPLIFICATION_FACTORS[difficulty])
+            n, d = rng.choices(IRREDUCIBLE_FRACTIONS, cum_weights=_IRREDUCIBLE_CUM_WEIGHTS)[0]
+            exercise = {
+                "type": "input",
+                "question": f"Simplifiez la fraction ${tex_fraction(n * factor, d * factor)}$",
+                "answer": f"{n}/{d}",
+            }
+        elif op == "comparaison":
+            exercise = FractionExerciseGenerator._comparison(difficulty, rng)
+        else:
+            if op in ("addition", "soustraction"):
+                a, d1, b, d2 = rng.choice(OPERAND_PAIRS[difficulty])
+                # Differences stay positive; sums show the larger fraction first or second
+                if op == "addition" and rng.random() < 0.5:
+                    a, d1, b, d2 = b, d2, a, d1
+            else:
+                (a, d1), (b, d2) = rng.choice(PROPER_FRACTIONS[difficulty]), rng.choice(PROPER_FRACTIONS[difficulty])
+            x, y = Fraction(a, d1), Fraction(b, d2)
+            result = {"addition": x + y, "soustraction": x - y, "multiplication": x * y, "division": x / y}[op]
+            exercise = {
+                "type": "input",
+                "question": f"Calculez ${tex_fraction(a, d1)} {OPERATORS[op]} {tex_fraction(b, d2)}$ (fraction irréductible)",
+                "answer": fraction_answer(result),
+            }
+
+        exercise["id"] = exercise_id(f"frac_{op}")
+        exercise["tag"] = f"math:fraction:{op}"
+        exercise["meta"] = {"difficulty": difficulty}
+        return exercise
+
+    @staticmethod
+    def _comparison(difficulty: str, rng: random.Random) -> Dict[str, Any]:
+        if rng.randrange(3) == 0:
+            # Equal values: the second fraction is shown amplified
+            a, d1 = rng.choice(PROPER_FRACTIONS[difficulty])
+            k = rng.randint(2, 4)
+            b, d2, answer = a * k, d1 * k, "="
+        else:
+            a, d1, b, d2 = rng.choice(OPERAND_PAIRS[difficulty])
+            answer = ">"
+            if rng.random() < 0.5:
+                a, d1, b, d2, answer = b, d2, a, d1, "<"
+        return {
+            "type": "qcm",
+            "question": f"Quel signe placer entre ${tex_fraction(a, d1)}$ et ${tex_fraction(b, d2)}$ ?",
+            "options": ["<", "=", ">"],
+            "answer": answer,
+        }
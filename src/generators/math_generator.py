@@ -1,22 +1,82 @@
 import random
 import math
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from src.generators.base import ExerciseGenerator
+from src.generators.arithmetic import QUESTION_FORMATS, VECTOR_MIN, arithmetic_problems, np
+from src.rng import distinct_indices, exercise_id, get_rng, numpy_rng
 
 class MathGenerator(ExerciseGenerator):
-    def generate(self, config: Dict[str, Any], count: int = 1) -> List[Dict[str, Any]]:
+    # NumPy batches grow from FIRST_BATCH to BATCH_SIZE (multiples of 10, so table
+    # rounds stay whole): a stream read a few items at a time holds little memory
+    FIRST_BATCH = 10
+    BATCH_SIZE = 500
+
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        return list(self.stream(config, count, rng))
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        rng = get_rng(rng)
         subtype = config.get("subtype", "addition") # addition, multiplication...
         difficulty = config.get("difficulty", "medium")
         # Use 'table' if present, otherwise 'focus'
         focus = config.get("table", config.get("focus"))
+        table = self._table(subtype, focus)
+        # Simple multiplications stay within 1-5 x 1-10 only when no focus is given
+        small = table is None and not focus
 
-        exercises = []
-        for _ in range(count):
-            ex = self._generate_one(subtype, difficulty, focus)
-            exercises.append(ex)
-        return exercises
+        if np is not None and subtype in QUESTION_FORMATS and count >= VECTOR_MIN:
+            yield from self._stream_vectorized(subtype, difficulty, table, small, count, rng)
+            return
+
+        if table is not None:
+            # Fixed table: the 10 products are drawn without replacement, 10 at a time
+            for start in range(0, count, 10):
+                for i in distinct_indices(10, min(10, count - start), rng):
+                    yield self._generate_one(subtype, difficulty, table, small, rng, i + 1)
+        else:
+            for _ in range(count):
+                yield self._generate_one(subtype, difficulty, table, small, rng)
+
+    @staticmethod
+    def _table(op_type: str, focus: Any) -> Optional[int]:
+        """
+        Multiplication table selected by focus, 0 included; None if focus is
+        missing or not an integer. A non-integer focus draws from the regular
+        difficulty ranges (1-10 x 1-10 in simple mode).
+        """
+        if op_type != "multiplication" or focus is None:
+            return None
+        try:
+            return int(focus)
+        except (TypeError, ValueError):
+            return None
+
+    def _stream_vectorized(
+        self, op_type: str, difficulty: str, table: Optional[int], small: bool, count: int, rng: random.Random
+    ) -> Iterator[Dict[str, Any]]:
+        np_rng = numpy_rng(rng)
+        tag = f"math:calcul:{op_type}"
+        remaining = count
+        batch = self.FIRST_BATCH
+        while remaining > 0:
+            size = min(batch, remaining)
+            questions, answers, _ = arithmetic_problems(op_type, difficulty, size, np_rng, table, small)
+            remaining -= size
+            batch = min(batch * 2, self.BATCH_SIZE)
+            for question, answer in zip(questions, answers):
+                yield {
+                    "id": exercise_id(f"cal_{op_type}"),
+                    "type": "input",
+                    "question": question,
+                    "answer": answer,
+                    "tag": tag,
+                    "meta": {}
+                }
 
-    def _generate_one(self, op_type: str, difficulty: str, focus: Any) -> Dict[str, Any]:
+    def _generate_one(
+        self, op_type: str, difficulty: str, table: Optional[int], small: bool, rng: random.Random,
+        factor: Optional[int] = None
+    ) -> Dict[str, Any]:
         # Tag logic: math:calcul:{op_type}
         tag = f"math:calcul:{op_type}"
         
@@ -29,18 +89,13 @@ class MathGenerator(ExerciseGenerator):
         else: # random
              range_a, range_b = (1, 50), (1, 50)
         
-        # Override for Multiplication tables if focus is set
-        if op_type == "multiplication" and focus is not None:
-            try:
-                table = int(focus)
-                a = table
-                b = random.randint(1, 10)
-            except ValueError:
-                a = random.randint(*range_a)
-                b = random.randint(*range_b)
+        # Override for Multiplication tables if a table is set
+        if table is not None:
+            a = table
+            b = factor if factor is not None else rng.randint(1, 10)
         else:
-            a = random.randint(*range_a)
-            b = random.randint(*range_b)
+            a = rng.randint(*range_a)
+            b = rng.randint(*range_b)
 
         # Logic per operation
         if op_type == "addition":
@@ -54,15 +109,15 @@ class MathGenerator(ExerciseGenerator):
             answer = str(a - b)
             
         elif op_type == "multiplication":
-            if difficulty == "simple" and not focus: 
-                a, b = random.randint(1, 5), random.randint(1, 10)
+            if difficulty == "simple" and small:
+                a, b = rng.randint(1, 5), rng.randint(1, 10)
             question = f"Combien font ${a} \\times {b}$ ?"
             answer = str(a * b)
             
         elif op_type == "division":
             # Ensure integer result
-            divisor = random.randint(2, 10)
-            quotient = random.randint(1, 10 if difficulty == "simple" else 20)
+            divisor = rng.randint(2, 10)
+            quotient = rng.randint(1, 10 if difficulty == "simple" else 20)
             dividend = divisor * quotient
             question = f"Combien font ${dividend} \\div {divisor}$ ?"
             answer = str(quotient)
@@ -72,7 +127,7 @@ class MathGenerator(ExerciseGenerator):
             answer = "2"
 
         return {
-            "id": f"cal_{op_type}_{random.randint(10000, 99999)}",
+            "id": exercise_id(f"cal_{op_type}"),
             "type": "input",
             "question": question,
             "answer": answer,
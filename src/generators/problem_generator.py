@@ -1,81 +1,44 @@
 import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
+from src.content_manager import ContentManager
 from src.generators.base import ExerciseGenerator
+from src.rng import exercise_id, get_rng
 
 class ProblemGenerator(ExerciseGenerator):
-    SCENARIOS = {
-        "pizza": [
-            {
-                "template": "Tom a commandé une pizza coupée en {total} parts. Il en mange {taken}. Combien de parts reste-t-il ?",
-                "vars": lambda diff: {"total": (t := random.choice([4, 6, 8])), "taken": random.randint(1, t-1)},
-                "calc": lambda v: v["total"] - v["taken"],
-                "blueprint": lambda v: {"type": "pizza", "total": v["total"], "highlighted": v["taken"], "style": "eaten"}
-            },
-            {
-                "template": "Alice partage une pizza de {total} parts avec Tom. Tom prend {alice_share} parts et Alice en prend {tom_share}. Combien de parts ont-ils mangé en tout ?",
-                "vars": lambda diff: {"total": (t := random.choice([6, 8, 10, 12])), "alice_share": random.randint(1, t//2), "tom_share": random.randint(1, t//2)},
-                "calc": lambda v: v["alice_share"] + v["tom_share"],
-                "blueprint": lambda v: {"type": "pizza", "total": v["total"], "highlighted": v["alice_share"] + v["tom_share"]}
-            }
-        ],
-        "chocolat": [
-            {
-                "template": "Une tablette de chocolat a {rows} rangées de {cols} carrés. Combien y a-t-il de carrés au total ?",
-                "vars": lambda diff: {"rows": random.randint(2, 5), "cols": random.randint(3, 6)},
-                "calc": lambda v: v["rows"] * v["cols"],
-                "blueprint": lambda v: {"type": "grid", "rows": v["rows"], "cols": v["cols"], "highlighted": 0}
-            },
-            {
-                "template": "Tom a mangé {eaten} carrés d'une tablette de {rows} par {cols}. Combien en reste-t-il ?",
-                "vars": lambda diff: {"rows": (r:=random.randint(3, 5)), "cols": (c:=random.randint(4, 8)), "eaten": random.randint(1, r*c - 1)},
-                "calc": lambda v: v["rows"] * v["cols"] - v["eaten"],
-                "blueprint": lambda v: {"type": "grid", "rows": v["rows"], "cols": v["cols"], "highlighted": v["eaten"], "style": "missing"}
-            }
-        ],
-        "liquide": [
-            {
-                "template": "Un verre doseur contient {level} ml de lait. Alice ajoute {add} ml. Quel est le volume total ?",
-                "vars": lambda diff: {"level": random.randint(50, 200), "add": random.randint(20, 100)},
-                "calc": lambda v: v["level"] + v["add"],
-                "blueprint": lambda v: {"type": "beaker", "capacity": 500, "level_start": v["level"], "level_end": v["level"] + v["add"]}
-            }
-        ]
-    }
+    """
+    Word problems built from the scenarios*.yaml files of the content
+    (see src.problem_scenarios): adding a scenario needs no code change.
+
+    Config: categories (list, default: every category of the catalog).
+    """
+
+    def generate(self, config: Dict[str, Any], count: int = 1, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        return list(self.stream(config, count, rng))
+
+    def stream(self, config: Dict[str, Any], count: int, rng: Optional[random.Random] = None) -> Iterator[Dict[str, Any]]:
+        rng = get_rng(rng)
+        catalog = ContentManager.get_problem_scenarios()
+        # Unknown categories are ignored up front so that exactly count exercises are produced
+        categories = [c for c in config.get("categories", catalog.categories()) if catalog.by_category.get(c)]
+        if not categories:
+            if not catalog.scenarios:
+                print("Warning: no problem scenario loaded (content/*/scenarios*.yaml); is the content loaded?")
+            else:
+                print(f"Warning: no problem scenario in categories {config.get('categories')}.")
+            return
 
-    def generate(self, config: Dict[str, Any], count: int = 1) -> List[Dict[str, Any]]:
-        categories = config.get("categories", ["pizza", "liquide", "chocolat"])
-        exercises = []
-        
         for _ in range(count):
-            cat = random.choice(categories)
-            if cat not in self.SCENARIOS:
-                continue
-                
-            scenario = random.choice(self.SCENARIOS[cat])
-            
-            # Generate variables based on difficulty (placeholder for now)
-            variables = scenario["vars"](config.get("difficulty", "medium"))
-            
-            # Create question text
-            question = scenario["template"].format(**variables)
-            
-            # Calculate answer
-            answer = str(scenario["calc"](variables))
-            
-            # Generate Blueprint
-            blueprint = scenario["blueprint"](variables)
-            
-            tag = f"math:probleme:{cat}"
-            
-            exercises.append({
-                "id": f"prob_{cat}_{random.randint(10000, 99999)}",
-                "type": "input", 
+            cat = rng.choice(categories)
+            scenario = rng.choice(catalog.by_category[cat])
+            question, answer, blueprint = scenario.generate(rng)
+
+            yield {
+                "id": exercise_id(f"prob_{cat}"),
+                "type": "input",
                 "question": question,
                 "answer": answer,
-                "tag": tag,
+                "tag": f"math:probleme:{cat}",
                 "meta": {
                     "visual_blueprint": blueprint
                 }
-            })
-            
-        return exercises
+            }
@@ -0,0 +1,157 @@
+import os
+import time
+import importlib
+import threading
+from importlib.metadata import entry_points
+from typing import List, Dict, Any, Optional
+from src.generators.base import ExerciseGenerator
+from src.yaml_loader import load_yaml
+
+# Entry point group scanned for third-party generators, e.g. in a pyproject.toml:
+#   [project.entry-points."cours_toujours.generators"]
+#   fraction = "my_package.fractions:FractionGenerator"
+ENTRY_POINT_GROUP = "cours_toujours.generators"
+
+# Optional config file: {"generators": {type: "module:attribute" or null to disable}}
+CONFIG_PATH = os.path.join("config", "generators.yaml")
+
+BUILTIN_GENERATORS = {
+    "calcul": "src.generators.math_generator:MathGenerator",
+    "cours": "src.generators.course_generator:CourseGenerator",
+    "probleme": "src.generators.problem_generator:ProblemGenerator",
+    "divisibilite": "src.generators.divisibility_generator:DivisibilityGenerator",
+    "fraction": "src.generators.fraction_exercise_generator:FractionExerciseGenerator",
+}
+
+
+class _Entry:
+    def __init__(self, type_name: str, target: Optional[str], source: str, instance: Optional[ExerciseGenerator] = None):
+        self.type_name = type_name
+        # "module:attribute" imported on first use (None for generators registered as instances)
+        self.target = target
+        self.source = source
+        self.instance = instance
+        self.load_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class GeneratorRegistry:
+    """
+    Generator types available to ExerciseFactory.
+
+    Types are declared by built-ins, entry points and the config file (later
+    sources override earlier ones), but a generator module is only imported
+    the first time its type is requested.
+    """
+
+    _entries: Dict[str, _Entry] = {}
+    _discovered = False
+    # Reentrant: a generator module may register other generators while being imported
+    _lock = threading.RLock()
+
+    @classmethod
+    def register(cls, type_name: str, generator: ExerciseGenerator):
+        """Register an already instantiated generator."""
+        with cls._lock:
+            cls._entries[type_name] = _Entry(type_name, None, "code", generator)
+
+    @classmethod
+    def declare(cls, type_name: str, target: str, source: str = "code"):
+        """Declare a generator by "module:attribute", imported on first use."""
+        with cls._lock:
+            cls._entries[type_name] = _Entry(type_name, target, source)
+
+    @classmethod
+    def discover(cls, config_path: str = CONFIG_PATH):
+        """Collect declarations from built-ins, entry points and the config file (no import)."""
+        with cls._lock:
+            if cls._discovered:
+                return
+            cls._discovered = True
+            declared = {name: (target, "builtin") for name, target in BUILTIN_GENERATORS.items()}
+
+            try:
+                for ep in entry_points(group=ENTRY_POINT_GROUP):
+                    declared[ep.name] = (ep.value, f"entry point ({ep.dist.name if ep.dist else '?'})")
+            except Exception as e:
+                print(f"Warning: could not read '{ENTRY_POINT_GROUP}' entry points: {e}")
+
+            if os.path.exists(config_path):
+                try:
+                    with open(config_path, "r", encoding="utf-8") as f:
+                        data = load_yaml(f) or {}
+                    for name, target in (data.get("generators") or {}).items():
+                        if target is None:
+                            declared.pop(name, None)
+                        else:
+                            declared[name] = (str(target), config_path)
+                except Exception as e:
+                    print(f"Warning: could not read {config_path}: {e}")
+
+            for name, (target, source) in declared.items():
+                # Generators registered explicitly in code keep precedence
+                if name not in cls._entries:
+                    cls._entries[name] = _Entry(name, target, source)
+
+    @classmethod
+    def get(cls, type_name: str) -> Optional[ExerciseGenerator]:
+        """Generator for a type, importing its module on first request; None if unknown or broken."""
+        cls.discover()
+        entry = cls._entries.get(type_name)
+        if entry is None:
+            return None
+        if entry.instance is not None or entry.error is not None:
+            return entry.instance
+        with cls._lock:
+            if entry.instance is None and entry.error is None:
+                cls._load(entry)
+        return entry.instance
+
+    @staticmethod
+    def _load(entry: _Entry):
+        t0 = time.perf_counter()
+        try:
+            module_name, _, attribute = entry.target.partition(":")
+            obj = importlib.import_module(module_name)
+            for part in attribute.split(".") if attribute else []:
+                obj = getattr(obj, part)
+            # A class (or factory) is instantiated once; an instance is used as is
+            generator = obj if isinstance(obj, ExerciseGenerator) else obj()
+            if not isinstance(generator, ExerciseGenerator):
+                raise TypeError(f"{entry.target} is not an ExerciseGenerator")
+            entry.instance = generator
+        except Exception as e:
+            entry.error = f"{type(e).__name__}: {e}"
+            print(f"Warning: could not load generator '{entry.type_name}' ({entry.target}): {entry.error}")
+        entry.load_ms = (time.perf_counter() - t0) * 1000
+
+    @classmethod
+    def types(cls) -> List[str]:
+        cls.discover()
+        return sorted(cls._entries)
+
+    @classmethod
+    def report(cls) -> List[Dict[str, Any]]:
+        """One row per declared type: where it comes from and whether it was imported."""
+        cls.discover()
+        with cls._lock:
+            return [
+                {
+                    "type": e.type_name,
+                    "target": e.target or type(e.instance).__name__,
+                    "source": e.source,
+                    "loaded": e.instance is not None,
+                    "load_ms": round(e.load_ms, 2) if e.load_ms is not None else None,
+                    "error": e.error,
+                }
+                for e in sorted(cls._entries.values(), key=lambda e: e.type_name)
+            ]
+
+    @classmethod
+    def print_report(cls):
+        rows = cls.report()
+        loaded = sum(1 for r in rows if r["loaded"])
+        print(f"🧩 Generators: {len(rows)} declared, {loaded} loaded")
+        for r in rows:
+            state = "error" if r["error"] else ("loaded" if r["loaded"] else "lazy")
+            print(f"   {r['type']:<14} {state:<7} {r['target']}  [{r['source']}]")
@@ -0,0 +1,117 @@
+import math
+import re
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+# Réponses numériques acceptées : entier, décimal (point ou virgule) ou fraction a/b
+_DECIMAL = re.compile(r"[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)")
+_FRACTION = re.compile(r"([+-]?\d+)\s*/\s*([+-]?\d+)")
+
+# Plus grand dénominateur d'un rationnel retrouvé à partir d'un flottant (1/3 calculé 0.333…)
+MAX_DENOMINATOR = 1000
+# Écart toléré autour d'une réponse qui n'est pas un rationnel simple (racine carrée, pi...)
+APPROX_TOLERANCE = 1e-4
+
+
+def parse_rational(text: str) -> Optional[Fraction]:
+    """Valeur exacte de "3/6", "0.5" ou "0,5" ; None si le texte n'est pas un nombre."""
+    match = _FRACTION.fullmatch(text)
+    if match:
+        d = int(match.group(2))
+        return Fraction(int(match.group(1)), d) if d else None
+    if _DECIMAL.fullmatch(text):
+        return Fraction(text.replace(",", "."))
+    return None
+
+
+def rational_of(value: Fraction) -> Optional[Fraction]:
+    """Rationnel de dénominateur <= MAX_DENOMINATOR égal à value aux erreurs d'arrondi près ; None sinon."""
+    if value.denominator <= MAX_DENOMINATOR:
+        return value
+    close = value.limit_denominator(MAX_DENOMINATOR)
+    return close if abs(close - value) <= 1e-9 * max(1, abs(value)) else None
+
+
+class Grader:
+    """
+    Correction des exercices en une passe.
+
+    La réponse attendue est ramenée une fois, à la génération, à une clé
+    canonique sérialisable (elle fait l'aller-retour avec la page) :
+    - liste : {"items": [...], "ordered": bool}, triée pour un multiselect ;
+    - valeur : {"text": texte, "value": [n, d] ou None, "approx": flottant ou None}.
+    "value" est le rationnel irréductible exact, pris sur la valeur calculée
+    (value) plutôt que sur le texte affiché, qui peut être arrondi : 1/3 est
+    accepté pour une logique "{a} / {b}" affichée 0.33. Une valeur qui n'est
+    pas un rationnel simple est gardée en "approx", comparée à APPROX_TOLERANCE près.
+    À la correction, chaque réponse de l'élève n'est lue qu'une fois.
+    """
+
+    @staticmethod
+    def answer_key(answer: Any, ex_type: Optional[str] = None, value: Any = None) -> Optional[Dict[str, Any]]:
+        """Clé de la réponse affichée answer ; value est la valeur calculée avant arrondi, si connue."""
+        if answer is None:
+            return None
+        if isinstance(answer, list):
+            items = [str(x).strip() for x in answer]
+            # Texte à trous, glisser-déposer : l'ordre compte
+            ordered = ex_type != "multiselect"
+            return {"items": items if ordered else sorted(items), "ordered": ordered}
+        text = str(answer).strip()
+        if isinstance(value, (int, Fraction)) and not isinstance(value, bool):
+            number = rational = Fraction(value)
+        else:
+            if isinstance(value, float):
+                number = Fraction(value) if math.isfinite(value) else None
+            else:
+                # Réponse écrite : "0.3333" ou un flottant recopié est repris comme un calcul arrondi
+                number = parse_rational(text)
+            rational = rational_of(number) if number is not None else None
+        return {
+            "text": text,
+            "value": None if rational is None else [rational.numerator, rational.denominator],
+            "approx": float(number) if number is not None and rational is None else None,
+        }
+
+    @staticmethod
+    def attach(exercises: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Ajoute la clé de correction aux exercices qui n'en ont pas encore."""
+        for ex in exercises:
+            if "answer_key" not in ex:
+                ex["answer_key"] = Grader.answer_key(ex.get("answer"), ex.get("type"))
+        return exercises
+
+    @staticmethod
+    def check(user_val: Any, key: Optional[Dict[str, Any]]) -> bool:
+        if user_val is None or not key:
+            return False
+        if "items" in key:
+            if not isinstance(user_val, list) or len(user_val) != len(key["items"]):
+                return False
+            items = [str(x).strip() for x in user_val]
+            return (items if key["ordered"] else sorted(items)) == key["items"]
+        text = str(user_val).strip()
+        if text == key["text"]:
+            return True
+        if key["value"] is not None:
+            value = parse_rational(text)
+            return value is not None and [value.numerator, value.denominator] == list(key["value"])
+        if key.get("approx") is not None:
+            value = parse_rational(text)
+            return value is not None and abs(float(value) - key["approx"]) < APPROX_TOLERANCE
+        return False
+
+    @staticmethod
+    def grade(exercises: List[Dict[str, Any]], answers: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Corrige une soumission entière : {id: {"correct", "correct_answer"}}.
+        Un exercice sans clé (page antérieure) a sa clé calculée ici.
+        """
+        results = {}
+        for ex in exercises:
+            key = ex.get("answer_key")
+            if key is None:
+                key = Grader.answer_key(ex.get("answer"), ex.get("type"))
+            ex_id = ex.get("id")
+            results[ex_id] = {"correct": Grader.check(answers.get(ex_id), key), "correct_answer": ex.get("answer")}
+        return results
@@ -1,6 +1,6 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from sqlmodel import Session, select
@@ -9,16 +9,22 @@ from typing import List, Optional
 from src.database import create_db_and_tables, get_session
 from src.models import User, Subject, Course, SubjectProgress, SubmitRequest, RoadStep, RoadStepProgress, TestSubmitRequest, UserEvent, Event
 from src.content_manager import ContentManager
+from src.content_watcher import ContentWatcher
+from src.exercise_pool import ExercisePool, PoolRefiller
 from src.test_generator import TestGenerator
-from src.fraction_generator import FractionGenerator
+from src.blueprint_svg import BlueprintSVGCache, CACHE_CONTROL
+from src.grading import Grader
 from src.models import ExerciseLog, Exercise, ExerciseTemplate
-from src.generators import ExerciseFactory
+from src.generators import ExerciseFactory, GeneratorRegistry
 from src.exercise_engine import ExerciseEngine
+from src.rng import page_rng
 import re
 import time
-import random
 import os
 
+# Exercices d'une page du mode flash
+FLASH_DECK_SIZE = 15
+
 def check_global_events(user: User, session: Session) -> Optional[Event]:
     events = ContentManager.get_events()
     for event in events:
@@ -34,55 +40,42 @@ def check_global_events(user: User, session: Session) -> Optional[Event]:
 
 def smart_compare(user_val, correct_val, ex_type: Optional[str] = None):
     """
-    Compares two values handling strings vs lists, and fractions/floats.
+    Compare une réponse à la réponse attendue (listes, textes, nombres exacts).
+    Pour corriger une soumission entière, voir Grader.grade.
     """
-    if user_val is None or correct_val is None:
-        return False
-        
-    # 0. List comparison
-    if isinstance(user_val, list) and isinstance(correct_val, list):
-        if len(user_val) != len(correct_val):
-            return False
-            
-        u_list = [str(x).strip() for x in user_val]
-        c_list = [str(x).strip() for x in correct_val]
-        
-        if ex_type == "multiselect":
-            return sorted(u_list) == sorted(c_list)
-        else:
-            # For cloze (texte à trou) or drag_drop, order matters
-            return u_list == c_list
-
-    s_user = str(user_val).strip()
-    s_correct = str(correct_val).strip()
-    
-    # 1. Direct string match
-    if s_user == s_correct:
-        return True
-        
-    # 2. Numeric/Fraction match
-    try:
-        v1 = FractionGenerator.parse_fraction(s_user)
-        v2 = FractionGenerator.parse_fraction(s_correct)
-        
-        is_num_1 = any(c.isdigit() for c in s_user)
-        is_num_2 = any(c.isdigit() for c in s_correct)
-        
-        if is_num_1 and is_num_2:
-            return abs(v1 - v2) < 0.0001
-    except:
-        pass
-        
-    return False
+    return Grader.check(user_val, Grader.answer_key(correct_val, ex_type))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
     ContentManager.load_all()
+    # Générateurs déclarés (intégrés, entry points, config/generators.yaml) : importés au premier usage
+    GeneratorRegistry.discover()
+    GeneratorRegistry.print_report()
+    # Rechargement à chaud du contenu (désactivable avec CONTENT_HOT_RELOAD=0)
+    watcher = None
+    if os.environ.get("CONTENT_HOT_RELOAD", "1") != "0":
+        watcher = ContentWatcher()
+        watcher.start()
+    # Tampons d'exercices pré-générés (désactivables avec EXERCISE_POOL_SIZE=0)
+    refiller = PoolRefiller()
+    refiller.start()
     yield
+    refiller.stop()
+    if watcher:
+        watcher.stop()
 
 app = FastAPI(title="Parcours", lifespan=lifespan)
 
+@app.middleware("http")
+async def pin_content_generation(request: Request, call_next):
+    # Toute la requête voit la même génération de contenu, même si un rechargement a lieu
+    token = ContentManager.pin_generation()
+    try:
+        return await call_next(request)
+    finally:
+        ContentManager.unpin_generation(token)
+
 # Mount Static & Templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
@@ -132,6 +125,17 @@ def logout():
     response.delete_cookie("user_id")
     return response
 
+@app.get("/blueprints/{key}.svg")
+def blueprint_svg(key: str, request: Request):
+    # Contenu adressé par son hash : jamais modifié, mis en cache sans revalidation
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": f'"{key}"'}
+    if request.headers.get("if-none-match") == headers["ETag"] and BlueprintSVGCache.get(key) is not None:
+        return Response(status_code=304, headers=headers)
+    svg = BlueprintSVGCache.get(key)
+    if svg is None:
+        raise HTTPException(status_code=404, detail="Blueprint not found")
+    return Response(content=svg, media_type="image/svg+xml", headers=headers)
+
 @app.get("/dashboard", response_class=HTMLResponse)
 def dashboard(request: Request, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
     if not user:
@@ -192,12 +196,13 @@ def subject_page(subject_id: str, request: Request, session: Session = Depends(g
         "user": user,
         "subject": subject,
         "steps": steps,
+        "neighbours": ContentManager.get_step_neighbours,
         "completed_steps": completed_steps,
         "mastery_map": mastery_map
     })
 
 @app.get("/step/{step_id}", response_class=HTMLResponse)
-def step_page(step_id: str, request: Request, page_idx: int = 0, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+def step_page(step_id: str, request: Request, page_idx: int = 0, seed: Optional[int] = None, exercise_seeds: Optional[str] = None, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
     if not user:
         return RedirectResponse(url="/")
         
@@ -246,7 +251,7 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
                 return RedirectResponse(url=f"/step/{step_id}?page_idx={page_idx + 1}")
 
         # If we got here, render dialogue
-        next_url = f"/step/{step_id}?page_idx={page_idx + 1}" if step.pages and page_idx + 1 < len(step.pages) else f"/subjects/{step.subject_id}"
+        next_url = ContentManager.get_next_page_url(step, page_idx) or f"/subjects/{step.subject_id}"
         return templates.TemplateResponse("dialogue.html", {
             "request": request,
             "user": user,
@@ -258,6 +263,8 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
 
     # Rest of step logic (cours, practice, etc.)
     page_type = active_page.get("type", "cours")
+    # Graine de la page : ?seed=...&exercise_seeds=... régénère les mêmes exercices
+    page = page_rng(seed, exercise_seeds)
     
     if page_type == "cours":
         progress = session.exec(select(RoadStepProgress).where(
@@ -275,7 +282,7 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
                     ex_id = match.group(1)
                     template = ContentManager.get_template(ex_id)
                     if template:
-                        ex_data = ExerciseEngine.generate_exercise(template)
+                        ex_data = ExercisePool.take_template(template, 1, page)[0]
                         exercises.append(ex_data)
                         return f"&&{ex_data['id']}&&"
                     else:
@@ -288,10 +295,10 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
             "title": step.title,
             "subject_id": step.subject_id,
             "content_markdown": content,
-            "exercises": exercises
+            "exercises": BlueprintSVGCache.attach(Grader.attach(exercises))
         }
         
-        next_url = f"/step/{step_id}?page_idx={page_idx + 1}" if step.pages and page_idx + 1 < len(step.pages) else None
+        next_url = ContentManager.get_next_page_url(step, page_idx)
 
         return templates.TemplateResponse("unit.html", {
             "request": request,
@@ -300,34 +307,21 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
             "course": dummy_course,
             "user_progress": progress,
             "page_idx": page_idx,
-            "next_url": next_url
+            "next_url": next_url,
+            "seed": page.seed,
+            "exercise_seeds": page.exercise_seeds
         })
     else:
         # Practice, Exam, etc.
         exercises = []
-        selection = active_page.get("selection")
         
         if page_type in ["practice", "exam", "sequence", "validation", "flash"]:
-            if selection:
-                if isinstance(selection, list):
-                    for sel_item in selection:
-                        target = sel_item.get("target", [])
-                        count = sel_item.get("count", 5)
-                        diff = sel_item.get("difficulty")
-                        templates_list = ContentManager.select_templates(target, diff)
-                        if templates_list:
-                            for _ in range(count):
-                                t = random.choice(templates_list)
-                                exercises.append(ExerciseEngine.generate_exercise(t))
-                else:
-                    target = selection.get("target", [])
-                    count = selection.get("count", 10)
-                    diff = selection.get("difficulty")
-                    templates_list = ContentManager.select_templates(target, diff)
-                    if templates_list:
-                        for _ in range(count):
-                            t = random.choice(templates_list)
-                            exercises.append(ExerciseEngine.generate_exercise(t))
+            # Pools de candidats résolus au chargement du contenu, exercices pris dans les tampons
+            pools = ContentManager.get_selection_pools(step, page_idx)
+            for pool_idx, (templates_list, count) in enumerate(pools):
+                exercises.extend(ExercisePool.take_selection(
+                    step, page_idx if step.pages else None, pool_idx, templates_list, count, page
+                ))
         
         elif page_type == "reinforcement":
             from src.reinforcement_engine import ReinforcementEngine
@@ -335,10 +329,11 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
                 session, 
                 user.id, 
                 step.scope or step.subject_id, 
-                count=10
+                count=10,
+                page=page
             )
 
-        next_url = f"/step/{step_id}?page_idx={page_idx + 1}" if step.pages and page_idx + 1 < len(step.pages) else None
+        next_url = ContentManager.get_next_page_url(step, page_idx)
         
         template_name = "flash.html" if page_type == "flash" else "test.html"
         
@@ -347,9 +342,11 @@ def step_page(step_id: str, request: Request, page_idx: int = 0, session: Sessio
             "user": user,
             "step": step,
             "course": {"title": step.title, "subject_id": step.subject_id},
-            "exercises": exercises,
+            "exercises": BlueprintSVGCache.attach(Grader.attach(exercises)),
             "page_idx": page_idx,
-            "next_url": next_url
+            "next_url": next_url,
+            "seed": page.seed,
+            "exercise_seeds": page.exercise_seeds
         })
 
 @app.post("/submit_step")
@@ -415,16 +412,12 @@ def submit_test_step(submission: TestSubmitRequest, session: Session = Depends(g
     results = {}
     first_time = False
 
-    # 1. Evaluate Exercises
+    # 1. Evaluate Exercises (une passe, contre les clés canoniques calculées à la génération)
+    results = Grader.grade(submission.generated_exercises, submission.answers)
     for exercise in submission.generated_exercises:
         ex_id = exercise.get("id")
-        ex_type = exercise.get("type")
-        correct_val = exercise.get("answer")
-        user_val = submission.answers.get(ex_id)
-        
-        is_correct = smart_compare(user_val, correct_val, ex_type=ex_type)
-        results[ex_id] = { "correct": is_correct, "correct_answer": correct_val }
-        
+        is_correct = results[ex_id]["correct"]
+
         # Logging
         try:
              tag = exercise.get("tag", "unknown")
@@ -505,7 +498,7 @@ def submit_test_step(submission: TestSubmitRequest, session: Session = Depends(g
     }
 
 @app.get("/flash/{subject_id}", response_class=HTMLResponse)
-def flash_page(subject_id: str, request: Request, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+def flash_page(subject_id: str, request: Request, seed: Optional[int] = None, exercise_seeds: Optional[str] = None, difficulty: Optional[int] = None, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
     if not user:
         return RedirectResponse(url="/")
         
@@ -514,10 +507,16 @@ def flash_page(subject_id: str, request: Request, session: Session = Depends(get
         raise HTTPException(status_code=404, detail="Subject not found")
         
     # Generate Exercises (Flash Mode)
-    # Since we don't have courses in DB anymore, we use TestGenerator differently or provide specific logic
-    # For now, let's use a simplified approach for subject-wide flash
-    dummy_course = type('obj', (object,), {'generator_type': 'multiplication'})
-    exercises = TestGenerator.generate_step_exercises(dummy_course, "validation", count=15)
+    # Paquet du sujet précalculé pour la génération de contenu : seuls les tirages
+    # de variables sont faits ici (exercices pris dans les tampons des templates)
+    page = page_rng(seed, exercise_seeds)
+    deck = ContentManager.get_flash_deck(subject_id, difficulty)
+    if deck:
+        exercises = ExercisePool.take_from_templates(deck, FLASH_DECK_SIZE, page)
+    else:
+        # Sujet sans templates : ancien générateur de calcul
+        dummy_course = type('obj', (object,), {'generator_type': 'multiplication'})
+        exercises = TestGenerator.generate_step_exercises(dummy_course, "validation", count=FLASH_DECK_SIZE, rng=page.rng)
     
     flash_course = {
         "id": f"flash_{subject_id}",
@@ -536,7 +535,9 @@ def flash_page(subject_id: str, request: Request, session: Session = Depends(get
         "user": user,
         "course": flash_course,
         "step": flash_step,
-        "exercises": exercises
+        "exercises": BlueprintSVGCache.attach(Grader.attach(exercises)),
+        "seed": page.seed,
+        "exercise_seeds": page.exercise_seeds
     })
 
 @app.get("/event/{event_id}", response_class=HTMLResponse)
@@ -705,61 +706,12 @@ def debug_dashboard(request: Request, session: Session = Depends(get_session), u
              return RedirectResponse(url="/")
     
     users = session.exec(select(User)).all()
-    templates_dict = ContentManager.get_all_templates()
     subjects = ContentManager.get_all_subjects()
     
-    # Group templates by subject (based on prefix of ID or subject_id in templates)
-    grouped_templates = {}
-    for t_id, t in templates_dict.items():
-        # Try to find which subject this template belongs to
-        # In this codebase, templates are usually loaded within a subject folder
-        # We'll use a simple heuristic or just group them all
-        subject_id = "global"
-        # Heuristic: check if t_id starts with subject_id
-        for s_id in subjects.keys():
-            if t_id.startswith(s_id):
-                subject_id = s_id
-                break
-        
-        if subject_id not in grouped_templates:
-            grouped_templates[subject_id] = []
-        grouped_templates[subject_id].append(t)
-
-    # Dialogues: events + file scan
-    dialogue_list = []
-    
-    # 1. From Events
-    for e in ContentManager.get_events():
-        if e.type == "dialogue":
-             dialogue_list.append({
-                 "id": e.id,
-                 "name": f"Event: {e.id}",
-                 "path": e.content,
-                 "subject": "global",
-                 "type": "event"
-             })
-
-    # 2. From Filesystem (Ad-hoc)
-    for root, dirs, files in os.walk("content"):
-        for f in files:
-            if "dialogue" in f and f.endswith(".yaml"):
-                full_path = os.path.join(root, f)
-                rel_path = os.path.relpath(full_path, "content")
-                
-                # Guess subject
-                parts = rel_path.split(os.sep)
-                subject_id = parts[0] if len(parts) > 1 else "global"
-                if subject_id == "content": subject_id = "global"
-
-                # Check if already in list
-                if not any(d["path"] == rel_path or d["path"] == f for d in dialogue_list):
-                     dialogue_list.append({
-                         "id": f,
-                         "name": f,
-                         "path": rel_path,
-                         "subject": subject_id,
-                         "type": "file"
-                     })
+    # Templates groupés par sujet propriétaire, dialogues des événements et des fichiers :
+    # inventaires précalculés pour la génération de contenu courante
+    grouped_templates = ContentManager.get_templates_by_subject()
+    dialogue_list = ContentManager.get_dialogue_inventory()
 
     return templates.TemplateResponse("debug.html", {
         "request": request,
@@ -767,7 +719,9 @@ def debug_dashboard(request: Request, session: Session = Depends(get_session), u
         "users": users,
         "grouped_templates": grouped_templates,
         "subjects": subjects,
-        "dialogues": dialogue_list
+        "dialogues": dialogue_list,
+        "cache_stats": ContentManager.get_cache_stats() + [ExercisePool.stats(), BlueprintSVGCache.stats()],
+        "generators": GeneratorRegistry.report()
     })
 
 @app.get("/debug/view_dialogue", response_class=HTMLResponse)
@@ -795,7 +749,7 @@ def debug_view_dialogue(path: str, subject: str, request: Request, session: Sess
     })
 
 @app.get("/debug/test/{mode}/{template_id}", response_class=HTMLResponse)
-def debug_test_exercise(mode: str, template_id: str, request: Request, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+def debug_test_exercise(mode: str, template_id: str, request: Request, seed: Optional[int] = None, session: Session = Depends(get_session), user: User = Depends(get_current_user)):
     if not user:
         return RedirectResponse(url="/")
         
@@ -803,13 +757,10 @@ def debug_test_exercise(mode: str, template_id: str, request: Request, session:
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
         
-    exercises = [ExerciseEngine.generate_exercise(template) for _ in range(5)]
+    page = page_rng(seed)
+    exercises = ExerciseEngine.generate_batch(template, 5, page.rng)
     
-    subject_id = "debug"
-    for s_id in ContentManager.get_all_subjects().keys():
-        if template_id.startswith(s_id):
-            subject_id = s_id
-            break
+    subject_id = ContentManager.get_template_subject(template_id) or "debug"
 
     dummy_course = {
         "id": f"debug_{template_id}",
@@ -831,5 +782,6 @@ def debug_test_exercise(mode: str, template_id: str, request: Request, session:
         "user": user,
         "course": dummy_course,
         "step": dummy_step,
-        "exercises": exercises
+        "exercises": BlueprintSVGCache.attach(Grader.attach(exercises)),
+        "seed": page.seed
     })
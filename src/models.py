@@ -38,6 +38,8 @@ class ExerciseTemplate(SQLModel):
     vars: Dict[str, Any] = {}
     content: Dict[str, Any] = {}
     logic: Optional[str] = None
+    # Contraintes entre variables, ex: ["{a} > {b}", "{a} % {b} == 0", "result < 100"]
+    constraints: List[str] = []
     render_type: Optional[str] = None
     interaction: Optional[str] = "input"
     multiple: bool = False
@@ -0,0 +1,111 @@
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.models import ExerciseTemplate
+from src.template_compiler import CompiledExpr, CompiledTemplate, format_result
+from src.yaml_loader import load_yaml
+
+# Blueprints mémorisés par scénario : des paramètres identiques donnent le même blueprint
+BLUEPRINT_CACHE_SIZE = 1024
+
+
+class ProblemScenario:
+    """
+    Scénario de problème compilé une fois : énoncé segmenté, réponse et champs
+    du blueprint précompilés, variables tirées dans leur domaine réalisable.
+    """
+
+    def __init__(self, data: Dict[str, Any], source: str = ""):
+        self.id = str(data["id"])
+        self.category = str(data.get("category", "divers"))
+        self.source = source
+        # Même forme compilée qu'un template d'exercice : énoncé -> question, réponse -> logic
+        self.compiled = CompiledTemplate(ExerciseTemplate(
+            id=self.id,
+            vars=data.get("vars", {}),
+            content={"question": str(data["template"])},
+            logic=str(data["answer"]),
+            constraints=data.get("constraints", []),
+        ))
+        self.errors = list(self.compiled.errors)
+
+        numeric, sample = self.compiled.numeric, self.compiled.sample
+        label = f"<scénario {self.id}>"
+        # Champ du blueprint : expression ("{total} - {taken}") ou valeur littérale ("pizza", 500)
+        self.blueprint_fields: List[Tuple[str, Any]] = []
+        names = set()
+        for key, value in (data.get("blueprint") or {}).items():
+            if isinstance(value, str) and "{" in value:
+                expr = CompiledExpr(value, numeric, label)
+                expr.check(sample)
+                if expr.error:
+                    self.errors.append(expr.error)
+                names |= expr.names()
+                value = expr
+            self.blueprint_fields.append((key, value))
+        # Variables dont dépend le blueprint : clé du cache
+        self.blueprint_vars = tuple(sorted(names))
+        self._blueprints: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+
+    def blueprint(self, variables: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Blueprint des variables, partagé entre les exercices de mêmes paramètres (ne pas le modifier)."""
+        if not self.blueprint_fields:
+            return None
+        key = tuple(variables.get(name) for name in self.blueprint_vars)
+        blueprint = self._blueprints.get(key)
+        if blueprint is None:
+            blueprint = {}
+            for field, value in self.blueprint_fields:
+                if isinstance(value, CompiledExpr):
+                    value = value.evaluate(variables)
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                blueprint[field] = value
+            if len(self._blueprints) >= BLUEPRINT_CACHE_SIZE:
+                self._blueprints.clear()
+            self._blueprints[key] = blueprint
+        return blueprint
+
+    def generate(self, rng: random.Random) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        """(énoncé, réponse, blueprint) d'une instance du scénario."""
+        variables = self.compiled.sampler.sample(rng)
+        question = self.compiled.content["question"].render(variables)
+        try:
+            answer = format_result(self.compiled.logic.evaluate(variables))
+        except Exception as e:
+            print(f"❌ Erreur évaluation réponse du scénario '{self.id}': {e}")
+            answer = "ERROR"
+        return question, answer, self.blueprint(variables)
+
+
+def parse_scenario_file(path: str) -> List[ProblemScenario]:
+    """Scénarios compilés d'un fichier YAML (clé 'scenarios')."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = load_yaml(f)
+    scenarios = []
+    for entry in (data or {}).get("scenarios", []):
+        try:
+            scenario = ProblemScenario(entry, path)
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"❌ Scénario invalide dans {path} ({entry.get('id') if isinstance(entry, dict) else entry}): {e}")
+            continue
+        for error in scenario.errors:
+            print(f"❌ Scénario {scenario.id}: {error}")
+        scenarios.append(scenario)
+    return scenarios
+
+
+class ScenarioCatalog:
+    """Scénarios de tous les fichiers du contenu, indexés par catégorie."""
+
+    def __init__(self, files: Sequence[List[ProblemScenario]] = ()):
+        # Identité des listes compilées : le catalogue n'est reconstruit que si un fichier a changé
+        # (les listes sont gardées pour que leurs id ne puissent pas être réutilisés)
+        self.files = tuple(files)
+        self.key = tuple(id(scenarios) for scenarios in self.files)
+        self.scenarios: List[ProblemScenario] = [s for scenarios in files for s in scenarios]
+        self.by_category: Dict[str, List[ProblemScenario]] = {}
+        for scenario in self.scenarios:
+            self.by_category.setdefault(scenario.category, []).append(scenario)
+
+    def categories(self) -> List[str]:
+        return list(self.by_category)
@@ -1,20 +1,24 @@
 from sqlmodel import Session, select, func
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from src.models import ExerciseLog, ExerciseTemplate
 from src.content_manager import ContentManager
-from src.exercise_engine import ExerciseEngine
+from src.exercise_pool import ExercisePool
+from src.rng import PageRNG, get_rng
 import random
 
 class ReinforcementEngine:
     @staticmethod
-    def generate_reinforcement_exercises(session: Session, user_id: int, scope_tag: str, count: int = 10) -> List[Dict[str, Any]]:
+    def generate_reinforcement_exercises(session: Session, user_id: int, scope_tag: str, count: int = 10,
+                                          page: Optional[PageRNG] = None) -> List[Dict[str, Any]]:
         """
         Génère une série d'exercices de renforcement basée sur le profil utilisateur.
         Règle des 60/20/20 :
         - 60% sur les points faibles (taux de réussite faible)
         - 20% d'exercices faciles (difficulté 1)
         - 20% de théorie (ici, des exercices simples ou rappels si on avait le format)
+        page : RNG de la page et graines de rejeu (voir ExercisePool).
         """
+        rng = page.rng if page is not None else get_rng()
         
         # 1. Analyse du profil : récupérer les logs pour les tags commençant par scope_tag
         logs = session.exec(select(ExerciseLog).where(
@@ -45,25 +49,26 @@ class ReinforcementEngine:
         # - 60% Points Faibles
         nb_weak = int(count * 0.6)
         if weak_tags:
+            picks = []
             for _ in range(nb_weak):
-                tag = random.choice(weak_tags)
+                tag = rng.choice(weak_tags)
                 templates = ContentManager.select_templates([tag])
                 if templates:
-                    exercises.append(ExerciseEngine.generate_exercise(random.choice(templates)))
+                    picks.append(rng.choice(templates))
+            # Exercices d'un même template pris ensemble : instances distinctes
+            exercises.extend(ExercisePool.take_picks(picks, page))
         
         # - 20% Faciles (Motivation)
         nb_easy = int(count * 0.2)
         easy_templates = ContentManager.select_templates([scope_tag], difficulty=1)
         if easy_templates:
-            for _ in range(nb_easy):
-                exercises.append(ExerciseEngine.generate_exercise(random.choice(easy_templates)))
+            exercises.extend(ExercisePool.take_from_templates(easy_templates, nb_easy, page))
                 
         # - 20% Remplissage / Rappels (on complète jusqu'à 'count')
         remaining = count - len(exercises)
         all_templates = ContentManager.select_templates([scope_tag])
         if all_templates:
-            for _ in range(remaining):
-                exercises.append(ExerciseEngine.generate_exercise(random.choice(all_templates)))
+            exercises.extend(ExercisePool.take_from_templates(all_templates, remaining, page))
                 
-        random.shuffle(exercises)
+        rng.shuffle(exercises)
         return exercises
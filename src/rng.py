@@ -0,0 +1,85 @@
+import random
+import secrets
+import itertools
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel (voir ExerciseEngine.generate_batch)
+    np = None
+
+# RNG par thread pour les appels sans RNG explicite : pas d'état partagé entre requêtes
+_thread_rng = threading.local()
+
+
+def get_rng(rng: Optional[random.Random] = None) -> random.Random:
+    """RNG explicite de l'appelant, sinon celui du thread courant."""
+    if rng is not None:
+        return rng
+    local = getattr(_thread_rng, "rng", None)
+    if local is None:
+        local = _thread_rng.rng = random.Random()
+    return local
+
+
+def numpy_rng(rng: Optional[random.Random] = None):
+    """Generator NumPy dérivé d'un RNG : même graine, mêmes tirages."""
+    return np.random.default_rng(get_rng(rng).getrandbits(64))
+
+
+def distinct_indices(size: int, count: int, rng: Optional[random.Random] = None) -> List[int]:
+    """
+    count indices de range(size) sans remise : début d'une permutation aléatoire
+    (Fisher-Yates paresseux, O(count) quelle que soit la taille, sans boucle de rejet).
+    Au-delà de size, une nouvelle permutation commence : chaque valeur sort une
+    fois avant qu'une autre ne se répète.
+    """
+    rng = get_rng(rng)
+    indices: List[int] = []
+    while size > 0 and len(indices) < count:
+        swapped = {}
+        for i in range(min(size, count - len(indices))):
+            j = rng.randrange(i, size)
+            indices.append(swapped.get(j, j))
+            swapped[j] = swapped.get(i, i)
+    return indices
+
+
+# Compteur d'identifiants d'exercices du processus (next() est atomique sous le GIL)
+_exercise_ids = itertools.count(1)
+
+
+def exercise_id(prefix: str) -> str:
+    """Identifiant unique dans le processus : deux exercices d'une même page ne se confondent pas."""
+    return f"{prefix}_{next(_exercise_ids)}"
+
+
+def new_seed() -> int:
+    return secrets.randbits(32)
+
+
+class PageRNG(NamedTuple):
+    """RNG d'une page générée, avec la graine qui permet de la rejouer."""
+    seed: int
+    rng: random.Random
+    # Graine imposée par l'appelant (?seed=...) : la page est régénérée à l'identique
+    replay: bool
+    # Graines des exercices pris dans les tampons, dans l'ordre des prises (voir ExercisePool)
+    exercise_seeds: List[str]
+    # Graines d'exercices imposées (?exercise_seeds=...), consommées dans le même ordre
+    replay_seeds: Optional[Deque[str]]
+    # Lots régénérés pendant le rejeu, partagés par les exercices d'un même lot
+    replay_batches: Dict[Any, List[Dict[str, Any]]]
+
+
+def page_rng(seed: Optional[int] = None, exercise_seeds: Optional[str] = None) -> PageRNG:
+    """RNG d'une page ; exercise_seeds ("a,b,c") rejoue aussi les exercices servis par les tampons."""
+    replay = seed is not None
+    if seed is None:
+        seed = new_seed()
+    replay_seeds = None
+    if replay and exercise_seeds:
+        replay_seeds = deque(s for s in exercise_seeds.split(",") if s)
+    return PageRNG(seed, random.Random(seed), replay, [], replay_seeds, {})
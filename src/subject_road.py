@@ -0,0 +1,107 @@
+from bisect import bisect_right
+from collections.abc import Sequence
+from typing import Any, Iterator, List, Optional, Tuple
+from src.models import RoadStep
+
+
+def substitute_index(value: Any, index: int) -> Any:
+    """Remplace {index} dans toutes les chaînes d'une structure dict/list."""
+    if isinstance(value, str):
+        return value.replace("{index}", str(index))
+    if isinstance(value, dict):
+        return {k: substitute_index(v, index) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute_index(v, index) for v in value]
+    return value
+
+
+def expand_sequence_step(sequence: RoadStep, index: int) -> RoadStep:
+    """Construit la k-ième étape (à partir de 1) d'une étape de type 'sequence'."""
+    step_config = sequence.step_config or {}
+    selection = None
+    if "selection" in step_config:
+        selection = substitute_index(step_config["selection"], index)
+
+    return RoadStep(
+        id=f"{sequence.id}_{index}",
+        title=sequence.title.replace("{index}", str(index)),
+        type=step_config.get("type", "practice"),
+        order=sequence.order + index - 1,
+        subject_id=sequence.subject_id,
+        selection=selection,
+        activated=sequence.activated,
+        pages=step_config.get("pages", [])
+    )
+
+
+class SubjectRoad(Sequence):
+    """
+    Étapes ordonnées de la route d'un sujet.
+
+    Une étape 'sequence' (repeat: N) est gardée sous forme d'un unique
+    descripteur et ses N étapes ne sont construites qu'à la demande, lors
+    d'un accès par position, par identifiant ou d'une itération.
+    """
+
+    def __init__(self, entries: List[RoadStep]):
+        self.entries = entries
+        # Position globale de la première étape de chaque entrée
+        self._offsets: List[int] = []
+        self._entry_index = {}
+        total = 0
+        for i, entry in enumerate(entries):
+            self._offsets.append(total)
+            self._entry_index[entry.id] = i
+            total += self._width(entry)
+        self._length = total
+
+    @staticmethod
+    def _width(entry: RoadStep) -> int:
+        if entry.type == "sequence":
+            return max(0, entry.repeat or 0)
+        return 1
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[i] for i in range(*pos.indices(self._length))]
+        if pos < 0:
+            pos += self._length
+        if not 0 <= pos < self._length:
+            raise IndexError("road step index out of range")
+        # Une séquence vide partage son offset avec l'entrée suivante :
+        # bisect_right retient bien la dernière entrée, non vide.
+        i = bisect_right(self._offsets, pos) - 1
+        entry = self.entries[i]
+        if entry.type == "sequence":
+            return expand_sequence_step(entry, pos - self._offsets[i] + 1)
+        return entry
+
+    def __iter__(self) -> Iterator[RoadStep]:
+        for entry in self.entries:
+            if entry.type == "sequence":
+                for k in range(1, (entry.repeat or 0) + 1):
+                    yield expand_sequence_step(entry, k)
+            else:
+                yield entry
+
+    def entry_ids(self) -> List[str]:
+        return list(self._entry_index)
+
+    def find(self, step_id: str) -> Optional[Tuple[int, RoadStep]]:
+        """Retourne (position, étape) pour un identifiant d'étape, séquences comprises."""
+        i = self._entry_index.get(step_id)
+        if i is not None and self.entries[i].type != "sequence":
+            return self._offsets[i], self.entries[i]
+
+        base, _, suffix = step_id.rpartition("_")
+        i = self._entry_index.get(base)
+        if i is None or not suffix.isdigit():
+            return None
+        entry = self.entries[i]
+        k = int(suffix)
+        if entry.type != "sequence" or not 1 <= k <= (entry.repeat or 0) or str(k) != suffix:
+            return None
+        return self._offsets[i] + k - 1, expand_sequence_step(entry, k)
@@ -0,0 +1,380 @@
+import ast
+import re
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from src.models import ExerciseTemplate
+from src.variable_sampler import Enumeration, VariableSampler
+
+# Expressions évaluées dans les textes : [[ expr ]]
+EXPR_PATTERN = re.compile(r"\[\[(.+?)\]\]")
+
+_FORMATTER = string.Formatter()
+_SAFE_GLOBALS = {"__builtins__": {}}
+
+
+class TemplateCompileError(ValueError):
+    pass
+
+
+def format_result(value: Any) -> str:
+    """Rendu d'un résultat [[ expr ]] : entier si possible, sinon 2 décimales."""
+    if isinstance(value, float):
+        return str(int(value) if value.is_integer() else round(value, 2))
+    return str(value)
+
+
+def _check_ast(source: str):
+    """Refuse les accès aux attributs privés (ex: ().__class__), seule porte de sortie d'eval sans builtins."""
+    for node in ast.walk(ast.parse(source, mode="eval")):
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise TemplateCompileError(f"attribut interdit: {node.attr}")
+
+
+@lru_cache(maxsize=4096)
+def _compile_source(source: str, label: str = "<expr>"):
+    _check_ast(source)
+    return compile(source, label, "eval")
+
+
+def _plain_fields(text: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+    """
+    Découpe un texte en (littéral, nom de variable) si tous les champs sont de
+    simples {nom}. Retourne None si le texte utilise une syntaxe plus riche.
+    """
+    try:
+        parsed = list(_FORMATTER.parse(text))
+    except ValueError:
+        return None
+    result = []
+    for literal, field, spec, conversion in parsed:
+        if field is not None and (not field.isidentifier() or spec or conversion):
+            return None
+        result.append((literal, field))
+    return result
+
+
+class CompiledExpr:
+    """
+    Expression d'un template ([[ expr ]] ou logic), compilée une seule fois.
+
+    Les {var} dont toutes les valeurs possibles sont numériques deviennent des
+    références directes à la variable. Sinon ({op} valant "+" ou "-" par exemple)
+    le texte est substitué à l'exécution, et le code compilé mis en cache.
+    """
+
+    def __init__(self, raw: str, numeric_vars: Optional[Set[str]] = None, label: str = "<expr>"):
+        self.raw = raw
+        self.label = label
+        self.code = None
+        self.source: Optional[str] = None
+        self.error: Optional[str] = None
+        self._names: Optional[Set[str]] = None
+
+        fields = _plain_fields(raw)
+        if numeric_vars is not None and fields is not None and all(
+            field is None or field in numeric_vars for _, field in fields
+        ):
+            source = "".join(literal + (f"({field})" if field else "") for literal, field in fields)
+            try:
+                self.code = _compile_source(source.strip(), label)
+                self.source = source.strip()
+            except (SyntaxError, TemplateCompileError) as e:
+                self.error = f"expression invalide {raw!r}: {e}"
+
+    def names(self) -> Set[str]:
+        """Variables référencées : champs {var} et, si compilée, noms de l'expression."""
+        if self._names is None:
+            fields = _plain_fields(self.raw) or []
+            names = {field for _, field in fields if field}
+            if self.source is not None:
+                names.update(
+                    node.id for node in ast.walk(ast.parse(self.source, mode="eval"))
+                    if isinstance(node, ast.Name)
+                )
+            self._names = names
+        return self._names
+
+    def magnitude_bound(self, bounds: Dict[str, int]) -> Optional[float]:
+        """
+        Majorant de la valeur absolue du résultat et des calculs intermédiaires,
+        à partir des majorants des variables. None si l'expression n'est pas
+        purement arithmétique (seul cas où l'évaluer en colonnes est sûr).
+        """
+        if self.source is None:
+            return None
+        return _magnitude_bound(ast.parse(self.source, mode="eval").body, bounds)
+
+    def check(self, sample: Dict[str, Any]):
+        """Vérifie la syntaxe d'une expression textuelle avec des valeurs d'exemple."""
+        if self.code is not None or self.error is not None:
+            return
+        try:
+            _compile_source(self.raw.format(**sample).strip(), self.label)
+        except (SyntaxError, TemplateCompileError) as e:
+            self.error = f"expression invalide {self.raw!r}: {e}"
+        except Exception:
+            # Formatage impossible avec l'exemple : l'erreur éventuelle restera à l'exécution
+            pass
+
+    def evaluate(self, variables: Dict[str, Any]) -> Any:
+        if self.error is not None:
+            raise TemplateCompileError(self.error)
+        code = self.code
+        if code is None:
+            code = _compile_source(self.raw.format(**variables).strip(), self.label)
+        return eval(code, _SAFE_GLOBALS, variables)
+
+
+# Majorant de |a op b| connaissant |a| <= x et |b| <= y (diviseurs entiers non nuls : |b| >= 1)
+_BOUND_OPS = {
+    ast.Add: lambda x, y: x + y,
+    ast.Sub: lambda x, y: x + y,
+    ast.Mult: lambda x, y: x * y,
+    ast.Div: lambda x, y: x,
+    ast.FloorDiv: lambda x, y: x,
+    ast.Mod: lambda x, y: max(x, y),
+}
+
+
+def _magnitude_bound(node: ast.AST, bounds: Dict[str, int]) -> Optional[float]:
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return abs(node.value)
+        return None
+    if isinstance(node, ast.Name):
+        return bounds.get(node.id)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        return _magnitude_bound(node.operand, bounds)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BOUND_OPS:
+        left = _magnitude_bound(node.left, bounds)
+        right = _magnitude_bound(node.right, bounds)
+        if left is None or right is None:
+            return None
+        return _BOUND_OPS[type(node.op)](left, right)
+    return None
+
+
+class CompiledText:
+    """
+    Texte d'un template découpé en segments : littéraux, emplacements {var}
+    et expressions [[ ]]. Le rendu ne fait plus que remplir les emplacements.
+    """
+
+    def __init__(self, text: str, numeric_vars: Optional[Set[str]] = None, label: str = "<text>"):
+        self.text = text
+        pieces = EXPR_PATTERN.split(text)
+        self.raw_pieces: List[str] = pieces[0::2]
+        self.exprs: List[CompiledExpr] = [CompiledExpr(p, numeric_vars, label) for p in pieces[1::2]]
+
+        # Segments du texte formaté : str (littéral), ("var", nom), ("field", champ, spec, conversion)
+        # ou int (indice du résultat d'expression). None si .format échoue toujours.
+        self.segments: Optional[List[Union[str, int, tuple]]] = []
+        self.has_slots = False
+        try:
+            for i, piece in enumerate(self.raw_pieces):
+                for literal, field, spec, conversion in _FORMATTER.parse(piece):
+                    if literal:
+                        self.segments.append(literal)
+                    if field is None:
+                        continue
+                    if field == "" or field[0].isdigit():
+                        # Champ positionnel : .format(**variables) échouerait toujours
+                        raise ValueError(field)
+                    self.has_slots = True
+                    if field.isidentifier() and not spec and not conversion:
+                        self.segments.append(("var", field))
+                    else:
+                        self.segments.append(("field", field, spec, conversion))
+                if i < len(self.exprs):
+                    self.segments.append(i)
+        except ValueError:
+            self.segments = None
+
+        self.is_constant = not self.exprs and not self.has_slots
+
+    def _processed(self, results: List[str]) -> str:
+        # Texte après évaluation des [[ ]] mais sans formatage des {var}
+        out = []
+        for i, piece in enumerate(self.raw_pieces):
+            out.append(piece)
+            if i < len(results):
+                out.append(results[i])
+        return "".join(out)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        if self.is_constant:
+            # Équivalent de text.format() sans champ : seuls les {{ }} sont dédoublés
+            return "".join(s for s in self.segments) if self.segments is not None else self.text
+
+        results = []
+        for expr in self.exprs:
+            try:
+                results.append(format_result(expr.evaluate(variables)))
+            except Exception:
+                results.append(f"ERR({expr.raw})")
+
+        if self.segments is None:
+            return self._processed(results)
+        try:
+            out = []
+            for seg in self.segments:
+                if isinstance(seg, str):
+                    out.append(seg)
+                elif isinstance(seg, int):
+                    out.append(results[seg])
+                elif seg[0] == "var":
+                    out.append(format(variables[seg[1]]))
+                else:
+                    _, field, spec, conversion = seg
+                    obj, _ = _FORMATTER.get_field(field, (), variables)
+                    obj = _FORMATTER.convert_field(obj, conversion)
+                    out.append(format(obj, spec.format(**variables) if "{" in spec else spec))
+            return "".join(out)
+        except Exception:
+            return self._processed(results)
+
+
+def _var_domain(config: Any) -> List[Any]:
+    if isinstance(config, list):
+        return config
+    if isinstance(config, dict):
+        # Une borne peut dépendre des variables précédentes ("{total} - 1") : la variable reste numérique
+        return [b for b in (config.get("min", 0), config.get("max", 10)) if not isinstance(b, str)] or [0]
+    return [config]
+
+
+def bound_exprs(template_vars: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """Bornes min/max données par une expression des variables précédentes, par (variable, borne)."""
+    return {
+        (name, key): config[key]
+        for name, config in template_vars.items() if isinstance(config, dict)
+        for key in ("min", "max") if isinstance(config.get(key), str)
+    }
+
+
+def numeric_vars(template_vars: Dict[str, Any]) -> Set[str]:
+    """Variables dont toutes les valeurs possibles sont des nombres."""
+    numeric = set()
+    for name, config in template_vars.items():
+        domain = _var_domain(config)
+        if domain and all(isinstance(v, (int, float)) for v in domain):
+            numeric.add(name)
+    return numeric
+
+
+def numeric_bounds(template_vars: Dict[str, Any]) -> Dict[str, int]:
+    """Majorant de |valeur| des variables numériques (booléens exclus)."""
+    bounds = {}
+    dependent = {name for name, _ in bound_exprs(template_vars)}
+    for name, config in template_vars.items():
+        if name in dependent:
+            continue
+        domain = _var_domain(config)
+        if domain and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in domain):
+            bounds[name] = max(abs(v) for v in domain)
+    return bounds
+
+
+class CompiledTemplate:
+    """Forme compilée d'un ExerciseTemplate : contenu segmenté et logique précompilée."""
+
+    def __init__(self, template: ExerciseTemplate, domains: Optional[Dict[Tuple[str, ...], Enumeration]] = None):
+        self.template = template
+        # Variables numériques et affectation d'exemple (vérification des expressions au chargement)
+        self.numeric = numeric = numeric_vars(template.vars)
+        self.sample = sample = {name: _var_domain(config)[0] for name, config in template.vars.items() if _var_domain(config)}
+        label = f"<template {template.id}>"
+
+        self.content: Dict[str, Any] = {}
+        for key, value in template.content.items():
+            if isinstance(value, str):
+                self.content[key] = CompiledText(value, numeric, label)
+            elif isinstance(value, list):
+                self.content[key] = [CompiledText(v, numeric, label) if isinstance(v, str) else v for v in value]
+            else:
+                self.content[key] = value
+
+        # Priority: template.logic > content.logic
+        raw_logic = template.logic or template.content.get("logic")
+        self.logic: Optional[CompiledExpr] = CompiledExpr(str(raw_logic), numeric, label) if raw_logic else None
+
+        # Évaluation de la logique en colonnes (ExerciseEngine.generate_batch) : uniquement
+        # pour une expression arithmétique qui ne peut pas dépasser la capacité d'un int64
+        self.vector_vars = numeric_bounds(template.vars)
+        bound = self.logic.magnitude_bound(self.vector_vars) if self.logic else None
+        self.logic_vectorizable = bound is not None and bound < 2 ** 62
+
+        # Contraintes entre variables : "result" désigne la valeur de la logique
+        self.constraints = [
+            CompiledExpr(str(c), numeric | {"result"}, label) for c in template.constraints
+        ]
+
+        # Bornes dépendantes (ex: max: "{total} - 1") : tirage séquentiel, dans l'ordre des variables
+        self.bounds = {
+            key: CompiledExpr(str(raw), numeric, label) for key, raw in bound_exprs(template.vars).items()
+        }
+
+        self.errors: List[str] = []
+        for expr in self._exprs() + self.constraints + list(self.bounds.values()):
+            expr.check(sample)
+            if expr.error:
+                self.errors.append(expr.error)
+
+        # Domaine réalisable des variables, calculé une fois par template (ou repris du snapshot)
+        self.sampler = VariableSampler(
+            template.vars, [c for c in self.constraints if not c.error], self.logic, domains,
+            {key: expr for key, expr in self.bounds.items() if not expr.error}
+        )
+        self.errors.extend(self.sampler.errors)
+
+    def _exprs(self) -> List[CompiledExpr]:
+        exprs = [self.logic] if self.logic else []
+        for value in self.content.values():
+            items = value if isinstance(value, list) else [value]
+            for item in items:
+                if isinstance(item, CompiledText):
+                    exprs.extend(item.exprs)
+        return exprs
+
+    def render_content(self, variables: Dict[str, Any]) -> Dict[str, Any]:
+        content = {}
+        for key, value in self.content.items():
+            if isinstance(value, CompiledText):
+                content[key] = value.render(variables)
+            elif isinstance(value, list):
+                content[key] = [v.render(variables) if isinstance(v, CompiledText) else v for v in value]
+            else:
+                content[key] = value
+        return content
+
+
+# Templates compilés hors d'une génération de contenu (tests, templates construits à la volée)
+_ADHOC_MAX = 256
+_adhoc: "OrderedDict[int, CompiledTemplate]" = OrderedDict()
+_adhoc_lock = threading.Lock()
+
+
+def compile_template(template: ExerciseTemplate) -> CompiledTemplate:
+    """Compile un template hors génération, avec un petit cache par instance."""
+    key = id(template)
+    with _adhoc_lock:
+        compiled = _adhoc.get(key)
+        # La référence gardée dans CompiledTemplate empêche la réutilisation de l'id
+        if compiled is not None and compiled.template is template:
+            _adhoc.move_to_end(key)
+            return compiled
+    compiled = CompiledTemplate(template)
+    with _adhoc_lock:
+        _adhoc[key] = compiled
+        while len(_adhoc) > _ADHOC_MAX:
+            _adhoc.popitem(last=False)
+    return compiled
+
+
+@lru_cache(maxsize=1024)
+def compile_text(text: str) -> CompiledText:
+    """Texte compilé pour ExerciseEngine.interpolate (domaine des variables inconnu)."""
+    return CompiledText(text)
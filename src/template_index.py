@@ -0,0 +1,103 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Any
+from src.models import ExerciseTemplate
+
+# Pool de templates candidats et nombre d'exercices à tirer dedans
+SelectionPool = Tuple[Tuple[ExerciseTemplate, ...], int]
+
+
+class TemplateIndex:
+    """
+    Index inversé des templates d'une génération de contenu.
+
+    - Les tags sont internés en entiers.
+    - Chaque tag pointe vers l'ensemble des positions des templates qui le portent.
+    - Les templates sont aussi regroupés par difficulté et par sujet propriétaire.
+    - Les intersections déjà calculées sont mémorisées.
+    """
+
+    MAX_CACHED_QUERIES = 4096
+
+    def __init__(self, templates: Iterable[ExerciseTemplate], subjects: Optional[Dict[str, str]] = None):
+        self._templates: List[ExerciseTemplate] = list(templates)
+        self._all: Tuple[ExerciseTemplate, ...] = tuple(self._templates)
+        self._tag_ids: Dict[str, int] = {}
+        postings: List[set] = []
+        by_difficulty: Dict[Any, set] = {}
+        by_subject: Dict[str, set] = {}
+
+        for pos, t in enumerate(self._templates):
+            for tag in t.tags:
+                tag_id = self._tag_ids.get(tag)
+                if tag_id is None:
+                    tag_id = self._tag_ids[tag] = len(postings)
+                    postings.append(set())
+                postings[tag_id].add(pos)
+            by_difficulty.setdefault(t.difficulty, set()).add(pos)
+            if subjects is not None:
+                by_subject.setdefault(subjects.get(t.id, "global"), set()).add(pos)
+
+        self._postings: List[FrozenSet[int]] = [frozenset(p) for p in postings]
+        self._by_difficulty: Dict[Any, FrozenSet[int]] = {d: frozenset(p) for d, p in by_difficulty.items()}
+        self._by_subject: Dict[str, FrozenSet[int]] = {s: frozenset(p) for s, p in by_subject.items()}
+        self._cache: Dict[Tuple[FrozenSet[int], Any, Optional[str]], Tuple[ExerciseTemplate, ...]] = {}
+
+    def tag_id(self, tag: str) -> Optional[int]:
+        return self._tag_ids.get(tag)
+
+    def difficulties(self) -> List[Any]:
+        return list(self._by_difficulty)
+
+    def select(
+        self, target_tags: List[str], difficulty: Optional[int] = None, subject: Optional[str] = None
+    ) -> Tuple[ExerciseTemplate, ...]:
+        """
+        Templates portant tous les tags demandés (et la difficulté, le sujet
+        propriétaire si fournis), dans leur ordre de chargement.
+        """
+        tag_ids = []
+        for tag in target_tags:
+            tag_id = self._tag_ids.get(tag)
+            if tag_id is None:
+                return ()
+            tag_ids.append(tag_id)
+
+        key = (frozenset(tag_ids), difficulty, subject)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        if not tag_ids and difficulty is None and subject is None:
+            result = self._all
+        else:
+            # On part de la plus petite liste pour limiter le coût de l'intersection
+            sets = sorted((self._postings[i] for i in key[0]), key=len)
+            if difficulty is not None:
+                sets.insert(0, self._by_difficulty.get(difficulty, frozenset()))
+            if subject is not None:
+                sets.insert(0, self._by_subject.get(subject, frozenset()))
+            positions = sets[0].intersection(*sets[1:]) if sets else frozenset()
+            result = tuple(self._templates[pos] for pos in sorted(positions))
+
+        if len(self._cache) < self.MAX_CACHED_QUERIES:
+            self._cache[key] = result
+        return result
+
+    def resolve_selection(self, selection: Any) -> List[SelectionPool]:
+        """
+        Transforme la 'selection' d'une page (dict ou liste de dicts) en pools
+        prêts à l'emploi. Les valeurs par défaut de count sont celles des pages :
+        10 pour une sélection simple, 5 par élément d'une liste.
+        """
+        if not selection:
+            return []
+        if isinstance(selection, list):
+            items = [(sel_item, 5) for sel_item in selection]
+        else:
+            items = [(selection, 10)]
+
+        pools: List[SelectionPool] = []
+        for sel_item, default_count in items:
+            candidates = self.select(sel_item.get("target", []), sel_item.get("difficulty"))
+            if candidates:
+                pools.append((candidates, sel_item.get("count", default_count)))
+        return pools
@@ -1,14 +1,18 @@
 import random
-import math
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from src.models import Course
+from src.rng import distinct_indices, exercise_id, get_rng, numpy_rng
+from src.generators.arithmetic import VECTOR_MIN, arithmetic_problems, np
 
 class TestGenerator:
     @staticmethod
-    def generate_step_exercises(course: Any, step_type: str, count: int = 10) -> List[Dict[str, Any]]:
+    def generate_step_exercises(
+        course: Any, step_type: str, count: int = 10, rng: Optional[random.Random] = None
+    ) -> List[Dict[str, Any]]:
         """
         Génère des exercices pour une étape spécifique d'un cours.
         """
+        rng = get_rng(rng)
         if isinstance(course, dict):
             gen_type = course.get("generator_type", "multiplication")
         else:
@@ -27,32 +31,33 @@ class TestGenerator:
         elif step_type.startswith("flash_table_"):
             try:
                 table_n = int(step_type.split("_")[-1])
-                return TestGenerator.generate_multiplication_table(table_n, count)
+                return TestGenerator.generate_multiplication_table(table_n, count, rng)
             except:
                 pass
 
         # Dispatch vers le bon générateur
         if not gen_type:
-            return [TestGenerator.generate_lorem_exercise() for _ in range(count)]
+            return [TestGenerator.generate_lorem_exercise(rng) for _ in range(count)]
             
         if gen_type == "addition":
-            return MathGenerator.generate(count, "addition", difficulty)
+            return MathGenerator.generate(count, "addition", difficulty, rng)
         elif gen_type == "soustraction":
-            return MathGenerator.generate(count, "soustraction", difficulty)
+            return MathGenerator.generate(count, "soustraction", difficulty, rng)
         elif gen_type == "multiplication":
-            return MathGenerator.generate(count, "multiplication", difficulty)
+            return MathGenerator.generate(count, "multiplication", difficulty, rng)
         elif gen_type == "division":
-            return MathGenerator.generate(count, "division", difficulty)
+            return MathGenerator.generate(count, "division", difficulty, rng)
         elif "fraction" in gen_type:
-            return FractionTestGenerator.generate(count, gen_type, difficulty)
+            return FractionTestGenerator.generate(count, gen_type, difficulty, rng)
         else:
             # Fallback
-            return [TestGenerator.generate_lorem_exercise() for _ in range(count)]
+            return [TestGenerator.generate_lorem_exercise(rng) for _ in range(count)]
 
     @staticmethod
-    def generate_lorem_exercise() -> Dict[str, Any]:
+    def generate_lorem_exercise(rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        rng = get_rng(rng)
         return {
-            "id": f"lorem_{random.randint(1000, 9999)}",
+            "id": exercise_id("lorem"),
             "type": "qcm",
             "question": "Question de test dynamique ?",
             "options": ["Réponse A", "Réponse B (Bonne)", "Réponse C"],
@@ -60,13 +65,26 @@ class TestGenerator:
         }
 
     @staticmethod
-    def generate_multiplication_table(table: int, count: int = 20) -> List[Dict[str, Any]]:
+    def generate_multiplication_table(table: int, count: int = 20, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        rng = get_rng(rng)
+        if np is not None and count >= VECTOR_MIN:
+            questions, answers, factors = arithmetic_problems("multiplication", "simple", count, numpy_rng(rng), table)
+            return [
+                {
+                    "id": exercise_id(f"flash_mul_{table}_{b}"),
+                    "type": "input",
+                    "question": question,
+                    "answer": answer
+                }
+                for question, answer, b in zip(questions, answers, factors)
+            ]
+
         exercises = []
-        for i in range(count):
-            # Pick a random number 1-10
-            b = random.randint(1, 10)
+        # The 10 facts of the table, without repeats until all have been asked
+        for i in distinct_indices(10, count, rng):
+            b = i + 1
             exercises.append({
-                "id": f"flash_mul_{table}_{b}_{random.randint(1000,9999)}",
+                "id": exercise_id(f"flash_mul_{table}_{b}"),
                 "type": "input",
                 "question": f"Combien font ${table} \\times {b}$ ?",
                 "answer": str(table * b)
@@ -75,20 +93,41 @@ class TestGenerator:
 
     # -- Legacy methods (to be kept/refactored if still used by flash mode) --
     @staticmethod
-    def generate_flash(courses: List[Course], total_questions: int = 15) -> List[Dict[str, Any]]:
+    def generate_flash(courses: List[Course], total_questions: int = 15, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        rng = get_rng(rng)
         flash_questions = []
         for _ in range(total_questions):
-            course = random.choice(courses)
+            course = rng.choice(courses)
             # On génère un mix de difficultés pour le mode flash
-            diff = random.choice(["simple", "medium", "hard"])
-            exercises = TestGenerator.generate_step_exercises(course, f"practice_{diff}", 1)
+            diff = rng.choice(["simple", "medium", "hard"])
+            exercises = TestGenerator.generate_step_exercises(course, f"practice_{diff}", 1, rng)
             if exercises:
                 flash_questions.append(exercises[0])
         return flash_questions
 
 class MathGenerator:
     @staticmethod
-    def generate(count: int, op_type: str, difficulty: str) -> List[Dict[str, Any]]:
+    def generate(count: int, op_type: str, difficulty: str, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        rng = get_rng(rng)
+        if difficulty not in ("simple", "medium", "hard"): # mix
+            difficulty = rng.choice(["simple", "medium", "hard"])
+
+        if np is not None and count >= VECTOR_MIN:
+            # Whole deck at once (see src.generators.arithmetic)
+            problems = arithmetic_problems(op_type, difficulty, count, numpy_rng(rng))
+            if problems is None:
+                return []
+            questions, answers, _ = problems
+            return [
+                {
+                    "id": exercise_id(f"math_{op_type}_{difficulty}"),
+                    "type": "input",
+                    "question": question,
+                    "answer": answer
+                }
+                for question, answer in zip(questions, answers)
+            ]
+
         exercises = []
         for i in range(count):
             # Paramètres de difficulté
@@ -96,14 +135,11 @@ class MathGenerator:
                 range_a, range_b = (1, 10), (1, 10)
             elif difficulty == "medium":
                 range_a, range_b = (10, 50), (1, 30)
-            elif difficulty == "hard":
+            else: # hard
                 range_a, range_b = (50, 200), (10, 100)
-            else: # mix
-                d = random.choice(["simple", "medium", "hard"])
-                return MathGenerator.generate(count, op_type, d)
 
-            a = random.randint(*range_a)
-            b = random.randint(*range_b)
+            a = rng.randint(*range_a)
+            b = rng.randint(*range_b)
             
             if op_type == "addition":
                 question = f"Combien font ${a} + {b}$ ?"
@@ -114,13 +150,13 @@ class MathGenerator:
                 question = f"Combien font ${a} - {b}$ ?"
                 answer = str(a - b)
             elif op_type == "multiplication":
-                if difficulty == "simple": a, b = random.randint(1, 5), random.randint(1, 10)
+                if difficulty == "simple": a, b = rng.randint(1, 5), rng.randint(1, 10)
                 question = f"Combien font ${a} \\times {b}$ ?"
                 answer = str(a * b)
             elif op_type == "division":
                 # Assurer un résultat entier
-                b = random.randint(2, 10)
-                res = random.randint(1, 10 if difficulty == "simple" else 20)
+                b = rng.randint(2, 10)
+                res = rng.randint(1, 10 if difficulty == "simple" else 20)
                 a = b * res
                 question = f"Combien font ${a} \\div {b}$ ?"
                 answer = str(res)
@@ -128,7 +164,7 @@ class MathGenerator:
                 continue
 
             exercises.append({
-                "id": f"math_{op_type}_{difficulty}_{i}_{random.randint(100, 999)}",
+                "id": exercise_id(f"math_{op_type}_{difficulty}"),
                 "type": "input",
                 "question": question,
                 "answer": answer
@@ -136,35 +172,23 @@ class MathGenerator:
         return exercises
 
 class FractionTestGenerator:
+    # Le module du générateur "fraction" n'est importé qu'au premier exercice (voir GeneratorRegistry)
     @staticmethod
-    def generate(count: int, gen_type: str, difficulty: str) -> List[Dict[str, Any]]:
-        # Integration with existing FractionGenerator logic
-        # For now, let's reuse simplification or generic fraction questions
-        exercises = []
-        for i in range(count):
-            # We can use TestGenerator's old simplification generator here or similar
-            # Placeholder for expansion
-            exercises.append(FractionTestGenerator.generate_one_simplification(difficulty))
-        return exercises
+    def generate(count: int, gen_type: str, difficulty: str, rng: Optional[random.Random] = None) -> List[Dict[str, Any]]:
+        from src.generators.fraction_exercise_generator import OPERATIONS as FRACTION_OPERATIONS, FractionExerciseGenerator
+        rng = get_rng(rng)
+        # "fraction_addition", "fraction_division"... ; "fraction" seul reste la simplification
+        op = gen_type.split("_", 1)[1] if "_" in gen_type else "simplification"
+        if op not in FRACTION_OPERATIONS:
+            op = "simplification"
+        return [FractionExerciseGenerator.generate_one(op, FractionTestGenerator._difficulty(difficulty), rng) for _ in range(count)]
 
     @staticmethod
-    def generate_one_simplification(difficulty: str) -> Dict[str, Any]:
-        # Reuse logic from original TestGenerator
-        if difficulty == "simple": f_range = (2, 5)
-        elif difficulty == "medium": f_range = (5, 10)
-        else: f_range = (10, 20)
-        
-        factor = random.randint(*f_range)
-        den_base = random.randint(2, 12)
-        num_base = random.randint(1, den_base - 1)
-        while math.gcd(num_base, den_base) != 1:
-            den_base = random.randint(2, 12)
-            num_base = random.randint(1, den_base - 1)
-            
-        num_p, den_p = num_base * factor, den_base * factor
-        return {
-            "id": f"frac_simp_{random.randint(1000, 9999)}",
-            "type": "input", # Change to input for better challenge
-            "question": f"Simplifiez la fraction $\\frac{{{num_p}}}{{{den_p}}}$",
-            "answer": f"{num_base}/{den_base}"
-        }
+    def _difficulty(difficulty: str) -> str:
+        # L'ancien générateur traitait toute difficulté inconnue (mix) comme "hard"
+        return difficulty if difficulty in ("simple", "medium") else "hard"
+
+    @staticmethod
+    def generate_one_simplification(difficulty: str, rng: Optional[random.Random] = None) -> Dict[str, Any]:
+        from src.generators.fraction_exercise_generator import FractionExerciseGenerator
+        return FractionExerciseGenerator.generate_one("simplification", FractionTestGenerator._difficulty(difficulty), get_rng(rng))
@@ -0,0 +1,357 @@
+import random
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Tuple
+from src.rng import distinct_indices
+
+try:
+    import numpy as np
+except ImportError:  # NumPy est optionnel : sample_columns n'est appelé que s'il est installé
+    np = None
+
+if TYPE_CHECKING:
+    from src.template_compiler import CompiledExpr
+
+# Nombre maximal d'affectations partielles visitées pour énumérer un domaine
+MAX_ENUMERATION = 1_000_000
+
+# Nom réservé désignant la valeur de la logique dans une contrainte (ex: "result < 100")
+RESULT_NAME = "result"
+
+# Résultat de l'énumération d'un groupe : affectations réalisables (None en cas d'échec) et erreurs
+Enumeration = Tuple[Optional[List[Tuple[Any, ...]]], List[str]]
+
+# Plus grand domaine dont les indices tiennent dans un int64 (tirage NumPy sans remise)
+MAX_INDEXED_DOMAIN = 2 ** 62
+
+
+def is_int_range(config: Dict[str, Any]) -> bool:
+    return all(
+        isinstance(v, int) and not isinstance(v, bool)
+        for v in (config.get("min", 0), config.get("max", 10))
+    )
+
+
+def var_values(config: Any) -> Optional[Sequence[Any]]:
+    """Valeurs possibles d'une variable ; None pour un intervalle non entier."""
+    if isinstance(config, list):
+        return config
+    if isinstance(config, dict):
+        if not is_int_range(config):
+            return None
+        return range(config.get("min", 0), config.get("max", 10) + 1)
+    return [config]
+
+
+class _Group:
+    """Variables liées par des contraintes et leurs affectations réalisables."""
+
+    def __init__(self, names: Tuple[str, ...], feasible: List[Tuple[Any, ...]]):
+        self.names = names
+        self.feasible = feasible
+
+
+class VariableSampler:
+    """
+    Tirage des variables d'un template, sous contraintes déclaratives.
+
+    Les variables liées par des contraintes forment des groupes dont le
+    domaine réalisable est énuméré une seule fois (retour arrière : chaque
+    contrainte est testée dès que ses variables sont fixées). Le tirage choisit
+    ensuite directement une affectation réalisable, sans boucle de rejet ; la
+    loi obtenue est celle d'un tirage indépendant conditionné par les contraintes.
+
+    Le tirage est uniforme sur les affectations réalisables d'un groupe : pour
+    "{taken} < {total}", un total élevé, qui admet plus de valeurs de taken, sort
+    plus souvent qu'avec un tirage de total puis de taken.
+
+    Une borne min/max peut être une expression des variables précédentes
+    (bounds, ex: max: "{total} - 1") : la variable est tirée après elles,
+    uniformément entre ses bornes, ce qui reproduit un tirage séquentiel.
+    Elle n'a alors pas de domaine fixe (ni indice, ni tirage en colonnes).
+
+    Les énumérations (domains) sont sauvegardées avec le snapshot du contenu et
+    réutilisées telles quelles au démarrage suivant.
+
+    Quand toutes les variables ont un domaine fini, chaque affectation a un
+    indice (numération à base mixte sur les domaines) : un lot tire des indices
+    sans remise, donc des exercices distincts tant que le domaine le permet.
+    """
+
+    def __init__(
+        self,
+        template_vars: Dict[str, Any],
+        constraints: Sequence["CompiledExpr"] = (),
+        logic: Optional["CompiledExpr"] = None,
+        domains: Optional[Dict[Tuple[str, ...], Enumeration]] = None,
+        bounds: Optional[Dict[Tuple[str, str], "CompiledExpr"]] = None
+    ):
+        self.template_vars = template_vars
+        self.order = list(template_vars)
+        self.errors: List[str] = []
+        self.groups: List[_Group] = []
+        # Énumération de chaque groupe contraint, par noms de variables (sérialisable)
+        self.domains: Dict[Tuple[str, ...], Enumeration] = {}
+
+        constraint_names: List[Set[str]] = []
+        for constraint in constraints:
+            names = constraint.names()
+            if RESULT_NAME in names:
+                names = (names - {RESULT_NAME}) | (logic.names() if logic else set())
+            unknown = names - set(template_vars)
+            if unknown:
+                self.errors.append(f"contrainte {constraint.raw!r}: variable(s) inconnue(s) {sorted(unknown)}")
+                constraint_names.append(set())
+            else:
+                constraint_names.append(names)
+
+        # Regroupement des variables partageant une contrainte (union-find)
+        parent = {name: name for name in template_vars}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for names in constraint_names:
+            names = list(names)
+            for other in names[1:]:
+                parent[find(other)] = find(names[0])
+
+        members: Dict[str, List[str]] = {}
+        for name in self.order:
+            members.setdefault(find(name), []).append(name)
+
+        constrained = set()
+        for group_names in members.values():
+            group_set = set(group_names)
+            group_constraints = [
+                (c, names) for c, names in zip(constraints, constraint_names)
+                if names and names <= group_set
+            ]
+            if not group_constraints:
+                continue
+            key = tuple(group_names)
+            if domains is not None and key in domains:
+                feasible, errors = domains[key]
+                self.errors.extend(errors)
+            else:
+                before = len(self.errors)
+                feasible = self._enumerate(group_names, group_constraints, logic)
+                errors = self.errors[before:]
+            self.domains[key] = (feasible, errors)
+            group = _Group(key, feasible) if feasible is not None else None
+            if group is not None:
+                self.groups.append(group)
+                constrained.update(group.names)
+
+        # Variables sans contrainte : tirage indépendant, comme avant
+        self.free = [name for name in self.order if name not in constrained]
+
+        # Bornes dépendantes : seulement des variables sans contrainte qui précèdent (déjà tirées)
+        self.bounds: Dict[Tuple[str, str], "CompiledExpr"] = {}
+        for (name, key), expr in (bounds or {}).items():
+            if name not in self.free:
+                continue
+            earlier = set(self.free[:self.free.index(name)])
+            if not expr.names() <= earlier:
+                self.errors.append(
+                    f"borne {key} de {name!r}: {sorted(expr.names() - earlier)} doit désigner des variables "
+                    f"précédentes sans contrainte, valeur par défaut utilisée"
+                )
+                continue
+            self.bounds[(name, key)] = expr
+        self._index_domains()
+
+    def _index_domains(self):
+        """Chiffres de la numération des affectations ; size vaut None si un domaine est infini."""
+        # (noms, valeurs possibles, groupe contraint ?)
+        self.digits: List[Tuple[Tuple[str, ...], Sequence[Any], bool]] = []
+        self.size: Optional[int] = 1
+        for name in self.free:
+            values = var_values(self.template_vars[name])
+            if not values:
+                self.size = None
+                return
+            self.digits.append(((name,), values, False))
+        for group in self.groups:
+            self.digits.append((group.names, group.feasible, True))
+        for _, values, _ in self.digits:
+            self.size *= len(values)
+
+    def _enumerate(
+        self,
+        names: List[str],
+        constraints: List[Tuple["CompiledExpr", Set[str]]],
+        logic: Optional["CompiledExpr"]
+    ) -> Optional[List[Tuple[Any, ...]]]:
+        domains = {}
+        for name in names:
+            values = var_values(self.template_vars[name])
+            if values is None:
+                self.errors.append(f"contrainte sur {name!r}: intervalle min/max non entier")
+                return None
+            domains[name] = values
+
+        # Les petits domaines d'abord : les contraintes élaguent plus tôt
+        ordered = sorted(names, key=lambda n: len(domains[n]))
+        # Contraintes testables à chaque profondeur (toutes leurs variables fixées)
+        checks: List[List["CompiledExpr"]] = [[] for _ in ordered]
+        for constraint, c_names in constraints:
+            depth = max(ordered.index(n) for n in c_names)
+            checks[depth].append(constraint)
+
+        feasible: List[Tuple[Any, ...]] = []
+        assignment: Dict[str, Any] = {}
+        visited = 0
+
+        def satisfied(depth: int) -> bool:
+            for constraint in checks[depth]:
+                try:
+                    scope = assignment
+                    if RESULT_NAME in constraint.names():
+                        scope = dict(assignment)
+                        scope[RESULT_NAME] = logic.evaluate(assignment) if logic else None
+                    if not constraint.evaluate(scope):
+                        return False
+                except Exception:
+                    # Contrainte non évaluable (division par zéro...) : affectation rejetée
+                    return False
+            return True
+
+        def walk(depth: int):
+            nonlocal visited
+            name = ordered[depth]
+            for value in domains[name]:
+                visited += 1
+                if visited > MAX_ENUMERATION:
+                    raise OverflowError
+                assignment[name] = value
+                if not satisfied(depth):
+                    continue
+                if depth + 1 == len(ordered):
+                    feasible.append(tuple(assignment[n] for n in names))
+                else:
+                    walk(depth + 1)
+            assignment.pop(name, None)
+
+        try:
+            walk(0)
+        except OverflowError:
+            self.errors.append(f"domaine des variables {names} trop grand pour être énuméré (> {MAX_ENUMERATION}), contraintes ignorées")
+            return None
+        if not feasible:
+            self.errors.append(f"aucune valeur de {names} ne satisfait les contraintes, contraintes ignorées")
+            return None
+        return feasible
+
+    @property
+    def constrained(self) -> bool:
+        return bool(self.groups)
+
+    def domain_sizes(self) -> Dict[Tuple[str, ...], int]:
+        """Nombre d'affectations réalisables de chaque groupe de variables."""
+        return {group.names: len(group.feasible) for group in self.groups}
+
+    def domain_size(self) -> Optional[int]:
+        """Nombre d'instances distinctes du template ; None si un intervalle n'est pas entier."""
+        return self.size
+
+    def assignment(self, index: int) -> Dict[str, Any]:
+        """Affectation d'indice index (0 <= index < domain_size())."""
+        values: Dict[str, Any] = {}
+        for names, domain, grouped in self.digits:
+            index, digit = divmod(index, len(domain))
+            if grouped:
+                values.update(zip(names, domain[digit]))
+            else:
+                values[names[0]] = domain[digit]
+        return {name: values[name] for name in self.order}
+
+    def sample_distinct(self, n: int, rng: random.Random) -> List[Dict[str, Any]]:
+        """n affectations, toutes distinctes si n <= domain_size() (sinon chaque affectation avant toute répétition)."""
+        if self.size is None:
+            return [self.sample(rng) for _ in range(n)]
+        return [self.assignment(index) for index in distinct_indices(self.size, n, rng)]
+
+    def sample(self, rng: random.Random) -> Dict[str, Any]:
+        """Une affectation des variables, dans l'ordre du template."""
+        values: Dict[str, Any] = {}
+        for var_name in self.free:
+            config = self.template_vars[var_name]
+            if isinstance(config, list):
+                values[var_name] = rng.choice(config)
+            elif isinstance(config, dict):
+                v_min = config.get("min", 0)
+                v_max = config.get("max", 10)
+                if isinstance(v_min, str):
+                    v_min = self._bound(var_name, "min", 0, values)
+                if isinstance(v_max, str):
+                    v_max = self._bound(var_name, "max", 10, values)
+                values[var_name] = rng.randint(v_min, v_max)
+            else:
+                values[var_name] = config
+        if not self.groups:
+            return values
+        for group in self.groups:
+            values.update(zip(group.names, rng.choice(group.feasible)))
+        return {name: values[name] for name in self.order}
+
+    def _bound(self, name: str, key: str, default: int, values: Dict[str, Any]) -> int:
+        expr = self.bounds.get((name, key))
+        return default if expr is None else int(expr.evaluate(values))
+
+    def sample_columns(self, n: int, rng) -> Optional[Dict[str, List[Any]]]:
+        """
+        n affectations tirées en colonnes avec un numpy.random.Generator,
+        sans remise comme sample_distinct quand le domaine est indexable.
+        None si un intervalle ne se prête pas au tirage vectorisé.
+        """
+        if self.size is not None and self.size <= MAX_INDEXED_DOMAIN:
+            return self._distinct_columns(n, rng)
+
+        columns: Dict[str, List[Any]] = {}
+        for var_name in self.free:
+            config = self.template_vars[var_name]
+            if isinstance(config, list):
+                if not config:
+                    return None
+                picks = rng.integers(0, len(config), size=n).tolist()
+                columns[var_name] = [config[i] for i in picks]
+            elif isinstance(config, dict):
+                v_min = config.get("min", 0)
+                v_max = config.get("max", 10)
+                if not is_int_range(config) or v_min > v_max:
+                    return None
+                columns[var_name] = rng.integers(v_min, v_max, size=n, endpoint=True).tolist()
+            else:
+                columns[var_name] = [config] * n
+        for group in self.groups:
+            picks = rng.integers(0, len(group.feasible), size=n).tolist()
+            rows = [group.feasible[i] for i in picks]
+            for j, name in enumerate(group.names):
+                columns[name] = [row[j] for row in rows]
+        return {name: columns[name] for name in self.order}
+
+    def _distinct_columns(self, n: int, rng) -> Dict[str, List[Any]]:
+        # Indices sans remise, une permutation du domaine après l'autre si n le dépasse
+        parts = []
+        remaining = n
+        while remaining > 0:
+            k = min(self.size, remaining)
+            parts.append(rng.choice(self.size, size=k, replace=False))
+            remaining -= k
+        index = np.concatenate(parts)
+
+        columns: Dict[str, List[Any]] = {}
+        for names, domain, grouped in self.digits:
+            index, digit = divmod(index, len(domain))
+            if isinstance(domain, range) and abs(domain.start) < MAX_INDEXED_DOMAIN and abs(domain.stop) < MAX_INDEXED_DOMAIN:
+                columns[names[0]] = (digit + domain.start).tolist()
+                continue
+            picks = [domain[i] for i in digit.tolist()]
+            if grouped:
+                for j, name in enumerate(names):
+                    columns[name] = [row[j] for row in picks]
+            else:
+                columns[names[0]] = picks
+        return {name: columns[name] for name in self.order}
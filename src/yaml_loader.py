@@ -0,0 +1,15 @@
+import yaml
+
+# Le loader C de libyaml est nettement plus rapide que le loader pur Python ;
+# on retombe sur ce dernier si PyYAML a été compilé sans libyaml.
+try:
+    from yaml import CSafeLoader as SafeLoader
+    YAML_BACKEND = "libyaml"
+except ImportError:
+    from yaml import SafeLoader
+    YAML_BACKEND = "python"
+
+
+def load_yaml(stream):
+    """Équivalent de yaml.safe_load, avec le loader C quand il est disponible."""
+    return yaml.load(stream, Loader=SafeLoader)
@@ -9,6 +9,16 @@ const FractionRenderer = {
         "Border": "#7f8c8d"
     },
 
+    // Server-rendered SVG (visual_url) when available, JS drawing into containerId otherwise
+    visualHtml: function (containerId, data) {
+        const style = "margin: 0 auto 1.5rem auto; width: 100%; max-width: 300px; height: 300px;";
+        if (data.visual_url) {
+            return `<img src="${data.visual_url}" alt="" style="display: block; ${style}">`;
+        }
+        setTimeout(() => FractionRenderer.render(containerId, data), 100);
+        return `<div id="${containerId}" style="${style}"></div>`;
+    },
+
     render: function (containerId, data) {
         const container = document.getElementById(containerId);
         if (!container) return;